@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from sqlER import (
+            configure_odbc_executor,
+            configure_pools,
+            configure_registry,
+            configure_render_cache,
+            start_refresher,
+        )
+
+        configure_pools(**getattr(settings, 'SQLER_POOL', {}))
+        configure_odbc_executor(getattr(settings, 'SQLER_ODBC_WORKERS', 8))
+        configure_render_cache(**getattr(settings, 'SQLER_RENDER_CACHE', {}))
+        configure_registry(**getattr(settings, 'SQLER_REGISTRY', {}))
+        refresher = getattr(settings, 'SQLER_REFRESHER', None)
+        if refresher is not None:
+            start_refresher(**refresher)
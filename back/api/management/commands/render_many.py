@@ -0,0 +1,84 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sqlER import ERGenerator, RenderSpec, TypeIntrospection, TypeRankdir, render_many
+
+
+class Command(BaseCommand):
+    help = (
+        "Render many ER diagrams from a JSON spec file, running the graphviz "
+        "layouts in parallel worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "spec_file",
+            help=(
+                'JSON file: {"databases": [{"server", "database", "username", "password", '
+                '"driver", "reasoning_FK", "reasoning_all_FK", "disable_sql_FK", '
+                '"renders": [{"name", "tables", "render_related", "field_omission", '
+                '"related_depth", "rankdir", "dpi", "format"}]}]}'
+            ),
+        )
+        parser.add_argument("--output-dir", default=".", help="Directory of the rendered files.")
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes. Defaults to the CPU count.")
+        parser.add_argument("--timeout", type=float, default=300.0, help="Seconds each layout may run.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["spec_file"], "r", encoding="utf-8") as f:
+                spec = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read {options['spec_file']}: {e}")
+        output_dir = options["output_dir"]
+        os.makedirs(output_dir, exist_ok=True)
+
+        jobs = []
+        for db in spec.get("databases", []):
+            diagram = ERGenerator(
+                driver=db.get("driver"),
+                server=db.get("server"),
+                database=db.get("database"),
+                username=db.get("username"),
+                password=db.get("password"),
+                reasoning_FK=db.get("reasoning_FK", False),
+                reasoning_all_FK=db.get("reasoning_all_FK", False),
+                disable_sql_FK=db.get("disable_sql_FK", False),
+                introspection=TypeIntrospection.BULK,
+                snapshot_dir=settings.SQLER_SNAPSHOT_DIR,
+            ).diagram
+            for render in db.get("renders", []):
+                name = render.get("name") or f"{db.get('database')}-{len(jobs)}"
+                jobs.append(
+                    (
+                        diagram,
+                        RenderSpec(
+                            name=name,
+                            render_tables=render.get("tables"),
+                            render_related=render.get("render_related", False),
+                            field_omission=render.get("field_omission", False),
+                            related_depth=render.get("related_depth", 1),
+                            rankdir=TypeRankdir(render.get("rankdir", "TB")),
+                            dpi=render.get("dpi", 1300),
+                            format=render.get("format", "svg"),
+                            filename=os.path.join(output_dir, name),
+                        ),
+                    )
+                )
+
+        failed = 0
+        for result in render_many(
+            jobs, workers=options["workers"], timeout=options["timeout"]
+        ):
+            if result.error is not None:
+                failed += 1
+                self.stderr.write(f"{result.spec.name}: {result.error}")
+            else:
+                self.stdout.write(
+                    f"{result.spec.name}: {len(result.data)} bytes in {result.seconds:.2f}s"
+                )
+        if failed:
+            raise CommandError(f"{failed} of {len(jobs)} renders failed")
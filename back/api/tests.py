@@ -1,3 +1,143 @@
-from django.test import TestCase
+import asyncio
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from sqlER import RenderCache, RenderLimits, TypeIntrospection, TypeRankdir
+from sqlER.tests.fakes import company
+
+
+class MetadataViewTests(SimpleTestCase):
+    def setUp(self):
+        catalog = company()
+        catalog.add_table("Staff", [("id", "int")], view=True)
+        self.generator = catalog.generator(introspection=TypeIntrospection.BULK)
+        registry = mock.Mock()
+        registry.aget = mock.AsyncMock(return_value=self.generator)
+        patcher = mock.patch("api.views.get_registry", return_value=registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.registry = registry
+
+    def test_default_facets_from_one_build(self):
+        response = self.client.get("/api/metadata", {"database": "db"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "database": "db",
+                "table_names": ["Department", "Employee"],
+                "view_names": ["Staff"],
+                "relations": self.generator.diagram.get_all_relations(),
+                "problem_tables": [],
+            },
+        )
+        self.registry.aget.assert_awaited_once()
+
+    def test_tables_are_projected_to_the_requested_fields(self):
+        response = self.client.get(
+            "/api/metadata",
+            {"facets": "view_names", "tables": "Employee,Missing", "fields": "name,primary_keys"},
+        )
+        self.assertEqual(
+            response.json(),
+            {
+                "database": "AdventureWorks2019",
+                "view_names": ["Staff"],
+                "tables": {"Employee": {"name": "Employee", "primary_keys": ["id"]}},
+                "missing": ["Missing"],
+            },
+        )
+
+    def test_unknown_facets_and_fields_are_rejected(self):
+        response = self.client.get("/api/metadata", {"facets": "colors", "fields": "name,size"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "unknown facets or fields: colors, size"})
+        self.registry.aget.assert_not_awaited()
+
+    def test_flags_select_the_registry_entry(self):
+        self.client.get("/api/metadata", {"reasoning_FK": "false", "disable_sqlFK": "true"})
+        arguments = self.registry.aget.await_args.kwargs
+        self.assertFalse(arguments["reasoning_FK"])
+        self.assertTrue(arguments["disable_sql_FK"])
+        self.assertIs(arguments["introspection"], TypeIntrospection.BULK)
+
+
+class ErViewTests(SimpleTestCase):
+    def setUp(self):
+        self.generator = company().generator(introspection=TypeIntrospection.BULK)
+        registry = mock.Mock()
+        registry.aget = mock.AsyncMock(return_value=self.generator)
+        self.cache = RenderCache()
+        self.layouts = []
+        self.slow = set()
+        for target, replacement in (
+            ("api.views.get_registry", mock.Mock(return_value=registry)),
+            ("api.views.get_render_cache", mock.Mock(return_value=self.cache)),
+            ("sqlER.ERDiagram.ERDiagram.arun_layout", self.layout),
+        ):
+            patcher = mock.patch(target, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.registry = registry
+
+    async def layout(self, source, format="svg", engine="dot", timeout=None):
+        self.layouts.append(engine)
+        if engine in self.slow:
+            raise asyncio.TimeoutError()
+        return b'<svg width="100pt" height="50pt" viewBox="0.00 0.00 100.00 50.00"><g/></svg>'
+
+    def test_svg_is_rendered_once_then_served_from_cache(self):
+        first = self.client.get("/api/er", {"tables": "Employee"})
+        self.assertEqual(first.status_code, 200)
+        self.assertIn(b'preserveAspectRatio="xMidYMid meet"', first.content)
+        second = self.client.get("/api/er", {"tables": "Employee"})
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(self.layouts, ["dot"])
+
+    def test_matching_etag_is_not_rendered(self):
+        etag = self.client.get("/api/er")["ETag"]
+        self.layouts.clear()
+        with mock.patch.object(self.generator, "arender_diagrams") as arender_diagrams:
+            response = self.client.get("/api/er", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        arender_diagrams.assert_not_called()
+        self.assertEqual(self.layouts, [])
+
+    def test_patched_svg_does_not_share_the_plain_render_key(self):
+        response = self.client.get("/api/er", {"render_related": "false"})
+        options = dict(
+            rankdir=TypeRankdir.LR,
+            render_related=False,
+            limits=RenderLimits(**settings.SQLER_RENDER_LIMITS),
+        )
+        patched_key = self.generator.render_key(format="svg+patched", **options)
+        self.assertEqual(response["ETag"], f'"{patched_key}"')
+        self.assertIsNotNone(self.cache.get(patched_key))
+        self.assertIsNone(self.cache.get(self.generator.render_key(**options)))
+
+    def test_timeout_fallback_is_neither_cached_nor_tagged(self):
+        self.slow.add("dot")
+        for _ in range(2):
+            response = self.client.get("/api/er")
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.has_header("ETag"))
+            self.assertEqual(response["Cache-Control"], "no-store")
+        self.assertEqual(self.layouts, ["dot", "sfdp"] * 2)
+
+    def test_non_numeric_related_depth_is_rejected(self):
+        response = self.client.get("/api/er", {"related_depth": "two"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "related_depth must be a number"})
+        self.registry.aget.assert_not_awaited()
+
+    def test_related_depth_is_clamped(self):
+        with mock.patch.object(self.generator, "render_key", return_value="0" * 64) as render_key:
+            for depth, clamped in (("-3", 0), ("1000", 10)):
+                self.client.get(
+                    "/api/er", {"related_depth": depth}, HTTP_IF_NONE_MATCH=f'"{"0" * 64}"'
+                )
+                self.assertEqual(render_key.call_args.kwargs["related_depth"], clamped)
@@ -7,6 +7,9 @@ urlpatterns = [
     path("get_table", views.get_table),
     path("get_view_names", views.get_view_names),
     path("get_all_relations", views.get_all_relations),
+    path("metadata", views.metadata),
+    path("join_path", views.join_path),
     path("er", views.er),
+    path("refresh", views.refresh),
     path("eval", views.eval),
 ]
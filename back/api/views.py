@@ -1,8 +1,27 @@
 from typing import Optional
 import re
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.conf import settings
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseNotModified,
+    JsonResponse,
+)
+from django.utils.http import parse_etags
 
-from sqlER import ERDiagram, ERGenerator, TypeRankdir
+from sqlER import (
+    ERDiagram,
+    ERGenerator,
+    RenderLimits,
+    RenderTimeout,
+    TransientRender,
+    TypeDetail,
+    TypeIntrospection,
+    TypeRankdir,
+    get_registry,
+    get_render_cache,
+    get_render_flights,
+)
 from eval.eval import eval_qa
 from eval.test_case import (
     qa1_case1,
@@ -24,19 +43,21 @@ driver_ = "ODBC Driver 17 for SQL Server"
 schema_ = "HumanResources"
 
 
-def get_table_names(request: HttpRequest) -> JsonResponse:
+async def get_table_names(request: HttpRequest) -> JsonResponse:
     server: str = request.GET.get("server", server_)
     Name_database: str = request.GET.get("database", Name_database_)
     username: str = request.GET.get("username", username_)
     password: str = request.GET.get("password", password_)
     driver: str = request.GET.get("driver", driver_)
     schema: Optional[str] = request.GET.get("schema", schema_)
-    erg: ERGenerator = ERGenerator(
+    erg: ERGenerator = await get_registry().aget(
         driver=driver,
         server=server,
         database=Name_database,
         username=username,
         password=password,
+        introspection=TypeIntrospection.BULK,
+        snapshot_dir=settings.SQLER_SNAPSHOT_DIR,
     )
     erd: ERDiagram = erg.diagram
     return JsonResponse(
@@ -47,19 +68,23 @@ def get_table_names(request: HttpRequest) -> JsonResponse:
     )
 
 
-def get_view_names(request: HttpRequest) -> JsonResponse:
+async def get_view_names(request: HttpRequest) -> JsonResponse:
     server: str = request.GET.get("server", server_)
     Name_database: str = request.GET.get("database", Name_database_)
     username: str = request.GET.get("username", username_)
     password: str = request.GET.get("password", password_)
     driver: str = request.GET.get("driver", driver_)
     schema: Optional[str] = request.GET.get("schema", schema_)
-    erd: ERDiagram = ERGenerator(
-        driver=driver,
-        server=server,
-        database=Name_database,
-        username=username,
-        password=password,
+    erd: ERDiagram = (
+        await get_registry().aget(
+            driver=driver,
+            server=server,
+            database=Name_database,
+            username=username,
+            password=password,
+            introspection=TypeIntrospection.BULK,
+            snapshot_dir=settings.SQLER_SNAPSHOT_DIR,
+        )
     ).diagram
     return JsonResponse(
         {
@@ -68,47 +93,238 @@ def get_view_names(request: HttpRequest) -> JsonResponse:
     )
 
 
-def get_all_relations(request: HttpRequest) -> JsonResponse:
+async def get_all_relations(request: HttpRequest) -> JsonResponse:
     server: str = request.GET.get("server", server_)
     Name_database: str = request.GET.get("database", Name_database_)
     username: str = request.GET.get("username", username_)
     password: str = request.GET.get("password", password_)
     driver: str = request.GET.get("driver", driver_)
     schema: Optional[str] = request.GET.get("schema", schema_)
-    erd: ERDiagram = ERGenerator(
+    erd: ERDiagram = (
+        await get_registry().aget(
+            driver=driver,
+            server=server,
+            database=Name_database,
+            username=username,
+            password=password,
+            introspection=TypeIntrospection.BULK,
+            snapshot_dir=settings.SQLER_SNAPSHOT_DIR,
+            reasoning_FK=True,
+        )
+    ).diagram
+    return JsonResponse(
+        {
+            "view_names": erd.get_all_relations(),
+        }
+    )
+
+
+async def join_path(request: HttpRequest) -> JsonResponse:
+    """Shortest ways to join two tables, as ordered (table, field) -> (table, field) hops."""
+    server: str = request.GET.get("server", server_)
+    Name_database: str = request.GET.get("database", Name_database_)
+    username: str = request.GET.get("username", username_)
+    password: str = request.GET.get("password", password_)
+    driver: str = request.GET.get("driver", driver_)
+    from_table: Optional[str] = request.GET.get("from", None)
+    to_table: Optional[str] = request.GET.get("to", None)
+    if not from_table or not to_table:
+        return JsonResponse({"error": "from and to are required"}, status=400)
+    try:
+        k: int = max(1, min(int(request.GET.get("k", "1")), 20))
+        reasoned_cost: float = float(request.GET.get("reasoned_cost", "1"))
+    except ValueError:
+        return JsonResponse({"error": "k and reasoned_cost must be numbers"}, status=400)
+    reasoning_FK: bool = request.GET.get("reasoning_FK", "true").lower() == "true"
+    reasoning_all_FK: bool = (
+        request.GET.get("reasoning_all_FK", "false").lower() == "true"
+    )
+    disable_sqlFK: bool = request.GET.get("disable_sqlFK", "false").lower() == "true"
+    erd: ERDiagram = (
+        await get_registry().aget(
+            driver=driver,
+            server=server,
+            database=Name_database,
+            username=username,
+            password=password,
+            introspection=TypeIntrospection.BULK,
+            snapshot_dir=settings.SQLER_SNAPSHOT_DIR,
+            reasoning_FK=reasoning_FK,
+            reasoning_all_FK=reasoning_all_FK,
+            disable_sql_FK=disable_sqlFK,
+        )
+    ).diagram
+    for table_name in (from_table, to_table):
+        if erd.get_table(table_name) is None:
+            return JsonResponse({"error": f"unknown table {table_name}"}, status=404)
+    return JsonResponse(
+        {
+            "from": from_table,
+            "to": to_table,
+            "paths": [
+                {"cost": cost, "hops": [hop.get_dict() for hop in hops]}
+                for cost, hops in erd.join_paths(from_table, to_table, k, reasoned_cost)
+            ],
+        }
+    )
+
+
+async def refresh(request: HttpRequest) -> JsonResponse:
+    """Introspect a database again, replacing every registered diagram of it."""
+    server: str = request.GET.get("server", server_)
+    Name_database: str = request.GET.get("database", Name_database_)
+    username: str = request.GET.get("username", username_)
+    password: str = request.GET.get("password", password_)
+    driver: str = request.GET.get("driver", driver_)
+    reasoning_FK: bool = request.GET.get("reasoning_FK", "false").lower() == "true"
+    reasoning_all_FK: bool = (
+        request.GET.get("reasoning_all_FK", "false").lower() == "true"
+    )
+    disable_sqlFK: bool = request.GET.get("disable_sqlFK", "false").lower() == "true"
+    registry = get_registry()
+    invalidated: int = registry.invalidate_database(server, Name_database)
+    erg: ERGenerator = await registry.arefresh(
         driver=driver,
         server=server,
         database=Name_database,
         username=username,
         password=password,
-        reasoning_FK=True,
-    ).diagram
+        introspection=TypeIntrospection.BULK,
+        snapshot_dir=settings.SQLER_SNAPSHOT_DIR,
+        reasoning_FK=reasoning_FK,
+        reasoning_all_FK=reasoning_all_FK,
+        disable_sql_FK=disable_sqlFK,
+    )
     return JsonResponse(
         {
-            "view_names": erd.get_all_relations(),
+            "database": Name_database,
+            "invalidated": invalidated,
+            "table_names": erg.diagram.get_table_names(),
+            "problem_tables": erg.get_problem_tables(),
         }
     )
 
 
-def get_table(request: HttpRequest) -> JsonResponse:  # TODO: unfinished
+async def get_table(request: HttpRequest) -> JsonResponse:
     server: str = request.GET.get("server", server_)
     Name_database: str = request.GET.get("database", Name_database_)
     username: str = request.GET.get("username", username_)
     password: str = request.GET.get("password", password_)
     driver: str = request.GET.get("driver", driver_)
     schema: Optional[str] = request.GET.get("schema", schema_)
-    erd: ERDiagram = ERGenerator(
+    table_name: str = request.GET.get("table", "Employee")
+    erd: ERDiagram = (
+        await get_registry().aget(
+            driver=driver,
+            server=server,
+            database=Name_database,
+            username=username,
+            password=password,
+            introspection=TypeIntrospection.BULK,
+            snapshot_dir=settings.SQLER_SNAPSHOT_DIR,
+        )
+    ).diagram
+    table = erd.get_table(table_name)
+    if table is None:
+        return JsonResponse({"error": f"unknown table {table_name}"}, status=404)
+    return JsonResponse(table.get_dict())
+
+
+# Facets the metadata endpoint can return, and the keys of its table payloads
+METADATA_FACETS = ("table_names", "view_names", "relations", "problem_tables", "tables")
+TABLE_FIELDS = (
+    "name",
+    "fields",
+    "primary_keys",
+    "foreign_keys",
+    "is_view",
+    "schema",
+    "comments",
+)
+
+
+async def metadata(request: HttpRequest) -> JsonResponse:
+    """
+    Several metadata facets of one database from a single diagram build.
+
+    facets: comma-separated METADATA_FACETS (default all but tables; tables
+    is implied by the tables parameter). tables: names of the tables (or
+    views) whose get_dict() payload is returned under "tables", unknown
+    ones under "missing". fields: comma-separated TABLE_FIELDS each table
+    payload is projected to (default all).
+    """
+    server: str = request.GET.get("server", server_)
+    Name_database: str = request.GET.get("database", Name_database_)
+    username: str = request.GET.get("username", username_)
+    password: str = request.GET.get("password", password_)
+    driver: str = request.GET.get("driver", driver_)
+    table_names: list[str] = [
+        name for name in request.GET.get("tables", "").split(",") if name
+    ]
+    facets: list[str] = [
+        facet
+        for facet in request.GET.get(
+            "facets", "table_names,view_names,relations,problem_tables"
+        ).split(",")
+        if facet
+    ]
+    if table_names and "tables" not in facets:
+        facets.append("tables")
+    fields: list[str] = [
+        field
+        for field in request.GET.get("fields", ",".join(TABLE_FIELDS)).split(",")
+        if field
+    ]
+    unknown = [facet for facet in facets if facet not in METADATA_FACETS] + [
+        field for field in fields if field not in TABLE_FIELDS
+    ]
+    if unknown:
+        return JsonResponse(
+            {"error": f"unknown facets or fields: {', '.join(unknown)}"}, status=400
+        )
+    reasoning_FK: bool = request.GET.get("reasoning_FK", "true").lower() == "true"
+    reasoning_all_FK: bool = (
+        request.GET.get("reasoning_all_FK", "false").lower() == "true"
+    )
+    disable_sqlFK: bool = request.GET.get("disable_sqlFK", "false").lower() == "true"
+    erg: ERGenerator = await get_registry().aget(
         driver=driver,
         server=server,
         database=Name_database,
         username=username,
         password=password,
-    ).diagram
-    table: dict = erd.get_table("Employee").get_dict()
-    return JsonResponse(table)
+        introspection=TypeIntrospection.BULK,
+        snapshot_dir=settings.SQLER_SNAPSHOT_DIR,
+        reasoning_FK=reasoning_FK,
+        reasoning_all_FK=reasoning_all_FK,
+        disable_sql_FK=disable_sqlFK,
+    )
+    erd: ERDiagram = erg.diagram
+    response: dict = {"database": Name_database}
+    if "table_names" in facets:
+        response["table_names"] = erd.get_table_names()
+    if "view_names" in facets:
+        response["view_names"] = erd.get_view_names()
+    if "relations" in facets:
+        response["relations"] = erd.get_all_relations()
+    if "problem_tables" in facets:
+        response["problem_tables"] = erg.get_problem_tables()
+    if "tables" in facets:
+        tables: dict = {}
+        missing: list[str] = []
+        for table_name in table_names:
+            table = erd.get_table(table_name)
+            if table is None:
+                missing.append(table_name)
+                continue
+            payload = table.get_dict()
+            tables[table_name] = {field: payload[field] for field in fields}
+        response["tables"] = tables
+        response["missing"] = missing
+    return JsonResponse(response)
 
 
-def er(request: HttpRequest) -> HttpResponse:
+async def er(request: HttpRequest) -> HttpResponse:
     """Serve ER diagram as SVG."""
     if request.method == "GET":
         render_tables = None
@@ -146,48 +362,125 @@ def er(request: HttpRequest) -> HttpResponse:
         field_omission: bool = (
             request.GET.get("field_omission", "false").lower() == "true"
         )
+        try:
+            related_depth: int = max(0, min(int(request.GET.get("related_depth", "1")), 10))
+        except ValueError:
+            return JsonResponse({"error": "related_depth must be a number"}, status=400)
+        split_components: bool = (
+            request.GET.get("split_components", "false").lower() == "true"
+        )
+        # json: the graph model for client-side layout, plus graphviz positions if layout=true
+        render_format: str = request.GET.get("format", "svg").lower()
+        if render_format not in ("svg", "json"):
+            return JsonResponse({"error": "format must be svg or json"}, status=400)
+        layout: bool = request.GET.get("layout", "false").lower() == "true"
+        # schema: one node per schema, keys: key columns only, full: every column
+        try:
+            detail = TypeDetail(request.GET.get("detail", "full").lower())
+        except ValueError:
+            return JsonResponse({"error": "detail must be schema, keys or full"}, status=400)
         print(
             f"Received data: {render_tables}\nreasoning_FK: {reasoning_FK}, reasoning_all_FK: {reasoning_all_FK},\
             disable_sqlFK: {disable_sqlFK}, rankdir: {rankdir}, render_related: {render_related},\
             field_omission: {field_omission}"
         )
-        diagram_gen = ERGenerator(
+        diagram_gen = await get_registry().aget(
             driver=driver,
             server=server,
             database=Name_database,
             username=username,
             password=password,
+            introspection=TypeIntrospection.BULK,
+            snapshot_dir=settings.SQLER_SNAPSHOT_DIR,
             reasoning_FK=reasoning_FK,
             reasoning_all_FK=reasoning_all_FK,
             disable_sql_FK=disable_sqlFK,
         )
-        svg_data = diagram_gen.render_diagrams(
+        limits = RenderLimits(**getattr(settings, "SQLER_RENDER_LIMITS", {}))
+        if render_format == "json":
+            return await _er_graph(
+                request,
+                diagram_gen,
+                rankdir=rankdir,
+                render_tables=render_tables,
+                render_related=render_related,
+                field_omission=field_omission,
+                related_depth=related_depth,
+                layout=layout,
+                limits=limits,
+                detail=detail,
+            )
+        render_key: str = diagram_gen.render_key(
             rankdir=rankdir,
             render_tables=render_tables,
             render_related=render_related,
             field_omission=field_omission,
-        ).decode("utf-8")
-        svg_data = re.sub(
-            r'<svg\s+width="[^"]+"\s+height="[^"]+"',
-            '<svg preserveAspectRatio="xMidYMid meet"',
-            svg_data,
-            count=1,
+            related_depth=related_depth,
+            split_components=split_components,
+            # The view caches the SVG with its header patched, apart from plain renders
+            format="svg+patched",
+            limits=limits,
+            detail=detail,
         )
-        return HttpResponse(svg_data, content_type="image/svg+xml")
+        etag: str = f'"{render_key}"'
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            return response
+        # Cached with the header patch applied, so a hit is served as is
+        cache = get_render_cache()
+        svg_bytes: Optional[bytes] = cache.get(render_key)
+        if svg_bytes is None:
+
+            async def render() -> bytes:
+                svg = await diagram_gen.arender_diagrams(
+                    rankdir=rankdir,
+                    render_tables=render_tables,
+                    render_related=render_related,
+                    field_omission=field_omission,
+                    related_depth=related_depth,
+                    split_components=split_components,
+                    limits=limits,
+                    detail=detail,
+                )
+                svg_data = re.sub(
+                    r'<svg\s+width="[^"]+"\s+height="[^"]+"',
+                    '<svg preserveAspectRatio="xMidYMid meet"',
+                    svg.decode("utf-8"),
+                    count=1,
+                )
+                patched = svg_data.encode("utf-8")
+                # A timeout fallback stays transient, so the cache does not keep it
+                return TransientRender(patched) if isinstance(svg, TransientRender) else patched
+
+            # Identical requests (of any worker) share one render, which is cancelled
+            # (killing graphviz) only when all of their clients have disconnected
+            try:
+                svg_bytes = await get_render_flights().ado(
+                    f"er:{render_key}", cache.aget_or_render, render_key, render
+                )
+            except RenderTimeout as e:
+                return JsonResponse({"error": str(e)}, status=503)
+        response = HttpResponse(svg_bytes, content_type="image/svg+xml")
+        _set_validators(response, etag, svg_bytes)
+        return response
     else:
         driver = driver_
         server = server_
         Name_database = Name_database_
         username = username_
         password = password_
-        diagram_gen = ERGenerator(
+        diagram_gen = await get_registry().aget(
             driver=driver,
             server=server,
             database=Name_database,
             username=username,
             password=password,
+            introspection=TypeIntrospection.BULK,
+            snapshot_dir=settings.SQLER_SNAPSHOT_DIR,
         )
-        svg_data = diagram_gen.render_diagrams().decode("utf-8")
+        svg_data = (await diagram_gen.arender_diagrams()).decode("utf-8")
         svg_data = re.sub(
             r'<svg\s+width="[^"]+"\s+height="[^"]+"',
             '<svg preserveAspectRatio="xMidYMid meet"',
@@ -200,6 +493,62 @@ def er(request: HttpRequest) -> HttpResponse:
         )
 
 
+async def _er_graph(
+    request: HttpRequest,
+    diagram_gen: ERGenerator,
+    rankdir: TypeRankdir,
+    render_tables: Optional[list[str]],
+    render_related: bool,
+    field_omission: bool,
+    related_depth: int,
+    layout: bool,
+    limits: RenderLimits,
+    detail: TypeDetail,
+) -> HttpResponse:
+    render_key: str = diagram_gen.render_key(
+        rankdir=rankdir,
+        render_tables=render_tables,
+        render_related=render_related,
+        field_omission=field_omission,
+        related_depth=related_depth,
+        format="json+layout" if layout else "json",
+        limits=limits if layout else None,
+        detail=detail,
+    )
+    etag: str = f'"{render_key}"'
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in if_none_match or "*" in if_none_match:
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+    try:
+        data: bytes = await diagram_gen.agraph_json(
+            rankdir=rankdir,
+            render_tables=render_tables,
+            render_related=render_related,
+            field_omission=field_omission,
+            related_depth=related_depth,
+            layout=layout,
+            cache=get_render_cache(),
+            limits=limits,
+            detail=detail,
+        )
+    except RenderTimeout as e:
+        return JsonResponse({"error": str(e)}, status=503)
+    response = HttpResponse(data, content_type="application/json")
+    _set_validators(response, etag, data)
+    return response
+
+
+def _set_validators(response: HttpResponse, etag: str, data: bytes) -> None:
+    # A fallback forced by a dot timeout does not match its key, so it gets no ETag
+    if isinstance(data, TransientRender):
+        response["Cache-Control"] = "no-store"
+    else:
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+
+
 from eval.generate_dict_main import level1_names, level2_names, level3_names
 from eval.question_2 import SECTION_INDICES
 
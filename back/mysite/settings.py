@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'api',
 ]
 
 MIDDLEWARE = [
@@ -121,3 +122,63 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# sqlER connection pool, shared by all requests of a worker process
+# See sqlER.connection.pool.ConnectionPool for the available keys.
+
+SQLER_POOL = {
+    'max_size': 8,
+    'idle_timeout': 300,
+    'checkout_timeout': 30,
+    'health_check_after': 30,
+}
+
+# Threads running blocking ODBC work for the async views
+
+SQLER_ODBC_WORKERS = 8
+
+
+# Introspection results are kept here and reused until the catalog changes
+
+SQLER_SNAPSHOT_DIR = BASE_DIR / '.sqler_cache' / 'snapshots'
+
+
+# Rendered diagrams, keyed by a digest of the diagram and render parameters
+
+SQLER_RENDER_CACHE = {
+    'max_bytes': 64 * 1024 * 1024,
+    'directory': BASE_DIR / '.sqler_cache' / 'renders',
+    'max_disk_bytes': 512 * 1024 * 1024,
+}
+
+
+# Introspected databases shared by all api views of this process: kept for
+# 'ttl' seconds, least recently used evicted past 'max_entries'
+
+SQLER_REGISTRY = {
+    'max_entries': 32,
+    'ttl': 600,
+}
+
+
+# Background thread re-introspecting registered databases whose catalog
+# changed or whose entry expired; requests keep the previous diagram
+# meanwhile. None disables it (expired entries are rebuilt on request)
+
+SQLER_REFRESHER = {
+    'interval': 60,
+}
+
+
+# Render watchdog: dot is killed after 'timeout' seconds, and drawings over
+# the node/edge limits (or killed) are redrawn by the fallback engine
+
+SQLER_RENDER_LIMITS = {
+    'timeout': 60,
+    'max_nodes': 400,
+    'max_edges': 1000,
+    'fallback_engine': 'sfdp',
+    'fallback_timeout': 60,
+    'summarize': True,
+}
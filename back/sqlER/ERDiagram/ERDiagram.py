@@ -1,14 +1,163 @@
+import asyncio
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-import re, difflib
-from typing import Dict, List, Optional, Tuple, Union
+from itertools import count
+import json, math, os, re, subprocess, sys, threading
+from typing import (
+    AbstractSet,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 from graphviz import Digraph
 from pyodbc import Error
-from ..connection import dbConnection
+from ..cache import RenderCache, TransientRender, content_key, get_render_flights
+from ..connection import dbConnection, run_odbc
+from ..graph import (
+    Adjacency,
+    arun_layout,
+    connected_components,
+    k_shortest_paths,
+    pack_svgs,
+    run_layout,
+)
+from ..reasoning import FKInferenceEngine, InclusionDependencyDiscovery
+from ..snapshot import SchemaSnapshot
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    # Names repeat across tables, relations and cached databases; share one copy
+    return sys.intern(value) if type(value) is str else value
+
+
+def _pack(svgs: List[bytes]) -> bytes:
+    # pack_svgs(), keeping the drawing transient if any cluster fell back on a timeout
+    data = pack_svgs(svgs)
+    return TransientRender(data) if any(isinstance(svg, TransientRender) for svg in svgs) else data
+
+
+class Field(NamedTuple):
+    name: str
+    type: str
+    constraint: str
+    nullable: bool
+
+
+class ForeignKey(NamedTuple):
+    field: str  # local field
+    ref_table: str
+    ref_field: str
+    constraint: str
+    reasoning: bool
+
+
+class TableRelation(NamedTuple):
+    from_table: str
+    from_field: str
+    to_table: str
+    to_field: str
+    label: str
+    reasoning: bool
+    confidence: Optional[float] = None
+
+    def get_dict(self) -> dict:
+        relation = {
+            "from_table": self.from_table,
+            "from_field": self.from_field,
+            "to_table": self.to_table,
+            "to_field": self.to_field,
+            "label": self.label,
+            "reasoning": self.reasoning,
+        }
+        if self.confidence is not None:
+            relation["confidence"] = self.confidence
+        return relation
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TableRelation":
+        return cls(
+            _intern(data["from_table"]),
+            _intern(data["from_field"]),
+            _intern(data["to_table"]),
+            _intern(data["to_field"]),
+            _intern(data["label"]),
+            data["reasoning"],
+            data.get("confidence"),
+        )
+
+
+class JoinHop(NamedTuple):
+    """One join step, in the direction the path walks (not the FK direction)."""
+
+    from_table: str
+    from_field: str
+    to_table: str
+    to_field: str
+    label: str
+    reasoning: bool
+
+    def get_dict(self) -> dict:
+        return self._asdict()
+
+
+# Join path queries remembered per diagram, until its relations change
+PATH_CACHE_SIZE: int = 256
+# Smaller groups of connected tables share one graphviz process when split
+MIN_CLUSTER_SIZE: int = 8
+# Labels kept per table (one per field filter and font settings seen)
+LABEL_VARIANTS: int = 4
+
+# Table versions are unique across tables, so a new table never matches an old label
+_table_versions = count()
+# Matches no field name, so only key fields are drawn (the summarized view)
+_KEYS_ONLY: AbstractSet[str] = frozenset({""})
+# Schema node of tables introspected without a schema (TypeDetail.SCHEMA)
+DEFAULT_SCHEMA_NODE: str = "(default)"
+
+
+class RenderLimits(NamedTuple):
+    """
+    Watchdog of one render. A drawing with more than max_nodes tables or
+    max_edges relationships, or whose dot layout is killed after timeout
+    seconds, is laid out again with the cheaper fallback_engine, showing
+    only key fields if summarize.
+    """
+
+    timeout: Optional[float] = 60
+    max_nodes: int = 400
+    max_edges: int = 1000
+    fallback_engine: str = "sfdp"
+    fallback_timeout: Optional[float] = 60
+    summarize: bool = True
+
+
+class RenderTimeout(TimeoutError):
+    """Neither dot nor the fallback engine finished within the render limits."""
 
 
 class Table:
     """Represents a database table or view."""
 
+    __slots__ = (
+        "name",
+        "fields",
+        "primary_keys",
+        "foreign_keys",
+        "is_view",
+        "schema",
+        "comments",
+        "_field_index",
+        "_version",
+    )
+
     def __init__(self, name: str, is_view: bool = False, schema: Optional[str] = None):
         """
         Initialize a Table instance.
@@ -18,17 +167,22 @@ class Table:
             is_view (bool, optional): Indicates if it's a view. Defaults to False.
             schema (str, optional): Schema name. Defaults to None.
         """
-        self.name = name
-        self.fields: List[
-            Tuple[str, str, str, bool]
-        ] = []  # (field name, type, constraint)
+        self.name = _intern(name)
+        self.fields: List[Field] = []  # (field name, type, constraint, nullable)
         self.primary_keys: List[str] = []
         self.foreign_keys: List[
-            Tuple[str, str, str, str, bool]
+            ForeignKey
         ] = []  # (local field, referenced table, referenced field, constraint, reasoning)
         self.is_view = is_view
-        self.schema = schema
+        self.schema = _intern(schema)
         self.comments: List[str] = []  # External comments for the table
+        self._field_index: Dict[str, int] = {}  # field name -> position in fields
+        self._version: int = next(_table_versions)
+
+    @property
+    def version(self) -> int:
+        """Changes whenever a field, key or comment is added or removed through the Table methods."""
+        return self._version
 
     def get_dict(self) -> dict:
         return {
@@ -58,6 +212,68 @@ class Table:
             "comments": self.comments,
         }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "Table":
+        """
+        Rebuild a Table from the output of get_dict().
+
+        Args:
+            data (dict): Dictionary produced by Table.get_dict().
+
+        Returns:
+            Table: Restored table object
+        """
+        table = cls(data["name"], is_view=data["is_view"], schema=data["schema"])
+        for field in data["fields"]:
+            table.add_field(
+                field["name"], field["type"], field["constraint"], field["nullable"]
+            )
+        table.primary_keys = [_intern(name) for name in data["primary_keys"]]
+        table.foreign_keys = [
+            ForeignKey(
+                _intern(fk["field"]),
+                _intern(fk["ref_table"]),
+                _intern(fk["ref_field"]),
+                _intern(fk["constraint"]),
+                fk["reasoning"],
+            )
+            for fk in data["foreign_keys"]
+        ]
+        table.comments = list(data["comments"])
+        return table
+
+    def get_record(self) -> list:
+        """
+        Compact form of get_dict(): [name, schema, is_view, fields, primary_keys,
+        foreign_keys, comments], with fields and foreign keys as lists.
+        """
+        return [
+            self.name,
+            self.schema,
+            self.is_view,
+            [list(field) for field in self.fields],
+            self.primary_keys,
+            [list(fk) for fk in self.foreign_keys],
+            self.comments,
+        ]
+
+    @classmethod
+    def from_record(cls, record: list) -> "Table":
+        """Rebuild a Table from the output of get_record()."""
+        name, schema, is_view, fields, primary_keys, foreign_keys, comments = record
+        table = cls(name, is_view=is_view, schema=schema)
+        for field_name, type, constraint, nullable in fields:
+            table.add_field(field_name, type, constraint, nullable)
+        table.primary_keys = [_intern(key) for key in primary_keys]
+        table.foreign_keys = [
+            ForeignKey(
+                _intern(field), _intern(ref_table), _intern(ref_field), _intern(constraint), reasoning
+            )
+            for field, ref_table, ref_field, constraint, reasoning in foreign_keys
+        ]
+        table.comments = list(comments)
+        return table
+
     def add_field(
         self, name: str, type: str, constraint: str = "", nullable: bool = True
     ) -> None:
@@ -69,7 +285,22 @@ class Table:
             type (str): Data type
             constraint (str, optional): Field constraints. Defaults to "".
         """
-        self.fields.append((name, type, constraint, nullable))
+        name = _intern(name)
+        self._version = next(_table_versions)
+        self._field_index.setdefault(name, len(self.fields))
+        self.fields.append(Field(name, _intern(type), _intern(constraint), nullable))
+
+    def get_field(self, name: str) -> Optional[Field]:
+        """Get a field by name in constant time."""
+        index = self._field_index.get(name)
+        return None if index is None else self.fields[index]
+
+    def _set_constraint(self, name: str, constraint: str) -> None:
+        index = self._field_index.get(name)
+        if index is not None:
+            self.fields[index] = self.fields[index]._replace(
+                constraint=_intern(constraint)
+            )
 
     def add_primary_key(self, field: str, constraint: str = "PK") -> None:
         """
@@ -79,19 +310,21 @@ class Table:
             field (str): Field name
             constraint (str, optional): Constraint type. Defaults to "PK".
         """
-        self.primary_keys.append(field)
+        self.primary_keys.append(_intern(field))
+        self._version = next(_table_versions)
         # Update field constraint to include PK
-        for i, (fname, ftype, fconstraint, fnullable) in enumerate(self.fields):
-            if fname == field:
-                if fconstraint:
-                    # Preserve existing constraints and add PK
-                    if "PK" not in fconstraint:
-                        new_constraint = fconstraint + "," + constraint
-                    else:
-                        new_constraint = fconstraint
+        current = self.get_field(field)
+        if current is not None:
+            fconstraint = current.constraint
+            if fconstraint:
+                # Preserve existing constraints and add PK
+                if "PK" not in fconstraint:
+                    new_constraint = fconstraint + "," + constraint
                 else:
-                    new_constraint = constraint
-                self.fields[i] = (fname, ftype, new_constraint, fnullable)
+                    new_constraint = fconstraint
+            else:
+                new_constraint = constraint
+            self._set_constraint(field, new_constraint)
 
     def add_foreign_key(
         self,
@@ -111,21 +344,60 @@ class Table:
             constraint (str, optional): Constraint type. Defaults to "FK".
         """
         # Add foreign key relationship
-        self.foreign_keys.append((field, ref_table, ref_field, constraint, reasoning))
+        self._version = next(_table_versions)
+        self.foreign_keys.append(
+            ForeignKey(
+                _intern(field),
+                _intern(ref_table),
+                _intern(ref_field),
+                _intern(constraint),
+                reasoning,
+            )
+        )
         # Update field constraint to include FK
-        for i, (fname, ftype, fconstraint, fnullable) in enumerate(self.fields):
-            if fname == field:
-                if fconstraint:
-                    # Preserve existing constraints and add FK
-                    if "FK" not in fconstraint:
-                        # new_constraint = fconstraint + "," + constraint
-                        new_constraint = fconstraint + "," + "FK"
-                    else:
-                        new_constraint = fconstraint
+        current = self.get_field(field)
+        if current is not None:
+            fconstraint = current.constraint
+            if fconstraint:
+                # Preserve existing constraints and add FK
+                if "FK" not in fconstraint:
+                    # new_constraint = fconstraint + "," + constraint
+                    new_constraint = fconstraint + "," + "FK"
                 else:
-                    # new_constraint = constraint
-                    new_constraint = "FK"
-                self.fields[i] = (fname, ftype, new_constraint, fnullable)
+                    new_constraint = fconstraint
+            else:
+                # new_constraint = constraint
+                new_constraint = "FK"
+            self._set_constraint(field, new_constraint)
+
+    def remove_foreign_key(
+        self, field: str, ref_table: str, ref_field: str, reasoning: bool = False
+    ) -> None:
+        """
+        Remove a foreign key relationship added by add_foreign_key().
+
+        Args:
+            field (str): Local field name
+            ref_table (str): Referenced table name
+            ref_field (str): Referenced field name
+            reasoning (bool, optional): Whether it is a reasoned foreign key. Defaults to False.
+        """
+        for i, fk in enumerate(self.foreign_keys):
+            if (fk[0], fk[1], fk[2], fk[4]) == (field, ref_table, ref_field, reasoning):
+                del self.foreign_keys[i]
+                break
+        else:
+            return
+        self._version = next(_table_versions)
+        if any(fk[0] == field for fk in self.foreign_keys):
+            return
+        # Drop FK from the field constraint once no foreign key uses the field
+        current = self.get_field(field)
+        if current is not None:
+            self._set_constraint(
+                field,
+                ",".join(c for c in current.constraint.split(",") if c and c != "FK"),
+            )
 
     def add_comment(self, comment: str) -> None:
         """
@@ -135,6 +407,7 @@ class Table:
             comment (str): Comment text
         """
         self.comments.append(comment)
+        self._version = next(_table_versions)
 
     def __repr__(self) -> str:
         s: str = (
@@ -155,9 +428,96 @@ class TypeRankdir(Enum):
     TB = "TB"  # Top to Bottom
 
 
+class TypeDetail(Enum):
+    SCHEMA = "schema"  # One node per schema, relationships counted between schemas
+    KEYS = "keys"  # Tables with their key columns only
+    FULL = "full"  # Tables with all columns (or field_omission's selection)
+
+
+class RenderSettings(NamedTuple):
+    """
+    Fonts, resolution and direction of a drawing. Immutable, so a render
+    passed its own settings is unaffected by other renders of the same
+    diagram.
+    """
+
+    font_name: str = "Arial"
+    font_size: int = 13
+    dpi: int = 1300
+    cell_padding: int = 4
+    comment_font_size: int = 10  # Font size for comments
+    comment_color: str = "#666666"  # Color for comments
+    rankdir: TypeRankdir = TypeRankdir.TB
+
+
+class TypeIntrospection(Enum):
+    PER_TABLE = "per_table"  # One driver round trip per table and key kind
+    BULK = "bulk"  # A handful of set-based catalog queries per database
+    PARALLEL = "parallel"  # Per-table round trips spread over worker threads
+
+
+# SQL Server type name -> name of the Python type pyodbc reports for it,
+# so bulk introspection produces the same field types as cursor.description.
+SQL_PYTHON_TYPES: Dict[str, str] = {
+    "bigint": "int",
+    "int": "int",
+    "smallint": "int",
+    "tinyint": "int",
+    "bit": "bool",
+    "decimal": "decimal",
+    "numeric": "decimal",
+    "money": "decimal",
+    "smallmoney": "decimal",
+    "float": "float",
+    "real": "float",
+    "date": "date",
+    "time": "time",
+    "datetime": "datetime",
+    "datetime2": "datetime",
+    "smalldatetime": "datetime",
+    "binary": "bytearray",
+    "varbinary": "bytearray",
+    "image": "bytearray",
+    "timestamp": "bytearray",
+    "rowversion": "bytearray",
+}
+
+
+def python_type_name(sql_type: str, is_assembly_type: bool = False) -> str:
+    """
+    Map a SQL Server catalog type name to the Python type name pyodbc uses.
+
+    Args:
+        sql_type (str): Type name from sys.types.
+        is_assembly_type (bool, optional): Whether it is a CLR type. Defaults to False.
+
+    Returns:
+        str: Python type name, "str" for character and unknown types.
+    """
+    if is_assembly_type:
+        return "bytearray"
+    return SQL_PYTHON_TYPES.get(sql_type.lower(), "str")
+
+
+def _render_setting(name: str) -> property:
+    # Attribute of ERDiagram.settings, replacing the whole settings on assignment
+    return property(
+        lambda self: getattr(self.settings, name),
+        lambda self, value: setattr(self, "settings", self.settings._replace(**{name: value})),
+    )
+
+
 class ERDiagram:
     """Generates and manages ER diagrams."""
 
+    font_name = _render_setting("font_name")
+    font_size = _render_setting("font_size")
+    dpi = _render_setting("dpi")
+    cell_padding = _render_setting("cell_padding")
+    comment_font_size = _render_setting("comment_font_size")
+    comment_color = _render_setting("comment_color")
+    rankdir = _render_setting("rankdir")
+
     def __init__(self, name: str = "ER_Diagram"):
         """
         Initialize an ERDiagram instance.
@@ -167,14 +527,23 @@ class ERDiagram:
         """
         self.name = name
         self.tables: Dict[str, Table] = {}
-        self.relations: List[Dict] = []  # Stores relationship information
-        # High-quality rendering settings
-        self.font_name = "Arial"
-        self.font_size = 13
-        self.dpi = 300
-        self.cell_padding = 4
-        self.comment_font_size = 10  # Font size for comments
-        self.comment_color = "#666666"  # Color for comments
+        self._relations: List[TableRelation] = []  # Stores relationship information
+        # table -> {related table: number of relations}, following and against the FK direction
+        self._outgoing: Dict[str, Dict[str, int]] = {}
+        self._incoming: Dict[str, Dict[str, int]] = {}
+        self._path_cache: "OrderedDict[tuple, List[Tuple[float, List[JoinHop]]]]" = (
+            OrderedDict()
+        )
+        self._join_graphs: Dict[float, Adjacency] = {}  # reasoned cost -> graph
+        self._path_lock = threading.Lock()
+        # table name -> (table version, {(shown fields, font settings): label})
+        self._labels: Dict[str, Tuple[int, Dict[tuple, str]]] = {}
+        self._labels_lock = threading.Lock()
+        self._relations_version: int = 0  # bumped on every relation change
+        # ((name, relations version, table versions), digest of get_record())
+        self._record_digest: Tuple[tuple, str] = ((), "")
+        # High-quality rendering settings, used by renders not given their own
+        self.settings: RenderSettings = RenderSettings(dpi=300)
 
     def set_quality_settings(
         self,
@@ -187,7 +556,9 @@ class ERDiagram:
         rankdir: TypeRankdir = TypeRankdir.TB,
     ) -> None:
         """
-        Set high-quality rendering parameters.
+        Set the high-quality rendering parameters of renders not given their
+        own settings. A diagram shared between threads must not be changed
+        this way; pass RenderSettings to each render instead.
 
         Args:
             font_name (str, optional): Font name. Defaults to "Arial".
@@ -197,13 +568,150 @@ class ERDiagram:
             comment_font_size (int, optional): Comment font size. Defaults to 10.
             comment_color (str, optional): Comment text color. Defaults to "#666666".
         """
-        self.font_name = font_name
-        self.font_size = font_size
-        self.dpi = dpi
-        self.cell_padding = cell_padding
-        self.comment_font_size = comment_font_size
-        self.comment_color = comment_color
-        self.rankdir = rankdir
+        self.settings = RenderSettings(
+            font_name,
+            font_size,
+            dpi,
+            cell_padding,
+            comment_font_size,
+            comment_color,
+            rankdir,
+        )
+
+    def _settings(self, settings: Optional[RenderSettings]) -> RenderSettings:
+        return self.settings if settings is None else settings
+
+    @property
+    def relations(self) -> List[Dict]:
+        """Relationships as dicts (from_table, from_field, to_table, to_field, label, reasoning)."""
+        return [rel.get_dict() for rel in self._relations]
+
+    @relations.setter
+    def relations(self, relations: List[Dict]) -> None:
+        self._set_relations([TableRelation.from_dict(rel) for rel in relations])
+
+    def _set_relations(self, relations: List[TableRelation]) -> None:
+        self._relations = relations
+        self._relations_version += 1
+        self._outgoing = {}
+        self._incoming = {}
+        self._path_cache.clear()
+        self._join_graphs.clear()
+        for rel in self._relations:
+            self._link(rel, 1)
+
+    def _link(self, rel: TableRelation, count: int) -> None:
+        # Add (count=1) or remove (count=-1) a relation from the adjacency maps
+        self._relations_version += 1
+        self._path_cache.clear()
+        self._join_graphs.clear()
+        for adjacency, source, target in (
+            (self._outgoing, rel.from_table, rel.to_table),
+            (self._incoming, rel.to_table, rel.from_table),
+        ):
+            neighbours = adjacency.setdefault(source, {})
+            neighbours[target] = neighbours.get(target, 0) + count
+            if neighbours[target] <= 0:
+                del neighbours[target]
+                if not neighbours:
+                    del adjacency[source]
+
+    def get_related_tables(self, tables: Iterable[str], depth: int = 1) -> Set[str]:
+        """
+        Get tables and every table within some relationship hops of them,
+        whichever direction the relationships point.
+
+        Args:
+            tables (Iterable[str]): Starting table names
+            depth (int, optional): Maximum number of hops. Defaults to 1.
+
+        Returns:
+            Set[str]: Starting tables and their neighborhood
+        """
+        seen: Set[str] = set(tables)
+        frontier = deque((table, 0) for table in seen)
+        while frontier:
+            table, hops = frontier.popleft()
+            if hops >= depth:
+                continue
+            for adjacency in (self._outgoing, self._incoming):
+                for neighbour in adjacency.get(table, ()):
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        frontier.append((neighbour, hops + 1))
+        return seen
+
+    def join_paths(
+        self, from_table: str, to_table: str, k: int = 1, reasoned_cost: float = 1.0
+    ) -> List[Tuple[float, List[JoinHop]]]:
+        """
+        Get the k cheapest ways to join two tables over declared and reasoned
+        relationships, followed in either direction. Each relationship costs 1,
+        or reasoned_cost if it is reasoned. Results are cached until the
+        relationships change.
+
+        Args:
+            from_table (str): Start table name
+            to_table (str): End table name
+            k (int, optional): Maximum number of paths. Defaults to 1.
+            reasoned_cost (float, optional): Cost of a reasoned relationship. Defaults to 1.0.
+
+        Returns:
+            List[Tuple[float, List[JoinHop]]]: (cost, hops) pairs, cheapest first.
+                Empty if the tables are not connected.
+        """
+        key = (from_table, to_table, k, reasoned_cost)
+        with self._path_lock:
+            paths = self._path_cache.get(key)
+            if paths is not None:
+                self._path_cache.move_to_end(key)
+                return paths
+        if from_table == to_table:
+            paths = [(0.0, [])] if from_table in self.tables and k > 0 else []
+        else:
+            adjacency = self._join_graph(reasoned_cost)
+            paths = []
+            for cost, steps in k_shortest_paths(adjacency, from_table, to_table, k):
+                hops: List[JoinHop] = []
+                for edge, source, _ in steps:
+                    rel = self._relations[edge]
+                    if source == rel.from_table:
+                        hop = (rel.from_table, rel.from_field, rel.to_table, rel.to_field)
+                    else:
+                        hop = (rel.to_table, rel.to_field, rel.from_table, rel.from_field)
+                    hops.append(JoinHop(*hop, rel.label, rel.reasoning))
+                paths.append((cost, hops))
+        with self._path_lock:
+            self._path_cache[key] = paths
+            if len(self._path_cache) > PATH_CACHE_SIZE:
+                self._path_cache.popitem(last=False)
+        return paths
+
+    def _join_graph(self, reasoned_cost: float) -> Adjacency:
+        # Undirected relation graph; edge ids are positions in self._relations
+        adjacency = self._join_graphs.get(reasoned_cost)
+        if adjacency is None:
+            adjacency = {}
+            for edge, rel in enumerate(self._relations):
+                if rel.from_table == rel.to_table:
+                    continue
+                cost = reasoned_cost if rel.reasoning else 1.0
+                adjacency.setdefault(rel.from_table, []).append((rel.to_table, edge, cost))
+                adjacency.setdefault(rel.to_table, []).append((rel.from_table, edge, cost))
+            self._join_graphs[reasoned_cost] = adjacency
+        return adjacency
+
+    def join_path(
+        self, from_table: str, to_table: str, reasoned_cost: float = 1.0
+    ) -> Optional[List[JoinHop]]:
+        """
+        Get the cheapest way to join two tables, see join_paths().
+
+        Returns:
+            Optional[List[JoinHop]]: Hops in join order, or None if the tables are not connected.
+        """
+        paths = self.join_paths(from_table, to_table, 1, reasoned_cost)
+        return paths[0][1] if paths else None
 
     def add_table(self, table: Table) -> None:
         """Add a table to the ER diagram."""
@@ -231,6 +739,7 @@ class ERDiagram:
         to_field: str,
         relation_label: str = "1..N",
         reasoning: bool = False,
+        confidence: Optional[float] = None,
     ) -> None:
         """
         Add a table relationship (only for tables).
@@ -241,21 +750,70 @@ class ERDiagram:
             to_table (str): Target table name
             to_field (str): Target field name
             relation_label (str, optional): Relationship label. Defaults to "1..N".
+            confidence (Optional[float], optional): Confidence of a relationship discovered from the data. Defaults to None.
         """
         if from_table in self.tables:
             self.tables[from_table].add_foreign_key(
                 from_field, to_table, to_field, "FK", reasoning
             )
-            self.relations.append(
-                {
-                    "from_table": from_table,
-                    "from_field": from_field,
-                    "to_table": to_table,
-                    "to_field": to_field,
-                    "label": relation_label,
-                    "reasoning": reasoning,
-                }
+            relation = TableRelation(
+                _intern(from_table),
+                _intern(from_field),
+                _intern(to_table),
+                _intern(to_field),
+                _intern(relation_label),
+                reasoning,
+                confidence,
             )
+            self._relations.append(relation)
+            self._link(relation, 1)
+
+    def remove_table(self, table_name: str, schema: Optional[str] = None) -> Optional[Table]:
+        """
+        Remove a table or view from the ER diagram. Relations are left untouched.
+
+        Args:
+            table_name (str): Table name
+            schema (Optional[str], optional): Only remove it if it belongs to this schema. Defaults to None.
+
+        Returns:
+            Optional[Table]: Removed table or None if not found
+        """
+        table = self.tables.get(table_name)
+        if table is None or (schema is not None and table.schema != schema):
+            return None
+        with self._labels_lock:
+            self._labels.pop(table_name, None)
+        return self.tables.pop(table_name)
+
+    def remove_relations(self, predicate: Callable[[Dict], bool]) -> List[Dict]:
+        """
+        Remove the relationships matching a predicate, together with the
+        foreign keys they added to their source tables.
+
+        Args:
+            predicate (Callable[[Dict], bool]): Called with each relation dict.
+
+        Returns:
+            List[Dict]: Removed relations
+        """
+        kept: List[TableRelation] = []
+        removed: List[Dict] = []
+        for rel in self._relations:
+            rel_dict = rel.get_dict()
+            if predicate(rel_dict):
+                removed.append(rel_dict)
+                self._link(rel, -1)
+            else:
+                kept.append(rel)
+        self._relations = kept
+        for rel in removed:
+            table = self.tables.get(rel["from_table"])
+            if table is not None:
+                table.remove_foreign_key(
+                    rel["from_field"], rel["to_table"], rel["to_field"], rel["reasoning"]
+                )
+        return removed
 
     def get_table(self, table_name: str) -> Optional[Table]:
         """
@@ -281,12 +839,94 @@ class ERDiagram:
         """Get all view names."""
         return [name for name, table in self.tables.items() if table.is_view]
 
+    def get_dict(self) -> dict:
+        """Get the tables and relationships as plain, JSON-serializable data."""
+        return {
+            "name": self.name,
+            "tables": [table.get_dict() for table in self.tables.values()],
+            "relations": self.relations,
+        }
+
+    def get_record(self) -> list:
+        """
+        Compact form of get_dict() for caches shared between processes:
+        [name, table records, relation records], relations as lists of
+        TableRelation fields.
+        """
+        return [
+            self.name,
+            [table.get_record() for table in self.tables.values()],
+            [list(rel) for rel in self._relations],
+        ]
+
+    @classmethod
+    def from_record(cls, record: list) -> "ERDiagram":
+        """Rebuild an ERDiagram from the output of get_record()."""
+        name, tables, relations = record
+        diagram = cls(name)
+        for table in tables:
+            diagram.add_table(Table.from_record(table))
+        diagram._set_relations(
+            [TableRelation(*map(_intern, rel[:5]), *rel[5:]) for rel in relations]
+        )
+        return diagram
+
+    def content_hash(self, settings: Optional[RenderSettings] = None) -> str:
+        """
+        Digest of the tables, relationships and rendering settings (the
+        diagram's own unless given). The digest of the tables and
+        relationships is kept until one of them changes.
+        """
+        version = (
+            self.name,
+            self._relations_version,
+            tuple(table.version for table in self.tables.values()),
+        )
+        known_version, digest = self._record_digest
+        if known_version != version:
+            digest = content_key(self.get_record())
+            self._record_digest = (version, digest)
+        settings = self._settings(settings)
+        return content_key(
+            digest,
+            settings.font_name,
+            settings.font_size,
+            settings.dpi,
+            settings.cell_padding,
+            settings.comment_font_size,
+            settings.comment_color,
+            settings.rankdir.value,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ERDiagram":
+        """
+        Rebuild an ERDiagram from the output of get_dict().
+
+        Args:
+            data (dict): Dictionary produced by ERDiagram.get_dict().
+
+        Returns:
+            ERDiagram: Restored diagram
+        """
+        diagram = cls(data["name"])
+        for table in data["tables"]:
+            diagram.add_table(Table.from_dict(table))
+        diagram.relations = data["relations"]
+        return diagram
+
     def render_to_bytes(
         self,
         format: str = "svg",
         render_tables: Optional[list[str]] = None,
         render_related: bool = False,
         field_omission: bool = False,
+        related_depth: int = 1,
+        split_components: bool = False,
+        workers: Optional[int] = None,
+        limits: Optional[RenderLimits] = None,
+        detail: TypeDetail = TypeDetail.FULL,
+        settings: Optional[RenderSettings] = None,
     ) -> bytes:
         """
         Render ER diagram to bytes.
@@ -295,102 +935,673 @@ class ERDiagram:
             format (str, optional): Output format. Defaults to "svg".
             render_tables (Optional[list[str]], optional): List of table names to render. If None, renders all tables. Defaults to None.
             render_related (bool, optional): If True, renders related tables. Defaults to False.
+            related_depth (int, optional): Relationship hops followed by render_related. Defaults to 1.
+            split_components (bool, optional): Lay out each group of connected tables in its own
+                parallel graphviz process and pack the drawings into one SVG. Defaults to False.
+            workers (Optional[int], optional): Concurrent graphviz processes for split_components. Defaults to the CPU count.
+            limits (Optional[RenderLimits], optional): Timeouts and size limits of each layout
+                (of each cluster with split_components). Defaults to None (unbounded).
+            detail (TypeDetail, optional): Level of detail; SCHEMA drawings are never split.
+                Defaults to TypeDetail.FULL.
+            settings (Optional[RenderSettings], optional): Fonts, resolution and direction. Defaults to the diagram's settings.
+
+        Raises:
+            RenderTimeout: If a layout did not finish within the limits.
+
+        Returns:
+            bytes: Rendered diagram bytes
+        """
+        settings = self._settings(settings)
+        if detail is TypeDetail.SCHEMA:
+            tables, relations, _ = self._select(
+                render_tables, render_related, field_omission, related_depth
+            )
+            return self._run(
+                self._build_schema_digraph(tables, relations, settings), format, limits
+            )
+        if split_components:
+            if format != "svg":
+                raise ValueError("split_components only supports the svg format")
+            return _pack(
+                self.render_components(
+                    format,
+                    render_tables=render_tables,
+                    render_related=render_related,
+                    field_omission=field_omission,
+                    related_depth=related_depth,
+                    workers=workers,
+                    limits=limits,
+                    detail=detail,
+                    settings=settings,
+                )
+            )
+        tables, relations, render_fields = self._select(
+            render_tables, render_related, field_omission, related_depth, detail
+        )
+        if limits is not None:
+            return self._layout(tables, relations, render_fields, format, limits, settings)
+        return self._build_digraph(tables, relations, render_fields, settings).pipe(
+            format=format
+        )
+
+    async def arender_to_bytes(
+        self,
+        format: str = "svg",
+        render_tables: Optional[list[str]] = None,
+        render_related: bool = False,
+        field_omission: bool = False,
+        related_depth: int = 1,
+        split_components: bool = False,
+        timeout: Optional[float] = None,
+        limits: Optional[RenderLimits] = None,
+        detail: TypeDetail = TypeDetail.FULL,
+        settings: Optional[RenderSettings] = None,
+    ) -> bytes:
+        """
+        Async render_to_bytes(): graphviz runs as asyncio subprocesses (one per
+        cluster with split_components) and is killed if the task is cancelled,
+        e.g. because the client disconnected.
+
+        Args:
+            format, render_tables, render_related, field_omission, related_depth, split_components, limits, detail, settings:
+                As for render_to_bytes().
+            timeout (Optional[float], optional): Seconds each layout may run, when no limits are given. Defaults to None.
 
         Returns:
             bytes: Rendered diagram bytes
         """
+        settings = self._settings(settings)
+        tables, relations, render_fields = self._select(
+            render_tables, render_related, field_omission, related_depth, detail
+        )
+        if detail is TypeDetail.SCHEMA:
+            er = self._build_schema_digraph(tables, relations, settings)
+            if limits is None:
+                return await arun_layout(er.source, format, er.engine, timeout)
+            return await self._arun(er, format, limits)
+        if split_components:
+            if format != "svg":
+                raise ValueError("split_components only supports the svg format")
+            clusters = self._clusters(tables, relations, MIN_CLUSTER_SIZE)
+        else:
+            clusters = [(tables, relations)]
+        if limits is None:
+            graphs = [
+                self._build_digraph(cluster_tables, cluster_relations, render_fields, settings)
+                for cluster_tables, cluster_relations in clusters
+            ]
+            layouts = [arun_layout(er.source, format, er.engine, timeout) for er in graphs]
+        else:
+            layouts = [
+                self._alayout(
+                    cluster_tables, cluster_relations, render_fields, format, limits, settings
+                )
+                for cluster_tables, cluster_relations in clusters
+            ]
+        parts = await asyncio.gather(*layouts)
+        return _pack(list(parts)) if split_components else parts[0]
+
+    def to_dot(
+        self,
+        render_tables: Optional[list[str]] = None,
+        render_related: bool = False,
+        field_omission: bool = False,
+        related_depth: int = 1,
+        detail: TypeDetail = TypeDetail.FULL,
+        settings: Optional[RenderSettings] = None,
+    ) -> str:
+        """
+        Get the graphviz DOT source render_to_bytes() would lay out.
+
+        Args:
+            render_tables, render_related, field_omission, related_depth, detail, settings: As for render_to_bytes().
+
+        Returns:
+            str: DOT source
+        """
+        settings = self._settings(settings)
+        tables, relations, render_fields = self._select(
+            render_tables, render_related, field_omission, related_depth, detail
+        )
+        if detail is TypeDetail.SCHEMA:
+            return self._build_schema_digraph(tables, relations, settings).source
+        return self._build_digraph(tables, relations, render_fields, settings).source
+
+    def to_graph(
+        self,
+        render_tables: Optional[list[str]] = None,
+        render_related: bool = False,
+        field_omission: bool = False,
+        related_depth: int = 1,
+        detail: TypeDetail = TypeDetail.FULL,
+        settings: Optional[RenderSettings] = None,
+    ) -> dict:
+        """
+        Get the selected tables and relationships as a node/edge/field model
+        for laying out on the client. Node IDs are table names and edge IDs
+        "child.field>parent.field", so both stay stable across requests.
+        With TypeDetail.SCHEMA nodes are schemas and edges "child>parent".
+
+        Args:
+            render_tables, render_related, field_omission, related_depth, detail, settings: As for render_to_bytes().
+
+        Returns:
+            dict: {"name", "rankdir", "detail", "nodes": [...], "edges": [...]}
+        """
+        tables, relations, render_fields = self._select(
+            render_tables, render_related, field_omission, related_depth, detail
+        )
+        if detail is TypeDetail.SCHEMA:
+            nodes, edges = self._schema_graph(tables, relations)
+        else:
+            nodes = [self._graph_node(table, render_fields) for table in tables]
+            edges = [self._graph_edge(rel) for rel in relations]
+        return {
+            "name": self.name,
+            "rankdir": self._settings(settings).rankdir.value,
+            "detail": detail.value,
+            "nodes": nodes,
+            "edges": edges,
+        }
+
+    def layout_graph(
+        self,
+        render_tables: Optional[list[str]] = None,
+        render_related: bool = False,
+        field_omission: bool = False,
+        related_depth: int = 1,
+        limits: Optional[RenderLimits] = None,
+        detail: TypeDetail = TypeDetail.FULL,
+        settings: Optional[RenderSettings] = None,
+    ) -> dict:
+        """
+        Get graphviz positions for the model of to_graph(), so clients may
+        skip their own layout.
+
+        Args:
+            render_tables, render_related, field_omission, related_depth, limits, detail, settings:
+                As for render_to_bytes().
+
+        Returns:
+            dict: {"bb": [x0, y0, x1, y1], "nodes": {id: [x, y, width, height]}, "edges": {id: spline}}
+                in points; comment nodes are "<table>_comment". "transient": True is added when
+                dot timed out and the fallback engine laid the model out instead.
+        """
+        settings = self._settings(settings)
+        tables, relations, render_fields = self._select(
+            render_tables, render_related, field_omission, related_depth, detail
+        )
+        if detail is TypeDetail.SCHEMA:
+            er = self._build_schema_digraph(tables, relations, settings)
+            data = self._run(er, "json", limits)
+            return self._parse_layout(data, self._schema_edge_ids(tables, relations))
+        if limits is None:
+            er = self._build_digraph(tables, relations, render_fields, settings)
+            data = er.pipe(format="json")
+        else:
+            data = self._layout(tables, relations, render_fields, "json", limits, settings)
+        return self._parse_layout(data, [self._edge_id(rel) for rel in relations])
+
+    async def alayout_graph(
+        self,
+        render_tables: Optional[list[str]] = None,
+        render_related: bool = False,
+        field_omission: bool = False,
+        related_depth: int = 1,
+        limits: Optional[RenderLimits] = None,
+        detail: TypeDetail = TypeDetail.FULL,
+        settings: Optional[RenderSettings] = None,
+    ) -> dict:
+        """Async layout_graph(); graphviz is killed if the task is cancelled."""
+        settings = self._settings(settings)
+        tables, relations, render_fields = self._select(
+            render_tables, render_related, field_omission, related_depth, detail
+        )
+        if detail is TypeDetail.SCHEMA:
+            er = self._build_schema_digraph(tables, relations, settings)
+            if limits is None:
+                data = await arun_layout(er.source, "json", er.engine)
+            else:
+                data = await self._arun(er, "json", limits)
+            return self._parse_layout(data, self._schema_edge_ids(tables, relations))
+        if limits is None:
+            er = self._build_digraph(tables, relations, render_fields, settings)
+            data = await arun_layout(er.source, "json", er.engine)
+        else:
+            data = await self._alayout(
+                tables, relations, render_fields, "json", limits, settings
+            )
+        return self._parse_layout(data, [self._edge_id(rel) for rel in relations])
+
+    def _graph_node(self, table: Table, render_fields: AbstractSet[str]) -> dict:
+        # Same field filter as _generate_table_label(): keys are always shown
+        fields = []
+        omitted = 0
+        for name, type, constraint, nullable in table.fields:
+            pk = bool(constraint) and "PK" in constraint
+            fk = bool(constraint) and "FK" in constraint
+            if render_fields and not (pk or fk) and name not in render_fields:
+                omitted += 1
+                continue
+            fields.append(
+                {"name": name, "type": type, "nullable": nullable, "pk": pk, "fk": fk}
+            )
+        node = {"id": table.name, "schema": table.schema, "view": table.is_view, "fields": fields}
+        if omitted:
+            node["omitted"] = omitted
+        if table.comments:
+            node["comments"] = table.comments
+        return node
+
+    def _graph_edge(self, rel: TableRelation) -> dict:
+        edge = rel.get_dict()
+        edge["id"] = self._edge_id(rel)
+        return edge
+
+    def _edge_id(self, rel: TableRelation) -> str:
+        return f"{rel.from_table}.{rel.from_field}>{rel.to_table}.{rel.to_field}"
+
+    def _parse_layout(self, data: bytes, edge_ids: List[str]) -> dict:
+        # Graphviz -Tjson, reduced to what a client needs to place the model
+        layout = json.loads(data)
+        transient = {"transient": True} if isinstance(data, TransientRender) else {}
+        nodes = {}
+        for obj in layout.get("objects", []):
+            if "pos" not in obj:
+                continue
+            x, y = obj["pos"].split(",")
+            nodes[obj["name"]] = [
+                float(x),
+                float(y),
+                float(obj["width"]) * 72,
+                float(obj["height"]) * 72,
+            ]
+        # Edges keep creation order; relationships come after the comment edges
+        edges = sorted(layout.get("edges", []), key=lambda edge: edge["_gvid"])
+        edges = edges[len(edges) - len(edge_ids):] if edge_ids else []
+        return {
+            "bb": [float(value) for value in layout["bb"].split(",")],
+            "nodes": nodes,
+            "edges": {
+                edge_id: edge.get("pos") for edge_id, edge in zip(edge_ids, edges)
+            },
+            **transient,
+        }
+
+    def render_components(
+        self,
+        format: str = "svg",
+        render_tables: Optional[list[str]] = None,
+        render_related: bool = False,
+        field_omission: bool = False,
+        related_depth: int = 1,
+        workers: Optional[int] = None,
+        min_cluster_size: int = MIN_CLUSTER_SIZE,
+        limits: Optional[RenderLimits] = None,
+        detail: TypeDetail = TypeDetail.FULL,
+        settings: Optional[RenderSettings] = None,
+    ) -> List[bytes]:
+        """
+        Render each group of connected tables separately, running the graphviz
+        layouts in parallel processes. Layout time grows faster than the
+        number of nodes, so several small layouts beat one big one.
+
+        Components smaller than min_cluster_size are batched into one drawing
+        so unrelated tables do not each cost a graphviz process.
+
+        Args:
+            format (str, optional): Output format. Defaults to "svg".
+            render_tables, render_related, field_omission, related_depth: As for render_to_bytes().
+            workers (Optional[int], optional): Concurrent graphviz processes. Defaults to the CPU count.
+            min_cluster_size (int, optional): Fewest tables of a drawing. Defaults to MIN_CLUSTER_SIZE.
+            limits (Optional[RenderLimits], optional): Timeouts and size limits of each cluster's layout. Defaults to None.
+            detail (TypeDetail, optional): TypeDetail.KEYS or TypeDetail.FULL. Defaults to TypeDetail.FULL.
+            settings (Optional[RenderSettings], optional): Fonts, resolution and direction. Defaults to the diagram's settings.
+
+        Returns:
+            List[bytes]: One rendered drawing per cluster, largest first.
+        """
+        if detail is TypeDetail.SCHEMA:
+            raise ValueError("schema drawings cannot be split into components")
+        settings = self._settings(settings)
+        tables, relations, render_fields = self._select(
+            render_tables, render_related, field_omission, related_depth, detail
+        )
+        clusters = self._clusters(tables, relations, min_cluster_size)
+        if not clusters:
+            return []
+        if limits is None:
+            graphs = [
+                self._build_digraph(cluster_tables, cluster_relations, render_fields, settings)
+                for cluster_tables, cluster_relations in clusters
+            ]
+            layout = lambda er: er.pipe(format=format)
+        else:
+            graphs = clusters
+            layout = lambda cluster: self._layout(
+                *cluster, render_fields, format, limits, settings
+            )
+        workers = max(1, min(workers or os.cpu_count() or 1, len(graphs)))
+        # Each layout waits on its own graphviz process, so threads are enough
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(layout, graphs))
+
+    def get_components(self, tables: Optional[Iterable[str]] = None) -> List[List[str]]:
+        """
+        Split tables into groups connected by relationships.
+
+        Args:
+            tables (Optional[Iterable[str]], optional): Only consider these tables. Defaults to None (all).
+
+        Returns:
+            List[List[str]]: Groups of table names, in table order.
+        """
+        names = list(self.tables) if tables is None else list(tables)
+        return connected_components(
+            names, ((rel.from_table, rel.to_table) for rel in self._relations)
+        )
+
+    def _select(
+        self,
+        render_tables: Optional[list[str]],
+        render_related: bool,
+        field_omission: bool,
+        related_depth: int,
+        detail: TypeDetail = TypeDetail.FULL,
+    ) -> Tuple[List[Table], List[TableRelation], AbstractSet[str]]:
+        # Tables, relationships and omitted-field filter of one render request
+        selected: Optional[Set[str]] = None
+        render_fields: Set[str] = set()
+        if render_tables is not None:
+            selected = set(render_tables)
+            if render_related:
+                selected = self.get_related_tables(selected, related_depth)
+                if field_omission:
+                    for rel in self._relations:
+                        render_fields.add(rel.from_field)
+                        render_fields.add(rel.to_field)
+        if detail is TypeDetail.KEYS:
+            render_fields = _KEYS_ONLY
+        if selected is None:
+            return list(self.tables.values()), list(self._relations), render_fields
+        return (
+            [table for table in self.tables.values() if table.name in selected],
+            [
+                rel
+                for rel in self._relations
+                if rel.to_table in selected and rel.from_table in selected
+            ],
+            render_fields,
+        )
+
+    def _clusters(
+        self,
+        tables: List[Table],
+        relations: List[TableRelation],
+        min_cluster_size: int,
+    ) -> List[Tuple[List[Table], List[TableRelation]]]:
+        components = connected_components(
+            [table.name for table in tables],
+            ((rel.from_table, rel.to_table) for rel in relations),
+        )
+        components.sort(key=len, reverse=True)
+        cluster_of: Dict[str, int] = {}
+        groups: List[List[str]] = []
+        for component in components:
+            if len(component) >= min_cluster_size or not groups or (
+                len(groups[-1]) >= min_cluster_size
+            ):
+                groups.append([])
+            groups[-1].extend(component)
+            for name in component:
+                cluster_of[name] = len(groups) - 1
+        clusters: List[Tuple[List[Table], List[TableRelation]]] = [
+            ([self.tables[name] for name in group], []) for group in groups
+        ]
+        for rel in relations:
+            # Relationships to tables missing from the diagram follow their known end
+            index = cluster_of.get(rel.from_table, cluster_of.get(rel.to_table, 0))
+            if clusters:
+                clusters[index][1].append(rel)
+        return clusters
+
+    def _layout(
+        self,
+        tables: List[Table],
+        relations: List[TableRelation],
+        render_fields: AbstractSet[str],
+        format: str,
+        limits: RenderLimits,
+        settings: RenderSettings,
+    ) -> bytes:
+        # Lay out with dot unless too large or too slow, then with the fallback engine.
+        # Only the size-driven fallback is deterministic; one forced by a timeout is transient.
+        timed_out = False
+        if len(tables) <= limits.max_nodes and len(relations) <= limits.max_edges:
+            er = self._build_digraph(tables, relations, render_fields, settings)
+            try:
+                return run_layout(er.source, format, er.engine, limits.timeout)
+            except subprocess.TimeoutExpired:
+                timed_out = True
+        er = self._build_fallback_digraph(
+            tables, relations, render_fields, limits, settings
+        )
+        try:
+            data = run_layout(er.source, format, er.engine, limits.fallback_timeout)
+        except subprocess.TimeoutExpired:
+            raise RenderTimeout(self._timeout_message(tables, relations)) from None
+        return TransientRender(data) if timed_out else data
+
+    async def _alayout(
+        self,
+        tables: List[Table],
+        relations: List[TableRelation],
+        render_fields: AbstractSet[str],
+        format: str,
+        limits: RenderLimits,
+        settings: RenderSettings,
+    ) -> bytes:
+        # Async _layout(); cancelling the task kills whichever engine is running
+        timed_out = False
+        if len(tables) <= limits.max_nodes and len(relations) <= limits.max_edges:
+            er = self._build_digraph(tables, relations, render_fields, settings)
+            try:
+                return await arun_layout(er.source, format, er.engine, limits.timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+        er = self._build_fallback_digraph(
+            tables, relations, render_fields, limits, settings
+        )
+        try:
+            data = await arun_layout(
+                er.source, format, er.engine, limits.fallback_timeout
+            )
+        except asyncio.TimeoutError:
+            raise RenderTimeout(self._timeout_message(tables, relations)) from None
+        return TransientRender(data) if timed_out else data
+
+    def _build_fallback_digraph(
+        self,
+        tables: List[Table],
+        relations: List[TableRelation],
+        render_fields: AbstractSet[str],
+        limits: RenderLimits,
+        settings: RenderSettings,
+    ) -> Digraph:
+        er = self._build_digraph(
+            tables,
+            relations,
+            _KEYS_ONLY if limits.summarize else render_fields,
+            settings,
+        )
+        er.engine = limits.fallback_engine
+        # sfdp and neato overlap the table boxes unless told not to
+        er.attr(overlap="false")
+        return er
+
+    def _timeout_message(
+        self, tables: List[Table], relations: List[TableRelation]
+    ) -> str:
+        return (
+            f"layout of {len(tables)} tables and {len(relations)} relationships "
+            "did not finish within the render limits"
+        )
+
+    def _run(self, er: Digraph, format: str, limits: Optional[RenderLimits]) -> bytes:
+        # Lay out a drawing that has no cheaper fallback, within limits.timeout
+        if limits is None:
+            return er.pipe(format=format)
+        try:
+            return run_layout(er.source, format, er.engine, limits.timeout)
+        except subprocess.TimeoutExpired:
+            raise RenderTimeout(f"layout of {self.name} did not finish within the render limits") from None
+
+    async def _arun(self, er: Digraph, format: str, limits: RenderLimits) -> bytes:
+        try:
+            return await arun_layout(er.source, format, er.engine, limits.timeout)
+        except asyncio.TimeoutError:
+            raise RenderTimeout(f"layout of {self.name} did not finish within the render limits") from None
+
+    def _schema_graph(
+        self, tables: List[Table], relations: List[TableRelation]
+    ) -> Tuple[List[dict], List[dict]]:
+        # Schemas with their table counts, and relationships counted per pair of schemas
+        nodes: Dict[str, dict] = {}
+        schema_of: Dict[str, str] = {}
+        for table in tables:
+            schema = table.schema or DEFAULT_SCHEMA_NODE
+            schema_of[table.name] = schema
+            node = nodes.get(schema)
+            if node is None:
+                node = nodes[schema] = {"id": schema, "tables": 0, "views": 0, "internal": 0}
+            node["views" if table.is_view else "tables"] += 1
+        edges: Dict[Tuple[str, str], dict] = {}
+        for rel in relations:
+            child = schema_of.get(rel.from_table)
+            parent = schema_of.get(rel.to_table)
+            if child is None or parent is None:
+                continue
+            if child == parent:
+                nodes[child]["internal"] += 1
+                continue
+            edge = edges.get((child, parent))
+            if edge is None:
+                edge = edges[(child, parent)] = {
+                    "id": f"{child}>{parent}",
+                    "from": child,
+                    "to": parent,
+                    "count": 0,
+                    "reasoned": 0,
+                }
+            edge["count"] += 1
+            edge["reasoned"] += rel.reasoning
+        return list(nodes.values()), list(edges.values())
+
+    def _schema_edge_ids(
+        self, tables: List[Table], relations: List[TableRelation]
+    ) -> List[str]:
+        return [edge["id"] for edge in self._schema_graph(tables, relations)[1]]
+
+    def _build_schema_digraph(
+        self,
+        tables: List[Table],
+        relations: List[TableRelation],
+        settings: RenderSettings,
+    ) -> Digraph:
+        nodes, edges = self._schema_graph(tables, relations)
+        er = Digraph(
+            self.name,
+            graph_attr={
+                "dpi": str(settings.dpi),
+                "fontname": settings.font_name,
+                "fontsize": str(settings.font_size),
+            },
+            node_attr={"fontname": settings.font_name, "shape": "plaintext"},
+            edge_attr={"fontname": settings.font_name},
+        )
+        er.attr(rankdir=settings.rankdir.value)
+        for node in nodes:
+            counts = f"{node['tables']} tables"
+            if node["views"]:
+                counts += f", {node['views']} views"
+            rows = [
+                f"<TR><TD BGCOLOR=\"#f0f0f0\"><B><FONT POINT-SIZE='{settings.font_size + 2}'>{node['id']}</FONT></B></TD></TR>",
+                f"<TR><TD>{counts}</TD></TR>",
+            ]
+            if node["internal"]:
+                rows.append(f"<TR><TD>{node['internal']} relationships</TD></TR>")
+            er.node(
+                node["id"],
+                label=f'''<<TABLE BORDER="0" CELLBORDER="1" CELLSPACING="0" CELLPADDING="{settings.cell_padding}">{"".join(rows)}</TABLE>>''',
+            )
+        for edge in edges:
+            er.edge(
+                edge["to"],
+                edge["from"],
+                label=str(edge["count"]),
+                # Only relationships that are all inferred are drawn as inferred
+                style="dashed" if edge["reasoned"] == edge["count"] else "solid",
+                penwidth=str(round(1 + math.log2(edge["count"]), 2)),
+                arrowhead="dot",
+                fontsize=str(settings.font_size),
+            )
+        return er
+
+    def _build_digraph(
+        self,
+        tables: Iterable[Table],
+        relations: Iterable[TableRelation],
+        render_fields: AbstractSet[str],
+        settings: RenderSettings,
+    ) -> Digraph:
         er = Digraph(
             self.name,
             graph_attr={
-                "dpi": str(self.dpi),
-                "fontname": self.font_name,
-                "fontsize": str(self.font_size),
+                "dpi": str(settings.dpi),
+                "fontname": settings.font_name,
+                "fontsize": str(settings.font_size),
             },
-            node_attr={"fontname": self.font_name},
-            edge_attr={"fontname": self.font_name},
+            node_attr={"fontname": settings.font_name},
+            edge_attr={"fontname": settings.font_name},
         )
-        er.attr(rankdir=self.rankdir.value)
+        er.attr(rankdir=settings.rankdir.value)
         er.attr("node", shape="plaintext")
         er.attr(splines="polyline")
 
-        dst_table = render_tables
-        render_fields: list[str] = []
-        if render_tables is not None and render_related:
-            dst_table = render_tables.copy()
-            for rel in self.relations:
-                from_table = rel["from_table"]
-                from_field = rel["from_field"]
-                to_table = rel["to_table"]
-                to_field = rel["to_field"]
-                if from_table in dst_table:
-                    render_tables.append(to_table)
-                if to_table in dst_table:
-                    render_tables.append(from_table)
-                render_fields.append(from_field)
-                render_fields.append(to_field)
-
-        render_fields = list(set(render_fields))  # Remove duplicates
-        if not field_omission:
-            render_fields = []
-
         # Render all tables
-        for table in self.tables.values():
-            render: bool = False
-            if render_tables == None:
-                render = True
-            elif table.name in render_tables:
-                render = True
-
-            if render:
+        for table in tables:
+            er.node(table.name, label=self._table_label(table, render_fields, settings))
+            # Add external comments for the table
+            if table.comments:
+                comment_node_name = f"{table.name}_comment"
                 er.node(
-                    table.name, label=self._generate_table_label(table, render_fields)
+                    comment_node_name,
+                    label=self._table_label(table, settings=settings, comment=True),
+                    shape="none",
+                    fontsize=str(settings.comment_font_size),
+                    fontcolor=settings.comment_color,
                 )
-                # Add external comments for the table
-                if table.comments:
-                    comment_node_name = f"{table.name}_comment"
-                    er.node(
-                        comment_node_name,
-                        label=self._generate_comment_label(table.comments),
-                        shape="none",
-                        fontsize=str(self.comment_font_size),
-                        fontcolor=self.comment_color,
-                    )
-                    er.edge(
-                        table.name,
-                        comment_node_name,
-                        style="invis",  # Invisible edge to position comment below table
-                        constraint="false",  # Don't affect layout constraints
-                    )
-
-        # Render relationships (only for tables)
-        for rel in self.relations:
-            from_table = rel["to_table"]
-            from_field = rel["to_field"]
-            to_table = rel["from_table"]
-            to_field = rel["from_field"]
-            label = rel["label"]
-            reasoning = rel["reasoning"]
-
-            render: bool = False
-            if render_tables == None:
-                render = True
-            elif from_table in render_tables and to_table in render_tables:
-                render = True
-
-            if render:
-                style = "solid"
-                if reasoning:
-                    style = "dashed"
                 er.edge(
-                    f"{from_table}",
-                    f"{to_table}",
-                    label=label,
-                    style=style,
-                    arrowhead="dot",
-                    fontsize=str(self.font_size),
+                    table.name,
+                    comment_node_name,
+                    style="invis",  # Invisible edge to position comment below table
+                    constraint="false",  # Don't affect layout constraints
                 )
 
-        return er.pipe(format=format)
+        # Render relationships (only for tables)
+        for rel in relations:
+            style = "solid"
+            if rel.reasoning:
+                style = "dashed"
+            er.edge(
+                f"{rel.to_table}",
+                f"{rel.from_table}",
+                label=rel.label,
+                style=style,
+                arrowhead="dot",
+                fontsize=str(settings.font_size),
+            )
+        return er
 
     def render_to_file(
         self,
@@ -399,6 +1610,11 @@ class ERDiagram:
         render_tables: Optional[list[str]] = None,
         render_related: bool = False,
         field_omission: bool = False,
+        related_depth: int = 1,
+        split_components: bool = False,
+        limits: Optional[RenderLimits] = None,
+        detail: TypeDetail = TypeDetail.FULL,
+        settings: Optional[RenderSettings] = None,
     ) -> None:
         """
         Render ER diagram to file.
@@ -412,30 +1628,89 @@ class ERDiagram:
             render_tables=render_tables,
             render_related=render_related,
             field_omission=field_omission,
+            related_depth=related_depth,
+            split_components=split_components,
+            limits=limits,
+            detail=detail,
+            settings=settings,
         )
         with open(f"{filename}.{format}", "wb") as f:
             f.write(er_bytes)
 
-    def _generate_table_label(self, table: Table, render_fields: list[str] = []) -> str:
+    def _table_label(
+        self,
+        table: Table,
+        render_fields: AbstractSet[str] = frozenset(),
+        settings: Optional[RenderSettings] = None,
+        comment: bool = False,
+    ) -> str:
+        """
+        Get the table (or comment) label, generating it only if the table
+        changed or it was never rendered with the same fields shown and the
+        same font settings.
+        """
+        if comment:
+            key: tuple = ("comment",)
+        else:
+            # Only which of the table's own fields are shown changes its label
+            shown = (
+                tuple(name for name, _, _, _ in table.fields if name in render_fields)
+                if render_fields
+                else None
+            )
+            settings = self._settings(settings)
+            key = (shown, settings.font_size, settings.cell_padding)
+        version = table.version
+        with self._labels_lock:
+            entry = self._labels.get(table.name)
+            if entry is not None and entry[0] == version:
+                label = entry[1].get(key)
+                if label is not None:
+                    return label
+        if comment:
+            label = self._generate_comment_label(table.comments)
+        else:
+            label = self._generate_table_label(table, render_fields, settings)
+        if table.version != version:
+            return label  # changed while generating, the label may be stale already
+        with self._labels_lock:
+            entry = self._labels.get(table.name)
+            if entry is None or entry[0] != version:
+                entry = (version, {})
+                self._labels[table.name] = entry
+            labels = entry[1]
+            if key not in labels and len(labels) >= LABEL_VARIANTS:
+                labels.pop(next(iter(labels)))
+            labels[key] = label
+        return label
+
+    def _generate_table_label(
+        self,
+        table: Table,
+        render_fields: AbstractSet[str] = frozenset(),
+        settings: Optional[RenderSettings] = None,
+    ) -> str:
         """
         Generate high-quality table structure label.
 
         Args:
             table (Table): Table object
-            render_fields (list[str], optional): List of fields to render. If empty, renders all fields. Defaults to [].
+            render_fields (AbstractSet[str], optional): Fields to render. If empty, renders all fields. Defaults to frozenset().
+            settings (Optional[RenderSettings], optional): Font size and cell padding. Defaults to the diagram's settings.
 
         Returns:
             str: HTML-like label string
         """
+        settings = self._settings(settings)
         header_bg = ""
         title = ""
         if table.is_view:
             header_bg = "#cceeff"
-            title = f"<B><FONT POINT-SIZE='{self.font_size + 2}'>{table.name}</FONT><BR/><I>(VIEW)</I></B>"
+            title = f"<B><FONT POINT-SIZE='{settings.font_size + 2}'>{table.name}</FONT><BR/><I>(VIEW)</I></B>"
         else:
             header_bg = "#f0f0f0"
             title = (
-                f"<B><FONT POINT-SIZE='{self.font_size + 2}'>{table.name}</FONT></B>"
+                f"<B><FONT POINT-SIZE='{settings.font_size + 2}'>{table.name}</FONT></B>"
             )
 
         rows = [
@@ -488,7 +1763,7 @@ class ERDiagram:
                 row = f"<TR>{name_cell}{type_cell}{nullable_cell}{constraint_cell}</TR>"
             else:
                 render_field: bool = True
-                if len(render_fields) != 0 and name not in render_fields:
+                if render_fields and name not in render_fields:
                     render_field = False
                 if render_field:
                     constraint += " " * int(len(constraint) / DIVISION)
@@ -510,7 +1785,7 @@ class ERDiagram:
                 '<TR><TD ALIGN="LEFT">...</TD><TD ALIGN="LEFT">...</TD><TD ALIGN="LEFT">...</TD><TD ALIGN="LEFT">...</TD></TR>'
             )
 
-        return f'''<<TABLE BORDER="0" CELLBORDER="1" CELLSPACING="0" CELLPADDING="{self.cell_padding}">
+        return f'''<<TABLE BORDER="0" CELLBORDER="1" CELLSPACING="0" CELLPADDING="{settings.cell_padding}">
         {"".join(rows)}
         </TABLE>>'''
 
@@ -556,6 +1831,11 @@ class ERGenerator:
         reasoning_FK: bool = False,
         reasoning_all_FK: bool = False,
         disable_sql_FK: bool = False,
+        introspection: TypeIntrospection = TypeIntrospection.PER_TABLE,
+        workers: int = 8,
+        snapshot_dir: Optional[str] = None,
+        prune_FK_types: bool = True,
+        discover_FK: bool = False,
     ):
         """
         Initialize an ERGenerator instance.
@@ -569,24 +1849,390 @@ class ERGenerator:
             password (Optional[str]): Database password.
             reasoning_FK (bool, optional): Whether to reason foreign keys. Defaults to False.
             disable_sql_FK (bool, optional): Whether to disable SQL foreign keys. Defaults to True.
+            introspection (TypeIntrospection, optional): How the catalog is read. Defaults to TypeIntrospection.PER_TABLE.
+            workers (int, optional): Number of threads for TypeIntrospection.PARALLEL. Defaults to 8.
+            snapshot_dir (Optional[str], optional): Directory of schema snapshots. If given, the
+                introspection result is reused from disk until the catalog changes. Defaults to None.
+            prune_FK_types (bool, optional): Only reason foreign keys between fields of compatible types. Defaults to True.
+            discover_FK (bool, optional): Also discover foreign keys from sampled data with
+                discover_inclusion_FK() default budgets. Defaults to False.
         """
         self.driver: Optional[str] = driver
         self.server: Optional[str] = server
         self.database: Optional[str] = database
         self.username: Optional[str] = username
         self.password: Optional[str] = password
+        self.reasoning_FK: bool = reasoning_FK
+        self.reasoning_all_FK: bool = reasoning_all_FK
+        self.disable_sql_FK: bool = disable_sql_FK
+        self.prune_FK_types: bool = prune_FK_types
+        self.discover_FK: bool = discover_FK
+        self.introspection: TypeIntrospection = introspection
+        self.workers: int = workers
         self.diagram: ERDiagram = ERDiagram(str(database))
+        self.object_stamps: dict[Tuple[str, str], str] = {}
+        self.fk_engine: Optional[FKInferenceEngine] = None
+        self.snapshot: Optional[SchemaSnapshot] = None
+        # Catalog stamp the diagram was introspected at (read only with snapshot_dir)
+        self.stamp: Optional[str] = None
+        if snapshot_dir is not None:
+            self.snapshot = SchemaSnapshot(
+                snapshot_dir,
+                {
+                    "server": server,
+                    "database": database,
+                    "username": username,
+                    "reasoning_FK": reasoning_FK,
+                    "reasoning_all_FK": reasoning_all_FK,
+                    "disable_sql_FK": disable_sql_FK,
+                    "prune_FK_types": prune_FK_types,
+                    "discover_FK": discover_FK,
+                },
+            )
+            self.stamp = self.catalog_stamp()
+            record = self.snapshot.read()
+            if record is not None and record["stamp"] == self.stamp:
+                self._restore_snapshot(record["payload"])
+                return
+            # One process of the host introspects, the others wait and read its snapshot
+            with self.snapshot.lock():
+                record = self.snapshot.read()
+                if record is not None:
+                    self._restore_snapshot(record["payload"])
+                    if record["stamp"] != self.stamp:
+                        # Only re-fetch the tables and views changed since the snapshot
+                        self.refresh()
+                        self.snapshot.save(self.stamp, self._snapshot_payload())
+                    return
+                self.object_stamps = self._read_object_stamps()
+                self._introspect(introspection, workers)
+                self.snapshot.save(self.stamp, self._snapshot_payload())
+            return
+        self._introspect(introspection, workers)
+
+    def _introspect(self, introspection: TypeIntrospection, workers: int) -> None:
         self._analysis_database_mssql(
-            reasoning_FK=reasoning_FK,
-            reasoning_all_FK=reasoning_all_FK,
-            disable_sql_FK=disable_sql_FK,
+            reasoning_FK=self.reasoning_FK,
+            reasoning_all_FK=self.reasoning_all_FK,
+            disable_sql_FK=self.disable_sql_FK,
+            introspection=introspection,
+            workers=workers,
         )
+        if self.discover_FK:
+            self.discover_inclusion_FK()
+
+    @classmethod
+    async def acreate(cls, *args, **kwargs) -> "ERGenerator":
+        """
+        Async constructor: introspects the database (or loads its snapshot) on
+        the bounded ODBC executor instead of blocking the event loop.
+        Takes the same arguments as ERGenerator().
+        """
+        return await run_odbc(cls, *args, **kwargs)
+
+    async def arefresh(self) -> dict:
+        """Async refresh(), run on the bounded ODBC executor."""
+        return await run_odbc(self.refresh)
+
+    def catalog_stamp(self) -> str:
+        """Get the current catalog stamp of the database (one cheap query)."""
+        dbcnxt: dbConnection = self._connection()
+        with dbcnxt:
+            return dbcnxt.catalog_stamp()
+
+    def _read_object_stamps(
+        self, dbcnxt: Optional[dbConnection] = None
+    ) -> dict[Tuple[str, str], str]:
+        if dbcnxt is None:
+            dbcnxt = self._connection()
+            with dbcnxt:
+                return self._read_object_stamps(dbcnxt)
+        _, object_rows = self._read_object_rows(dbcnxt)
+        return {
+            (schema, name): str(modify_date)
+            for schema, name, _, modify_date in object_rows
+        }
+
+    @staticmethod
+    def _read_object_rows(dbcnxt: dbConnection) -> Tuple[list[str], list]:
+        """
+        Get the introspected schemas and the (schema, name, object type, modify date)
+        rows of their tables and views. Objects in other schemas are never
+        introspected, so they must not be stamped either.
+        """
+        schemas = [schema[1] for schema in dbcnxt.schemas()]
+        return schemas, [row for row in dbcnxt.object_stamps() if row[0] in schemas]
+
+    def refresh(self) -> dict:
+        """
+        Bring the diagram up to date by re-fetching only the tables and views
+        added, altered or dropped since the last introspection, as told by the
+        per-object modification stamps.
+
+        Tables and relations are patched in place, and FK reasoning and
+        discovery are re-run only for the field names and relations of the
+        changed tables. New tables are appended
+        after the existing ones. Falls back to a full introspection, in the mode
+        the generator was created with, when the set of schemas changed or no
+        object stamps are known.
+
+        Returns:
+            dict: Lists of "added", "altered" and "dropped" (schema, name) pairs,
+                and "full" telling whether a full introspection was needed.
+        """
+        dbcnxt: dbConnection = self._connection()
+        with dbcnxt:
+            schemas, object_rows = self._read_object_rows(dbcnxt)
+            object_stamps = {
+                (schema, name): str(modify_date)
+                for schema, name, _, modify_date in object_rows
+            }
+            # sys.objects types: "U" = table, "V" = view
+            object_types = {
+                (schema, name): object_type.strip()
+                for schema, name, object_type, _ in object_rows
+            }
+            if schemas != self.schemas or not self.object_stamps:
+                full = True
+            else:
+                full = False
+                previous = self.object_stamps
+                added = [key for key in object_stamps if key not in previous]
+                altered = [
+                    key
+                    for key in object_stamps
+                    if key in previous and previous[key] != object_stamps[key]
+                ]
+                dropped = [key for key in previous if key not in object_stamps]
+                changed = added + altered
+                if changed:
+                    fields_rows = dbcnxt.fields_bulk(changed)
+                    pk_rows = dbcnxt.pk_bulk(changed)
+                else:
+                    fields_rows = pk_rows = []
+                if (changed or dropped) and not self.disable_sql_FK:
+                    fk_rows = dbcnxt.fk_bulk(changed + dropped)
+                else:
+                    fk_rows = []
+
+        if full:
+            self.diagram = ERDiagram(self.diagram.name)
+            self._introspect(self.introspection, self.workers)
+            self.object_stamps = object_stamps
+            return {"added": [], "altered": [], "dropped": [], "full": True}
+
+        self.object_stamps = object_stamps
+        summary = {"added": added, "altered": altered, "dropped": dropped, "full": False}
+        if not (changed or dropped):
+            return summary
+
+        removed_keys = set(altered + dropped)
+        changed_names = {name for _, name in changed + dropped}
+        affected_fields: set[str] = set()
+        fk_engine = self._get_fk_engine() if self.reasoning_FK else None
+
+        # Declared relations touching a changed table are re-read below
+        def is_stale(rel: tuple) -> bool:
+            return not rel[5] and (rel[0] in changed_names or rel[2] in changed_names)
+
+        # So are relations discovered from the data of a changed table
+        removed = self.diagram.remove_relations(
+            lambda rel: (not rel["reasoning"] or "confidence" in rel)
+            and (rel["from_table"] in changed_names or rel["to_table"] in changed_names)
+        )
+        discovered = {
+            (r["from_table"], r["from_field"], r["to_table"], r["to_field"], r["label"], True)
+            for r in removed
+            if "confidence" in r
+        }
+        self.relations = [
+            rel for rel in self.relations if not is_stale(rel) and rel not in discovered
+        ]
+
+        kept_tables: list[Table] = []
+        for t in self.tables:
+            if (t.schema, t.name) in removed_keys:
+                if fk_engine is not None and not t.is_view:
+                    affected_fields.update(fk_engine.remove_table(t.name))
+                self.diagram.remove_table(t.name, t.schema)
+            else:
+                kept_tables.append(t)
+        self.tables = kept_tables
+        self.problem_tables = [
+            name for name in self.problem_tables if name not in changed_names
+        ]
+
+        fields_by_table: dict[Tuple[str, str], list[Tuple[str, str, bool]]] = {}
+        for schema, table_name, field_name, type_name, is_assembly, nullable in fields_rows:
+            fields_by_table.setdefault((schema, table_name), []).append(
+                (field_name, python_type_name(type_name, is_assembly), bool(nullable))
+            )
+        pks_by_table: dict[Tuple[str, str], list[Tuple[str, str]]] = {}
+        for schema, table_name, field_name, constraint, _ in pk_rows:
+            pks_by_table.setdefault((schema, table_name), []).append(
+                (field_name, constraint)
+            )
+        for key in changed:
+            if key not in fields_by_table:
+                self.problem_tables.append(key[1])
+                continue
+            t = self._add_introspected_table(
+                key[1],
+                key[0],
+                object_types.get(key) == "V",
+                pks_by_table.get(key, []),
+                fields_by_table[key],
+                [],
+            )
+            if fk_engine is not None and not t.is_view:
+                affected_fields.update(
+                    fk_engine.add_table(
+                        t.name,
+                        [field[0] for field in t.fields],
+                        t.primary_keys,
+                        [field[1] for field in t.fields],
+                    )
+                )
+
+        known_tables = {(t.schema, t.name) for t in self.tables}
+        new_relations: list[tuple[str, str, str, str, str, bool]] = []
+        for (
+            ref_schema,
+            ref_table,
+            ref_field,
+            fk_schema,
+            fk_table,
+            fk_field,
+            constraint,
+            _,
+        ) in fk_rows:
+            if (ref_schema, ref_table) in known_tables and (
+                ref_table in changed_names or fk_table in changed_names
+            ):
+                new_relations.append(
+                    (fk_table, fk_field, ref_table, ref_field, constraint, False)
+                )
+
+        if fk_engine is not None and affected_fields:
+            # Only name-inferred relations are re-inferred; those discovered
+            # from the data of unchanged tables stay
+            data_discovered = {
+                (r["from_table"], r["from_field"], r["to_table"], r["to_field"], r["label"], True)
+                for r in self.diagram.relations
+                if "confidence" in r
+            }
+            self.diagram.remove_relations(
+                lambda rel: rel["reasoning"]
+                and "confidence" not in rel
+                and rel["from_field"] in affected_fields
+            )
+            self.relations = [
+                rel
+                for rel in self.relations
+                if not (rel[5] and rel[1] in affected_fields and rel not in data_discovered)
+            ]
+            new_relations.extend(fk_engine.relations(affected_fields))
+
+        for relation in new_relations:
+            self.relations.append(relation)
+            self._add_diagram_relation(relation)
+        if self.discover_FK:
+            self.discover_inclusion_FK(tables=changed_names)
+        return summary
+
+    def discover_inclusion_FK(
+        self,
+        time_budget: float = 30.0,
+        bytes_budget: int = 64 * 1024 * 1024,
+        sample_rows: int = 1000,
+        pk_rows: int = 100000,
+        workers: int = 4,
+        min_confidence: float = 0.9,
+        tables: Optional[Iterable[str]] = None,
+    ) -> list[tuple[str, str, str, str, str, bool, float]]:
+        """
+        Discover undeclared foreign keys from sampled column values and add
+        them to the diagram as reasoned relations with a confidence score.
+        Columns that already have a relation are not considered.
+
+        See InclusionDependencyDiscovery for how the values are sampled and compared.
+
+        Args:
+            time_budget (float, optional): Seconds the discovery may take. Defaults to 30.0.
+            bytes_budget (int, optional): Bytes of values it may read. Defaults to 64 MiB.
+            sample_rows (int, optional): Rows sampled per candidate table. Defaults to 1000.
+            pk_rows (int, optional): Rows read per primary key before sampling it. Defaults to 100000.
+            workers (int, optional): Number of concurrent queries. Defaults to 4.
+            min_confidence (float, optional): Lowest confidence kept. Defaults to 0.9.
+            tables (Optional[Iterable[str]], optional): Only discover relations from or to
+                these tables. Defaults to None (all).
+
+        Returns:
+            list[tuple[str, str, str, str, str, bool, float]]: Added relations with their confidence.
+        """
+        dbcnxt: dbConnection = self._connection()
+        with dbcnxt:
+            row_counts = {
+                (schema, name): rows for schema, name, rows in dbcnxt.row_counts()
+            }
+        discovery = InclusionDependencyDiscovery(
+            self._connection,
+            time_budget=time_budget,
+            bytes_budget=bytes_budget,
+            sample_rows=sample_rows,
+            pk_rows=pk_rows,
+            workers=workers,
+            min_confidence=min_confidence,
+        )
+        discovered = discovery.discover(
+            self.tables,
+            row_counts=row_counts,
+            exclude=[(rel[0], rel[1]) for rel in self.relations],
+            only=tables,
+        )
+        for relation in discovered:
+            self.relations.append(relation[:6])
+            self.diagram.add_relation(
+                relation[0],
+                relation[1],
+                relation[2],
+                relation[3],
+                relation_label=relation[4],
+                reasoning=relation[5],
+                confidence=relation[6],
+            )
+        return discovered
+
+    def _snapshot_payload(self) -> dict:
+        return {
+            "schemas": self.schemas,
+            "problem_tables": self.problem_tables,
+            "object_stamps": [
+                [schema, name, stamp]
+                for (schema, name), stamp in self.object_stamps.items()
+            ],
+            "diagram": self.diagram.get_record(),
+        }
+
+    def _restore_snapshot(self, payload: dict) -> None:
+        self.schemas = list(payload["schemas"])
+        self.problem_tables = list(payload["problem_tables"])
+        self.object_stamps = {
+            (schema, name): stamp for schema, name, stamp in payload["object_stamps"]
+        }
+        self.diagram = ERDiagram.from_record(payload["diagram"])
+        self.tables = list(self.diagram.tables.values())
+        self.relations = [
+            (*map(_intern, rel[:5]), rel[5]) for rel in payload["diagram"][2]
+        ]
 
     def _analysis_database_mssql(
         self,
         reasoning_FK: bool = False,
         reasoning_all_FK: bool = False,
         disable_sql_FK: bool = False,
+        introspection: TypeIntrospection = TypeIntrospection.PER_TABLE,
+        workers: int = 8,
     ) -> None:
         """
         Analyze the database schema and generate ER diagrams.
@@ -596,6 +2242,8 @@ class ERGenerator:
         Args:
             reasoning_FK (bool, optional): Whether to reason foreign keys. Defaults to False.
             disable_sql_FK (bool, optional): Whether to disable SQL foreign keys. Defaults to True.
+            introspection (TypeIntrospection, optional): How the catalog is read. Defaults to TypeIntrospection.PER_TABLE.
+            workers (int, optional): Number of threads for TypeIntrospection.PARALLEL. Defaults to 8.
         """
 
         self.schemas: list[str] = []
@@ -603,86 +2251,167 @@ class ERGenerator:
         self.relations: list[tuple[str, str, str, str, str, bool]] = []
         self.problem_tables: list[str] = []
 
-        class field_reasoing_FK:
-            def __init__(self, field_name: str):
-                self.field_name: str = field_name
-                self.pk_tables: list[Tuple[str, int]] = []
-                self.fk_tables: list[str] = []
-
-            def reasoning(self) -> None:
-                # sort the tables by the number of primary keys
-                self.pk_tables.sort(key=lambda x: x[1])
-                similaritest: float = 0.0
-                similarity: float = 0.0
-                similaritest_table = ""
-                if len(self.pk_tables) + len(self.fk_tables) <= 1:
-                    return
-                if len(self.pk_tables) == 0:
-                    self.pk_tables = [(fkt, 1) for fkt in self.fk_tables]
-                    self.fk_tables = []
-                if len(self.pk_tables) != 1:
-                    not_onePKT = []
-                    onePKT = []
-                    for table, pk_num in self.pk_tables:
-                        if pk_num == 1:
-                            similaritest_table = table
-                            onePKT.append((table, pk_num))
-                        else:
-                            not_onePKT.append((table, pk_num))
-                    onePKT_num = len(onePKT)
-                    for_PKT = onePKT
-                    if onePKT_num == 1:
-                        for_PKT = [(similaritest_table, 1)]
-                    elif onePKT_num < 1:
-                        for_PKT = not_onePKT
-                    for table, pk_num in for_PKT:
-                        # select the most similar table (calculate table,field_name similarity)
-                        similarity = difflib.SequenceMatcher(
-                            None, self.field_name, table
-                        ).ratio()
-                        if similarity > similaritest:
-                            similaritest = similarity
-                            similaritest_table = table
-                    for table, _ in self.pk_tables:
-                        if table != similaritest_table:
-                            self.fk_tables.append(table)
-                    self.pk_tables = [(similaritest_table, 1)]
-
-            def __repr__(self) -> str:
-                repr: str = (
-                    f"Field: {self.field_name}\n"
-                    + f"Primary Key Table: {self.pk_tables}\n"
-                    + f"fk Tables: {self.fk_tables}\n"
+        if introspection == TypeIntrospection.BULK:
+            introspected = self._introspect_bulk(disable_sql_FK)
+        elif introspection == TypeIntrospection.PARALLEL:
+            introspected = self._introspect_parallel(disable_sql_FK, workers)
+        else:
+            introspected = self._introspect_per_table(disable_sql_FK)
+        for table_info in introspected:
+            self._add_introspected_table(*table_info, disable_sql_FK=disable_sql_FK)
+
+        self.fk_engine = None
+        if reasoning_FK:
+            self.reasoning_all_FK = reasoning_all_FK
+            self.relations.extend(self._get_fk_engine().relations())
+
+        for relation in self.relations:
+            self._add_diagram_relation(relation)
+
+    def _add_introspected_table(
+        self,
+        table_name: str,
+        schema: str,
+        is_view: bool,
+        primary_key_fields_constraint: list[Tuple[str, str]],
+        fields: list[Tuple[str, str, bool]],
+        foreign_key_fields_constraint: list[Tuple[str, str, str, str, str]],
+        disable_sql_FK: bool = False,
+    ) -> Table:
+        """
+        Build a Table from one introspection record, add it to the diagram and
+        collect its declared foreign keys in self.relations.
+        """
+        t: Table = Table(table_name, is_view=is_view, schema=schema)
+        for field_name, field_type, field_nullable in fields:
+            t.add_field(field_name, field_type, nullable=field_nullable)
+        for pk_field, pk_constraint in primary_key_fields_constraint:
+            t.add_primary_key(pk_field, pk_constraint)
+        if not disable_sql_FK:
+            for (
+                fk_ref_table,
+                fk_ref_field,
+                fk_table,
+                fk_field,
+                fk_constraint,
+            ) in foreign_key_fields_constraint:
+                self.relations.append(
+                    (
+                        fk_ref_table,
+                        fk_ref_field,
+                        fk_table,
+                        fk_field,
+                        fk_constraint,
+                        False,
+                    )
                 )
-                return repr
 
-        reasoning_FK_dict: dict[str, field_reasoing_FK] = {
-            # "field": {
-            #     field_reasoing_FK()
-            # }
-        }
+        self.diagram.add_table(t)
+        self.tables.append(t)
+        return t
 
-        dbcnxt: dbConnection = dbConnection(
+    def _add_diagram_relation(
+        self, relation: tuple[str, str, str, str, str, bool]
+    ) -> None:
+        fk_ref_table, fk_ref_field, fk_table, fk_field, fk_constraint, reasoning = (
+            relation
+        )
+        self.diagram.add_relation(
+            fk_ref_table,
+            fk_ref_field,
+            fk_table,
+            fk_field,
+            relation_label=fk_constraint,
+            reasoning=reasoning,
+        )
+
+    def _get_fk_engine(self) -> FKInferenceEngine:
+        """Get the FK inference engine, indexing the current tables on first use."""
+        if self.fk_engine is None:
+            self.fk_engine = FKInferenceEngine(
+                reasoning_all_FK=self.reasoning_all_FK,
+                prune_types=self.prune_FK_types,
+            )
+            for t in self.tables:
+                if not t.is_view:
+                    self.fk_engine.add_table(
+                        t.name,
+                        [field[0] for field in t.fields],
+                        t.primary_keys,
+                        [field[1] for field in t.fields],
+                    )
+        return self.fk_engine
+
+    def _connection(self, schema_name: Optional[str] = "dbo") -> dbConnection:
+        return dbConnection(
             driver=self.driver,
             server=self.server,
             database=self.database,
             username=self.username,
             password=self.password,
-            schema_name="dbo",
+            schema_name=schema_name,
+        )
+
+    def _introspect_table(
+        self,
+        dbcnxt: dbConnection,
+        table_name: str,
+        schema: str,
+        is_view: bool,
+        disable_sql_FK: bool = False,
+    ) -> Optional[tuple]:
+        """
+        Ask the driver for the primary keys, fields and foreign keys of one table.
+
+        Returns:
+            Optional[tuple]: (table name, schema, is view, primary keys, fields, foreign keys),
+                or None if the fields of the table cannot be read.
+        """
+        primary_keys = dbcnxt.pk(table_name, schema_name=schema)["primaryKeys"]
+        primary_key_fields_constraint = [(fk[3], fk[-1]) for fk in primary_keys]
+        try:
+            description = dbcnxt.fields(table_name, schema_name=schema)
+        except Exception:
+            return None
+        fields = []
+        for field in description:
+            field_type = "UNKNOWN"
+            match = re.search(r"'(.+?)'", str(field[1]))
+            if match:
+                full_name = match.group(1)
+                # 分割并取最后一部分（如 'datetime'）
+                field_type = full_name.split(".")[-1].lower()
+            fields.append((field[0], field_type, field[6]))
+        foreign_key_fields_constraint = []
+        if not disable_sql_FK:
+            foreign_keys = dbcnxt.fk(table_name, schema_name=schema)["foreignKeys"]
+            foreign_key_fields_constraint = [
+                (fk[6], fk[7], fk[2], fk[3], fk[-3]) for fk in foreign_keys
+            ]
+        return (
+            table_name,
+            schema,
+            is_view,
+            primary_key_fields_constraint,
+            fields,
+            foreign_key_fields_constraint,
         )
+
+    def _introspect_per_table(self, disable_sql_FK: bool = False) -> Iterator[tuple]:
+        """
+        Walk the schemas table by table, asking the driver for the primary keys,
+        fields and foreign keys of each one.
+
+        Yields:
+            tuple: (table name, schema, is view, primary keys, fields, foreign keys)
+        """
+        dbcnxt: dbConnection = self._connection()
         with dbcnxt:
             schemas = dbcnxt.schemas()
             for schema in schemas:
                 self.schemas.append(schema[1])
         for schema in self.schemas:
-            dbcnxt: dbConnection = dbConnection(
-                driver=self.driver,
-                server=self.server,
-                database=self.database,
-                username=self.username,
-                password=self.password,
-                schema_name=schema,
-            )
+            dbcnxt: dbConnection = self._connection(schema)
             with dbcnxt:
                 tables = dbcnxt.tables(exclusion=True)
                 for table in tables:
@@ -690,119 +2419,184 @@ class ERGenerator:
                     table_schema = table[1]
                     is_view = table[-2] == "VIEW"
                     if table_schema == schema:
-                        t: Table = Table(table_name, is_view=is_view, schema=schema)
-                        primary_keys = dbcnxt.pk(table[2])["primaryKeys"]
-                        primary_key_fields_constraint = [
-                            (fk[3], fk[-1]) for fk in primary_keys
-                        ]
-                        try:
-                            fields = dbcnxt.fields(table_name, schema_name=schema)
-                        except Exception:
+                        table_info = self._introspect_table(
+                            dbcnxt, table_name, schema, is_view, disable_sql_FK
+                        )
+                        if table_info is None:
                             self.problem_tables.append(table_name)
                             continue
-                        for field in fields:
-                            field_name = field[0]
-                            field_type = "UNKNOWN"
-                            field_nullable = field[6]
-                            match = re.search(r"'(.+?)'", str(field[1]))
-                            if match:
-                                full_name = match.group(1)
-                                # 分割并取最后一部分（如 'datetime'）
-                                field_type = full_name.split(".")[-1].lower()
-                            t.add_field(field_name, field_type, nullable=field_nullable)
-                            if reasoning_FK and not is_view:
-                                pk_fields = [
-                                    pk_field
-                                    for pk_field, _ in primary_key_fields_constraint
-                                ]
-                                pk_num = len(pk_fields)
-                                if field_name in reasoning_FK_dict.keys():
-                                    obj = reasoning_FK_dict[field_name]
-                                    if field_name in pk_fields:
-                                        obj.pk_tables.append((table_name, pk_num))
-                                    else:
-                                        obj.fk_tables.append(table_name)
-                                else:
-                                    obj = field_reasoing_FK(field_name)
-                                    if field_name in pk_fields:
-                                        obj.pk_tables.append((table_name, pk_num))
-                                    else:
-                                        obj.fk_tables.append(table_name)
-                                    reasoning_FK_dict[field_name] = obj
-
-                        for pk_field, pk_constraint in primary_key_fields_constraint:
-                            t.add_primary_key(pk_field, pk_constraint)
-                        if not disable_sql_FK:
-                            foreign_keys = dbcnxt.fk(table[2])["foreignKeys"]
-                            foreign_key_fields_constraint = [
-                                (fk[6], fk[7], fk[2], fk[3], fk[-3])
-                                for fk in foreign_keys
-                            ]
-                            for (
-                                fk_ref_table,
-                                fk_ref_field,
-                                fk_table,
-                                fk_field,
-                                fk_constraint,
-                            ) in foreign_key_fields_constraint:
-                                # t.add_foreign_key(
-                                #     fk_field, fk_ref_table, fk_ref_field, fk_constraint
-                                # )
-                                self.relations.append(
-                                    (
-                                        fk_ref_table,
-                                        fk_ref_field,
-                                        fk_table,
-                                        fk_field,
-                                        fk_constraint,
-                                        False,
-                                    )
-                                )
-
-                        self.diagram.add_table(t)
-                        self.tables.append(t)
-
-        for FieldrFK, rFKdict in reasoning_FK_dict.items():
-            if (
-                (len(rFKdict.pk_tables) != 0 and len(rFKdict.fk_tables) != 0)
-                or len(rFKdict.pk_tables) > 1
-                or (
-                    reasoning_all_FK
-                    and len(rFKdict.pk_tables) == 0
-                    and len(rFKdict.fk_tables) > 1
-                )
-            ):
-                rFKdict.reasoning()
-                pk_table = rFKdict.pk_tables[0][0]
-                fk_tables = rFKdict.fk_tables
-                for fk_table in fk_tables:
-                    self.relations.append(
-                        (
-                            fk_table,
-                            FieldrFK,
-                            pk_table,
-                            FieldrFK,
-                            "FK_" + fk_table + "_" + pk_table + "_" + FieldrFK,
-                            True,
+                        yield table_info
+
+    def _introspect_parallel(
+        self, disable_sql_FK: bool = False, workers: int = 8
+    ) -> Iterator[tuple]:
+        """
+        Same walk as ``_introspect_per_table``, fanned out over a bounded pool of
+        threads that each hold one pooled connection. pyodbc releases the GIL
+        while waiting on the server, so the round trips overlap.
+
+        Results are merged back in catalog order, so tables, relations and
+        problem tables come out exactly as in the sequential walk. No more
+        threads are started than the connection pool has free connections, and
+        a thread that cannot get a connection before the other threads have
+        taken every table gives up quietly.
+
+        Yields:
+            tuple: (table name, schema, is view, primary keys, fields, foreign keys)
+        """
+        dbcnxt: dbConnection = self._connection()
+        with dbcnxt:
+            self.schemas = [schema[1] for schema in dbcnxt.schemas()]
+            tables = dbcnxt.tables(exclusion=True)
+
+        tables_by_schema: dict[str, list] = {}
+        for table in tables:
+            tables_by_schema.setdefault(table[1], []).append(table)
+        tasks: list[Tuple[str, str, bool]] = [
+            (table[2], schema, table[-2] == "VIEW")
+            for schema in self.schemas
+            for table in tables_by_schema.get(schema, [])
+        ]
+        results: list[Optional[tuple]] = [None] * len(tasks)
+        next_task = 0
+        pending_lock = threading.Lock()
+
+        def take() -> Optional[int]:
+            nonlocal next_task
+            with pending_lock:
+                if next_task >= len(tasks):
+                    return None
+                next_task += 1
+                return next_task - 1
+
+        def work() -> None:
+            dbcnxt: dbConnection = self._connection()
+            try:
+                with dbcnxt:
+                    while (index := take()) is not None:
+                        table_name, schema, is_view = tasks[index]
+                        results[index] = self._introspect_table(
+                            dbcnxt, table_name, schema, is_view, disable_sql_FK
                         )
-                    )
+            except TimeoutError:
+                # No free connection: only a failure if tables are left over
+                with pending_lock:
+                    if next_task < len(tasks):
+                        raise
+
+        if dbcnxt.pool is not None:
+            workers = min(workers, dbcnxt.pool.available())
+        workers = max(1, min(workers, len(tasks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(work) for _ in range(workers)]:
+                future.result()
+
+        for (table_name, _, _), table_info in zip(tasks, results):
+            if table_info is None:
+                self.problem_tables.append(table_name)
+                continue
+            yield table_info
+
+    def _introspect_bulk(self, disable_sql_FK: bool = False) -> Iterator[tuple]:
+        """
+        Read the whole catalog with a fixed number of set-based queries and
+        join the results in memory, yielding the same records in the same
+        order as ``_introspect_per_table``.
 
-        for relation in self.relations:
-            fk_ref_table, fk_ref_field, fk_table, fk_field, fk_constraint, reasoning = (
-                relation
+        Tables without any visible column are reported as problem tables.
+
+        Yields:
+            tuple: (table name, schema, is view, primary keys, fields, foreign keys)
+        """
+        dbcnxt: dbConnection = self._connection()
+        with dbcnxt:
+            self.schemas = [schema[1] for schema in dbcnxt.schemas()]
+            tables = dbcnxt.tables(exclusion=True)
+            fields_rows = dbcnxt.fields_bulk()
+            pk_rows = dbcnxt.pk_bulk()
+            fk_rows = dbcnxt.fk_bulk() if not disable_sql_FK else []
+
+        fields_by_table: dict[Tuple[str, str], list[Tuple[str, str, bool]]] = {}
+        for schema, table_name, field_name, type_name, is_assembly, nullable in fields_rows:
+            fields_by_table.setdefault((schema, table_name), []).append(
+                (field_name, python_type_name(type_name, is_assembly), bool(nullable))
             )
-            self.diagram.add_relation(
-                fk_ref_table,
-                fk_ref_field,
-                fk_table,
-                fk_field,
-                relation_label=fk_constraint,
-                reasoning=reasoning,
+        pks_by_table: dict[Tuple[str, str], list[Tuple[str, str]]] = {}
+        for schema, table_name, field_name, constraint, _ in pk_rows:
+            pks_by_table.setdefault((schema, table_name), []).append(
+                (field_name, constraint)
+            )
+        fks_by_table: dict[Tuple[str, str], list[Tuple[str, str, str, str, str]]] = {}
+        for (
+            ref_schema,
+            ref_table,
+            ref_field,
+            _,
+            fk_table,
+            fk_field,
+            constraint,
+            _,
+        ) in fk_rows:
+            fks_by_table.setdefault((ref_schema, ref_table), []).append(
+                (fk_table, fk_field, ref_table, ref_field, constraint)
             )
 
+        tables_by_schema: dict[str, list] = {}
+        for table in tables:
+            tables_by_schema.setdefault(table[1], []).append(table)
+        for schema in self.schemas:
+            for table in tables_by_schema.get(schema, []):
+                table_name = table[2]
+                key = (schema, table_name)
+                if key not in fields_by_table:
+                    self.problem_tables.append(table_name)
+                    continue
+                yield (
+                    table_name,
+                    schema,
+                    table[-2] == "VIEW",
+                    pks_by_table.get(key, []),
+                    fields_by_table[key],
+                    fks_by_table.get(key, []),
+                )
+
     def get_problem_tables(self):
         return self.problem_tables
 
+    def render_key(
+        self,
+        rankdir: TypeRankdir = TypeRankdir.TB,
+        dpi: int = 1300,
+        render_tables: Optional[list[str]] = None,
+        render_related: bool = False,
+        field_omission: bool = False,
+        related_depth: int = 1,
+        split_components: bool = False,
+        format: str = "svg",
+        limits: Optional[RenderLimits] = None,
+        detail: TypeDetail = TypeDetail.FULL,
+    ) -> str:
+        """
+        Content address of a render: a digest of the diagram content, the
+        quality settings, the render parameters and the FK flags. Equal keys
+        always render to equal bytes, except for fallback layouts forced by a
+        dot timeout, which come back as TransientRender and are never cached.
+        """
+        return content_key(
+            self.diagram.content_hash(RenderSettings(rankdir=rankdir, dpi=dpi)),
+            format,
+            sorted(render_tables) if render_tables is not None else None,
+            render_related,
+            field_omission,
+            related_depth,
+            split_components,
+            limits,
+            detail.value,
+            self.reasoning_FK,
+            self.reasoning_all_FK,
+            self.disable_sql_FK,
+        )
+
     def render_diagrams(
         self,
         rankdir: TypeRankdir = TypeRankdir.TB,
@@ -810,18 +2604,207 @@ class ERGenerator:
         render_tables: Optional[list[str]] = None,
         render_related: bool = False,
         field_omission: bool = False,
+        related_depth: int = 1,
+        split_components: bool = False,
+        cache: Optional[RenderCache] = None,
+        limits: Optional[RenderLimits] = None,
+        detail: TypeDetail = TypeDetail.FULL,
     ) -> bytes:
         """
         Render all ER diagrams to bytes.
+        If a cache is given, an identical earlier render is returned without running graphviz,
+        and identical renders running at the same time (in any worker sharing the cache
+        directory) share one graphviz run.
         """
-        self.diagram.set_quality_settings(rankdir=rankdir, dpi=dpi)
-        return self.diagram.render_to_bytes(
-            format="svg",
+        key: Optional[str] = None
+        if cache is not None:
+            key = self.render_key(
+                rankdir,
+                dpi,
+                render_tables,
+                render_related,
+                field_omission,
+                related_depth,
+                split_components,
+                limits=limits,
+                detail=detail,
+            )
+            data = cache.get(key)
+            if data is not None:
+                return data
+
+        def render() -> bytes:
+            return self.diagram.render_to_bytes(
+                format="svg",
+                render_tables=render_tables,
+                render_related=render_related,
+                field_omission=field_omission,
+                related_depth=related_depth,
+                split_components=split_components,
+                limits=limits,
+                detail=detail,
+                settings=RenderSettings(rankdir=rankdir, dpi=dpi),
+            )
+
+        if key is None:
+            return render()
+        return get_render_flights().do(key, cache.get_or_render, key, render)
+
+    async def arender_diagrams(
+        self,
+        rankdir: TypeRankdir = TypeRankdir.TB,
+        dpi: int = 1300,
+        render_tables: Optional[list[str]] = None,
+        render_related: bool = False,
+        field_omission: bool = False,
+        related_depth: int = 1,
+        split_components: bool = False,
+        cache: Optional[RenderCache] = None,
+        limits: Optional[RenderLimits] = None,
+        detail: TypeDetail = TypeDetail.FULL,
+    ) -> bytes:
+        """
+        Async render_diagrams(): graphviz runs as an asyncio subprocess, so one
+        event loop can serve many renders at once. A shared render is only
+        cancelled once every caller waiting for it is cancelled.
+        """
+        key: Optional[str] = None
+        if cache is not None:
+            key = self.render_key(
+                rankdir,
+                dpi,
+                render_tables,
+                render_related,
+                field_omission,
+                related_depth,
+                split_components,
+                limits=limits,
+                detail=detail,
+            )
+            data = cache.get(key)
+            if data is not None:
+                return data
+
+        async def render() -> bytes:
+            return await self.diagram.arender_to_bytes(
+                format="svg",
+                render_tables=render_tables,
+                render_related=render_related,
+                field_omission=field_omission,
+                related_depth=related_depth,
+                split_components=split_components,
+                limits=limits,
+                detail=detail,
+                settings=RenderSettings(rankdir=rankdir, dpi=dpi),
+            )
+
+        if key is None:
+            return await render()
+        return await get_render_flights().ado(key, cache.aget_or_render, key, render)
+
+    def graph_json(
+        self,
+        rankdir: TypeRankdir = TypeRankdir.TB,
+        render_tables: Optional[list[str]] = None,
+        render_related: bool = False,
+        field_omission: bool = False,
+        related_depth: int = 1,
+        layout: bool = False,
+        cache: Optional[RenderCache] = None,
+        limits: Optional[RenderLimits] = None,
+        detail: TypeDetail = TypeDetail.FULL,
+    ) -> bytes:
+        """
+        Compact JSON of the selected subgraph (ERDiagram.to_graph()) under
+        "graph", with the graphviz positions (ERDiagram.layout_graph()) under
+        "layout" if layout. Cached and coalesced like render_diagrams(), keyed
+        by format "json" or "json+layout".
+        """
+        key: Optional[str] = None
+        if cache is not None:
+            key = self.render_key(
+                rankdir,
+                render_tables=render_tables,
+                render_related=render_related,
+                field_omission=field_omission,
+                related_depth=related_depth,
+                format="json+layout" if layout else "json",
+                limits=limits if layout else None,
+                detail=detail,
+            )
+            data = cache.get(key)
+            if data is not None:
+                return data
+        selection = dict(
+            render_tables=render_tables,
+            render_related=render_related,
+            field_omission=field_omission,
+            related_depth=related_depth,
+            detail=detail,
+            settings=RenderSettings(rankdir=rankdir),
+        )
+
+        def render() -> bytes:
+            graph = {"graph": self.diagram.to_graph(**selection)}
+            if layout:
+                graph["layout"] = self.diagram.layout_graph(**selection, limits=limits)
+            data = json.dumps(graph, separators=(",", ":")).encode("utf-8")
+            return TransientRender(data) if graph.get("layout", {}).get("transient") else data
+
+        if key is None:
+            return render()
+        return get_render_flights().do(key, cache.get_or_render, key, render)
+
+    async def agraph_json(
+        self,
+        rankdir: TypeRankdir = TypeRankdir.TB,
+        render_tables: Optional[list[str]] = None,
+        render_related: bool = False,
+        field_omission: bool = False,
+        related_depth: int = 1,
+        layout: bool = False,
+        cache: Optional[RenderCache] = None,
+        limits: Optional[RenderLimits] = None,
+        detail: TypeDetail = TypeDetail.FULL,
+    ) -> bytes:
+        """
+        Async graph_json(): the optional layout runs as an asyncio subprocess.
+        """
+        key: Optional[str] = None
+        if cache is not None:
+            key = self.render_key(
+                rankdir,
+                render_tables=render_tables,
+                render_related=render_related,
+                field_omission=field_omission,
+                related_depth=related_depth,
+                format="json+layout" if layout else "json",
+                limits=limits if layout else None,
+                detail=detail,
+            )
+            data = cache.get(key)
+            if data is not None:
+                return data
+        selection = dict(
             render_tables=render_tables,
             render_related=render_related,
             field_omission=field_omission,
+            related_depth=related_depth,
+            detail=detail,
+            settings=RenderSettings(rankdir=rankdir),
         )
 
+        async def render() -> bytes:
+            graph = {"graph": self.diagram.to_graph(**selection)}
+            if layout:
+                graph["layout"] = await self.diagram.alayout_graph(**selection, limits=limits)
+            data = json.dumps(graph, separators=(",", ":")).encode("utf-8")
+            return TransientRender(data) if graph.get("layout", {}).get("transient") else data
+
+        if key is None:
+            return await render()
+        return await get_render_flights().ado(key, cache.aget_or_render, key, render)
+
     def render_file(
         self,
         filename: str = "er-diagram",
@@ -831,15 +2814,23 @@ class ERGenerator:
         render_tables: Optional[list[str]] = None,
         render_related: bool = False,
         field_omission: bool = False,
+        related_depth: int = 1,
+        split_components: bool = False,
+        limits: Optional[RenderLimits] = None,
+        detail: TypeDetail = TypeDetail.FULL,
     ) -> None:
         """
         Render the ER diagram to a file.
         """
-        self.diagram.set_quality_settings(rankdir=rankdir, dpi=dpi)
         self.diagram.render_to_file(
             format=format,
             filename=filename,
             render_tables=render_tables,
             render_related=render_related,
             field_omission=field_omission,
+            related_depth=related_depth,
+            split_components=split_components,
+            limits=limits,
+            detail=detail,
+            settings=RenderSettings(rankdir=rankdir, dpi=dpi),
         )
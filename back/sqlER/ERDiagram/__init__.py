@@ -1 +1,2 @@
 from .ERDiagram import *
+from .batch import *
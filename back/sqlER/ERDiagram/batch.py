@@ -0,0 +1,97 @@
+import os
+import subprocess
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from ..graph import run_layout
+from .ERDiagram import ERDiagram, RenderSettings, TypeRankdir
+
+RENDER_TIMEOUT: float = 300.0  # seconds per layout
+
+
+class RenderSpec(NamedTuple):
+    """One diagram to render, with the same parameters as ERGenerator.render_file()."""
+
+    name: str
+    render_tables: Optional[List[str]] = None
+    render_related: bool = False
+    field_omission: bool = False
+    related_depth: int = 1
+    rankdir: TypeRankdir = TypeRankdir.TB
+    dpi: int = 1300
+    format: str = "svg"
+    filename: Optional[str] = None  # written as "<filename>.<format>" when given
+
+
+class RenderResult(NamedTuple):
+    spec: RenderSpec
+    data: Optional[bytes]
+    error: Optional[str]
+    seconds: float
+
+
+def _layout(engine: str, format: str, source: str, timeout: float) -> Tuple[bytes, float]:
+    # Runs in a pool process; the layout is killed on timeout
+    start = time.monotonic()
+    data = run_layout(source, format, engine, timeout)
+    return data, time.monotonic() - start
+
+
+def render_many(
+    jobs: Iterable[Tuple[ERDiagram, RenderSpec]],
+    workers: Optional[int] = None,
+    timeout: float = RENDER_TIMEOUT,
+    engine: str = "dot",
+) -> Iterator[RenderResult]:
+    """
+    Render many diagrams, running the graphviz layouts concurrently in a pool
+    of worker processes. DOT sources are built up front in this process,
+    then results are yielded as soon as each layout finishes (not in job
+    order). A failed or timed out layout yields a result with an error
+    instead of stopping the batch.
+
+    Args:
+        jobs (Iterable[Tuple[ERDiagram, RenderSpec]]): Diagram and parameters of each render.
+        workers (Optional[int], optional): Worker processes. Defaults to the CPU count.
+        timeout (float, optional): Seconds each layout may run before it is killed. Defaults to RENDER_TIMEOUT.
+        engine (str, optional): Graphviz layout command. Defaults to "dot".
+
+    Yields:
+        RenderResult: (spec, rendered bytes or None, error or None, layout seconds)
+    """
+    sources: List[Tuple[RenderSpec, str]] = []
+    for diagram, spec in jobs:
+        sources.append(
+            (
+                spec,
+                diagram.to_dot(
+                    render_tables=spec.render_tables,
+                    render_related=spec.render_related,
+                    field_omission=spec.field_omission,
+                    related_depth=spec.related_depth,
+                    settings=RenderSettings(rankdir=spec.rankdir, dpi=spec.dpi),
+                ),
+            )
+        )
+    if not sources:
+        return
+    workers = max(1, min(workers or os.cpu_count() or 1, len(sources)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures: Dict[Future, RenderSpec] = {
+            executor.submit(_layout, engine, spec.format, source, timeout): spec
+            for spec, source in sources
+        }
+        for future in as_completed(futures):
+            spec = futures[future]
+            try:
+                data, seconds = future.result()
+            except subprocess.TimeoutExpired:
+                yield RenderResult(spec, None, f"timed out after {timeout}s", timeout)
+                continue
+            except Exception as e:
+                yield RenderResult(spec, None, str(e) or type(e).__name__, 0.0)
+                continue
+            if spec.filename is not None:
+                with open(f"{spec.filename}.{spec.format}", "wb") as f:
+                    f.write(data)
+            yield RenderResult(spec, data, None, seconds)
@@ -1 +1,10 @@
-from .ERDiagram import ERGenerator, ERDiagram, TypeRankdir, Table
+from .ERDiagram import ERGenerator, ERDiagram, TypeIntrospection, TypeRankdir, Table
+from .ERDiagram import TypeDetail
+from .ERDiagram import RenderResult, RenderSpec, render_many
+from .ERDiagram import RenderLimits, RenderSettings, RenderTimeout
+from .connection import ConnectionPool, configure_pools, get_pool, close_pools
+from .connection import configure_odbc_executor, get_odbc_executor, run_odbc
+from .cache import RenderCache, TransientRender, configure_render_cache, get_render_cache
+from .cache import SingleFlight, get_render_flights
+from .registry import SchemaRegistry, configure_registry, get_registry
+from .registry import SchemaRefresher, start_refresher, stop_refresher
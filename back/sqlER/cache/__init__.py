@@ -0,0 +1,3 @@
+from .render_cache import *
+from .singleflight import *
+from .filelock import *
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import time
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process exclusion
+    fcntl = None
+
+# Seconds between two attempts of a non-blocking acquire
+LOCK_POLL_INTERVAL: float = 0.05
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on a file, held across processes (and threads,
+    each acquire opens its own descriptor), so only one worker of a host
+    rebuilds a shared cache entry. A no-op where fcntl is unavailable.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize a FileLock instance.
+
+        Args:
+            path (str): Lock file, created if missing.
+        """
+        self.path: str = str(path)
+        self._fd: Optional[int] = None
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the lock.
+
+        Args:
+            timeout (Optional[float], optional): Seconds to wait. Defaults to None (forever).
+
+        Returns:
+            bool: Whether the lock was acquired.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_acquire(blocking=deadline is None):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(LOCK_POLL_INTERVAL)
+        return True
+
+    async def aacquire(self, timeout: Optional[float] = None) -> bool:
+        """Async acquire(): polls instead of blocking the event loop."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_acquire(blocking=False):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+        return True
+
+    def release(self) -> None:
+        """Release the lock if held."""
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    async def __aenter__(self) -> "FileLock":
+        await self.aacquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+    def _try_acquire(self, blocking: bool) -> bool:
+        if self._fd is not None:
+            raise RuntimeError(f"{self.path} is already locked by this FileLock")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+            except BaseException:
+                os.close(fd)
+                raise
+        self._fd = fd
+        return True
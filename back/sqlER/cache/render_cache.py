@@ -0,0 +1,257 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from .filelock import FileLock
+
+RENDER_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+RENDER_CACHE_MAX_DISK_BYTES: int = 512 * 1024 * 1024
+# The disk tier is swept each time this share of its budget has been written
+RENDER_CACHE_SWEEP_FRACTION: float = 0.1
+# Render keys share this many lock files, by their first two hex digits
+RENDER_LOCK_STRIPES: int = 256
+
+
+def content_key(*parts) -> str:
+    """Stable sha256 hex digest of JSON-serializable parts."""
+    return hashlib.sha256(
+        json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class TransientRender(bytes):
+    """
+    Rendered bytes that depend on more than their render key, such as a
+    fallback layout forced by a timeout under load. RenderCache never
+    stores them, so the next request renders again.
+    """
+
+
+class RenderCache:
+    """
+    Content-addressed cache of rendered diagrams: an in-memory LRU tier
+    bounded in bytes, backed by an optional on-disk tier.
+
+    Keys are digests of everything the output depends on, so entries never
+    go stale and need no invalidation; the byte budgets evict the least
+    recently used ones. On disk, recency is the file modification time,
+    which disk hits refresh.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = RENDER_CACHE_MAX_BYTES,
+        directory: Optional[str] = None,
+        max_disk_bytes: int = RENDER_CACHE_MAX_DISK_BYTES,
+    ):
+        """
+        Initialize a RenderCache instance.
+
+        Args:
+            max_bytes (int, optional): Memory budget of the LRU tier. Defaults to RENDER_CACHE_MAX_BYTES.
+            directory (Optional[str], optional): Directory of the disk tier. Defaults to None (memory only).
+            max_disk_bytes (int, optional): Budget of the disk tier. Defaults to RENDER_CACHE_MAX_DISK_BYTES.
+        """
+        self.max_bytes: int = max_bytes
+        self.directory: Optional[str] = str(directory) if directory is not None else None
+        self.max_disk_bytes: int = max_disk_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size: int = 0
+        self._lock = threading.Lock()
+        # Bytes written to disk since the last sweep, None before the first one
+        self._disk_written: Optional[int] = None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Get a rendered diagram, promoting disk hits to memory.
+
+        Returns:
+            Optional[bytes]: The cached bytes, or None on a miss.
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store a rendered diagram in both tiers. A TransientRender is not stored."""
+        if isinstance(data, TransientRender):
+            return
+        self._remember(key, data)
+        if self.directory is None:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            sweep = (
+                self._disk_written is None
+                or self._disk_written + len(data)
+                > self.max_disk_bytes * RENDER_CACHE_SWEEP_FRACTION
+            )
+            self._disk_written = 0 if sweep else self._disk_written + len(data)
+        if sweep:
+            self.sweep_disk()
+
+    def sweep_disk(self) -> int:
+        """
+        Delete the least recently used disk entries until the disk tier fits
+        its budget. Other processes may sweep the same directory concurrently.
+
+        Returns:
+            int: Bytes of the disk tier left.
+        """
+        if self.directory is None:
+            return 0
+        entries = []
+        total = 0
+        for path in glob.glob(os.path.join(self.directory, "[0-9a-f][0-9a-f]", "*")):
+            if path.endswith(".tmp"):
+                continue  # being written
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.max_disk_bytes:
+            return total
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        return total
+
+    def get_or_render(self, key: str, render: Callable[[], bytes]) -> bytes:
+        """
+        Get a rendered diagram, or render and store it. With a disk tier only
+        one process of the host renders a key at a time; the others wait
+        and read its result.
+        """
+        data = self.get(key)
+        if data is not None:
+            return data
+        lock = self.lock(key)
+        if lock is None:
+            data = render()
+            self.put(key, data)
+            return data
+        with lock:
+            data = self.get(key)
+            if data is None:
+                data = render()
+                self.put(key, data)
+        return data
+
+    async def aget_or_render(
+        self, key: str, render: Callable[[], Awaitable[bytes]]
+    ) -> bytes:
+        """Async get_or_render(): waits for other processes without blocking the event loop."""
+        data = self.get(key)
+        if data is not None:
+            return data
+        lock = self.lock(key)
+        if lock is None:
+            data = await render()
+            self.put(key, data)
+            return data
+        async with lock:
+            data = self.get(key)
+            if data is None:
+                data = await render()
+                self.put(key, data)
+        return data
+
+    def lock(self, key: str) -> Optional[FileLock]:
+        """Cross-process lock of a key, or None without a disk tier."""
+        if self.directory is None:
+            return None
+        stripe = int(key[:2], 16) % RENDER_LOCK_STRIPES
+        return FileLock(os.path.join(self.directory, "locks", f"{stripe:02x}.lock"))
+
+    def clear(self) -> None:
+        """Forget the memory tier. Disk entries are kept until swept."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _path(self, key: str) -> str:
+        # Two-character fan-out keeps directories small
+        return os.path.join(self.directory, key[:2], key)
+
+
+_render_cache: Optional[RenderCache] = None
+_render_cache_lock = threading.Lock()
+_render_cache_settings: dict = {}
+
+
+def configure_render_cache(**settings) -> None:
+    """
+    Set the RenderCache keyword arguments of the shared cache, e.g.
+    configure_render_cache(max_bytes=128 * 1024 * 1024, directory="/var/cache/er").
+    The shared cache is recreated on next use.
+    """
+    global _render_cache
+    with _render_cache_lock:
+        _render_cache_settings.update(settings)
+        _render_cache = None
+
+
+def get_render_cache() -> RenderCache:
+    """Get the process-wide render cache, creating it on first use."""
+    global _render_cache
+    with _render_cache_lock:
+        if _render_cache is None:
+            _render_cache = RenderCache(**_render_cache_settings)
+        return _render_cache
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class _Flight:
+    __slots__ = ("future", "waiters", "cancel", "abandoned")
+
+    def __init__(self):
+        self.future: Future = Future()
+        self.waiters: int = 0
+        self.cancel: Optional[Callable[[], None]] = None
+        self.abandoned: bool = False
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the
+    computation and every caller arriving while it is in flight waits for
+    and shares its result, or its exception. Nothing is kept once the call
+    finishes; caching is left to the caller.
+
+    Threads (do()) and event loops (ado()) share the same flights, so an
+    async view may wait on a computation started by a thread or by a
+    request served by another event loop.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call func(*args, **kwargs), unless a call for key is in flight, and
+        return (or raise) its outcome.
+        """
+        flight, leader = self._join(key)
+        try:
+            if not leader:
+                return flight.future.result()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                self._land(key, flight)
+                flight.future.set_exception(e)
+                raise
+            self._land(key, flight)
+            flight.future.set_result(result)
+            return result
+        finally:
+            self._leave(flight)
+
+    async def ado(
+        self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs
+    ) -> Any:
+        """
+        Async do(): await func(*args, **kwargs) as a task shared by all callers
+        of key. A caller being cancelled does not cancel the others; the
+        task is cancelled only once every caller is gone (e.g. all clients
+        disconnected), which stops a render nobody waits for.
+        """
+        flight, leader = self._join(key)
+        if leader:
+            loop = asyncio.get_running_loop()
+            task = loop.create_task(func(*args, **kwargs))
+            flight.cancel = lambda: loop.call_soon_threadsafe(task.cancel)
+            task.add_done_callback(lambda task: self._finish(key, flight, task))
+        try:
+            return await asyncio.shield(asyncio.wrap_future(flight.future))
+        except asyncio.CancelledError:
+            with self._lock:
+                flight.waiters -= 1
+                abandon = flight.waiters == 0 and not flight.future.done()
+                if abandon:
+                    flight.abandoned = True
+            if abandon and flight.cancel is not None:
+                flight.cancel()
+            raise
+        else:
+            self._leave(flight)
+
+    def in_flight(self) -> int:
+        """Number of computations currently running."""
+        with self._lock:
+            return len(self._flights)
+
+    def _join(self, key: Hashable) -> "tuple[_Flight, bool]":
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None or flight.abandoned
+            if leader:
+                flight = self._flights[key] = _Flight()
+            flight.waiters += 1
+            return flight, leader
+
+    def _leave(self, flight: _Flight) -> None:
+        with self._lock:
+            flight.waiters -= 1
+
+    def _land(self, key: Hashable, flight: _Flight) -> None:
+        # Later callers start a new computation instead of joining a finished one
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def _finish(self, key: Hashable, flight: _Flight, task: "asyncio.Task") -> None:
+        self._land(key, flight)
+        if task.cancelled():
+            flight.future.cancel()
+        elif task.exception() is not None:
+            flight.future.set_exception(task.exception())
+        else:
+            flight.future.set_result(task.result())
+
+
+_render_flights = SingleFlight()
+
+
+def get_render_flights() -> SingleFlight:
+    """Get the process-wide SingleFlight coalescing identical renders."""
+    return _render_flights
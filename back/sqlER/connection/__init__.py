@@ -1 +1,3 @@
 from .connection import *
+from .pool import *
+from .executor import *
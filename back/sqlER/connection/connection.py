@@ -1,9 +1,15 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 import pyodbc
+from .pool import ConnectionPool, get_pool
 
 exclusionTable = ["sys", "INFORMATION_SCHEMA"]
 
 
+def quote_name(name: str) -> str:
+    """Quote an identifier for SQL Server, e.g. Order -> [Order]."""
+    return "[" + name.replace("]", "]]") + "]"
+
+
 class dbConnection:
     def __init__(
         self,
@@ -13,6 +19,7 @@ class dbConnection:
         username: Optional[str] = None,
         password: Optional[str] = None,
         schema_name: Optional[str] = None,
+        pooled: bool = True,
     ):
         self.driver: Optional[str] = driver
         self.server: Optional[str] = server
@@ -20,17 +27,29 @@ class dbConnection:
         self.username: Optional[str] = username
         self.password: Optional[str] = password
         self.schema: Optional[str] = schema_name
+        self.pooled: bool = pooled
+        self.pool: Optional[ConnectionPool] = None
 
     def __enter__(self):
         self.connection_string: str = f"DRIVER={self.driver};SERVER={self.server};DATABASE={self.database};UID={self.username};PWD={self.password}"
-        self.connection: pyodbc.Connection = pyodbc.connect(self.connection_string)
-        self.db_name: str = self.connection.getinfo(pyodbc.SQL_DATABASE_NAME)
-        self.db_type: str = self.connection.getinfo(pyodbc.SQL_DBMS_NAME).lower()
-        self.schema: str = (
-            self.connection.getinfo(pyodbc.SQL_SCHEMA_NAME)
-            if self.schema is None
-            else self.schema
-        )
+        if self.pooled:
+            # Borrow from the process-wide pool keyed by DSN and credentials
+            self.pool = get_pool(self.connection_string)
+            self.connection: pyodbc.Connection = self.pool.acquire()
+        else:
+            self.connection: pyodbc.Connection = pyodbc.connect(self.connection_string)
+        try:
+            self.db_name: str = self.connection.getinfo(pyodbc.SQL_DATABASE_NAME)
+            self.db_type: str = self.connection.getinfo(pyodbc.SQL_DBMS_NAME).lower()
+            self.schema: str = (
+                self.connection.getinfo(pyodbc.SQL_SCHEMA_NAME)
+                if self.schema is None
+                else self.schema
+            )
+        except BaseException as e:
+            # __exit__ does not run when __enter__ raises
+            self.__exit__(type(e), e, e.__traceback__)
+            raise
 
     def schemas(self):
         sql: str = (
@@ -119,5 +138,227 @@ class dbConnection:
                 "foreignKeys": fk_info,
             }
 
+    def fields_bulk(self, objects: Optional[List[Tuple[str, str]]] = None):
+        """
+        Fetch the columns of every table and view in the database with a
+        single catalog query instead of one ``SELECT * ... WHERE 1=0`` per table.
+
+        Args:
+            objects (Optional[List[Tuple[str, str]]], optional): Only these (schema, name) objects. Defaults to None (all).
+
+        Returns:
+            list: Rows of (schema, table, column, type name, is assembly type, nullable),
+                ordered by schema, table and column position.
+        """
+        sql: str = """
+            SELECT s.name, o.name, c.name,
+                CASE WHEN t.is_user_defined = 0 THEN t.name
+                    ELSE TYPE_NAME(c.system_type_id) END,
+                t.is_assembly_type, c.is_nullable
+            FROM sys.columns c
+            JOIN sys.objects o ON o.object_id = c.object_id
+            JOIN sys.schemas s ON s.schema_id = o.schema_id
+            JOIN sys.types t ON t.user_type_id = c.user_type_id
+            WHERE o.type IN ('U', 'V') {filter}
+            ORDER BY s.name, o.name, c.column_id;
+        """
+        return self._fetch_for_objects(sql, objects, [("s.name", "o.name")])
+
+    def pk_bulk(self, objects: Optional[List[Tuple[str, str]]] = None):
+        """
+        Fetch the primary key columns of every table in the database.
+
+        Args:
+            objects (Optional[List[Tuple[str, str]]], optional): Only these (schema, name) tables. Defaults to None (all).
+
+        Returns:
+            list: Rows of (schema, table, column, constraint name, key ordinal).
+        """
+        sql: str = """
+            SELECT s.name, o.name, c.name, kc.name, ic.key_ordinal
+            FROM sys.key_constraints kc
+            JOIN sys.objects o ON o.object_id = kc.parent_object_id
+            JOIN sys.schemas s ON s.schema_id = o.schema_id
+            JOIN sys.index_columns ic
+                ON ic.object_id = kc.parent_object_id AND ic.index_id = kc.unique_index_id
+            JOIN sys.columns c
+                ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+            WHERE kc.type = 'PK' {filter}
+            ORDER BY s.name, o.name, ic.key_ordinal;
+        """
+        return self._fetch_for_objects(sql, objects, [("s.name", "o.name")])
+
+    def fk_bulk(self, objects: Optional[List[Tuple[str, str]]] = None):
+        """
+        Fetch every foreign key column pair in the database.
+
+        Rows are ordered like ``SQLForeignKeys`` results grouped by the
+        referenced table (referencing schema, table, then key sequence).
+
+        Args:
+            objects (Optional[List[Tuple[str, str]]], optional): Only foreign keys from or to
+                these (schema, name) tables. Defaults to None (all).
+
+        Returns:
+            list: Rows of (referenced schema, referenced table, referenced column,
+                referencing schema, referencing table, referencing column,
+                constraint name, key sequence).
+        """
+        sql: str = """
+            SELECT ps.name, po.name, pc.name, fs.name, fo.name, fc.name,
+                fk.name, fkc.constraint_column_id
+            FROM sys.foreign_key_columns fkc
+            JOIN sys.foreign_keys fk ON fk.object_id = fkc.constraint_object_id
+            JOIN sys.objects fo ON fo.object_id = fkc.parent_object_id
+            JOIN sys.schemas fs ON fs.schema_id = fo.schema_id
+            JOIN sys.columns fc
+                ON fc.object_id = fkc.parent_object_id AND fc.column_id = fkc.parent_column_id
+            JOIN sys.objects po ON po.object_id = fkc.referenced_object_id
+            JOIN sys.schemas ps ON ps.schema_id = po.schema_id
+            JOIN sys.columns pc
+                ON pc.object_id = fkc.referenced_object_id
+                AND pc.column_id = fkc.referenced_column_id
+            WHERE 1=1 {filter}
+            ORDER BY ps.name, po.name, fs.name, fo.name,
+                fkc.constraint_column_id, fk.name;
+        """
+        return self._fetch_for_objects(
+            sql, objects, [("ps.name", "po.name"), ("fs.name", "fo.name")]
+        )
+
+    def object_stamps(self):
+        """
+        Fetch the last modification time of every table and view.
+
+        Returns:
+            list: Rows of (schema, name, object type, modify date).
+        """
+        sql: str = """
+            SELECT s.name, o.name, o.type, o.modify_date
+            FROM sys.objects o
+            JOIN sys.schemas s ON s.schema_id = o.schema_id
+            WHERE o.type IN ('U', 'V')
+            ORDER BY s.name, o.name;
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchall()
+
+    def _fetch_for_objects(
+        self,
+        sql: str,
+        objects: Optional[List[Tuple[str, str]]],
+        columns: List[Tuple[str, str]],
+        chunk_size: int = 500,
+    ) -> list:
+        """
+        Run a catalog query, optionally restricted to (schema, name) objects.
+
+        The ``{filter}`` placeholder in ``sql`` receives one ``EXISTS`` over a
+        ``VALUES`` list per (schema column, name column) pair, OR-ed together.
+        Objects are sent in chunks to stay under the 2100 parameter limit.
+        """
+        if objects is None:
+            with self.connection.cursor() as cursor:
+                cursor.execute(sql.format(filter=""))
+                return cursor.fetchall()
+        rows: list = []
+        for start in range(0, len(objects), chunk_size):
+            chunk = objects[start : start + chunk_size]
+            values = ", ".join(["(?, ?)"] * len(chunk))
+            conditions = [
+                f"EXISTS (SELECT 1 FROM (VALUES {values}) v(s, o) "
+                f"WHERE v.s = {schema_column} AND v.o = {name_column})"
+                for schema_column, name_column in columns
+            ]
+            params = [value for _ in columns for obj in chunk for value in obj]
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    sql.format(filter="AND (" + " OR ".join(conditions) + ")"), params
+                )
+                rows.extend(cursor.fetchall())
+        return rows
+
+    def row_counts(self):
+        """
+        Fetch the approximate row count of every table from sys.partitions
+        (no table is read).
+
+        Returns:
+            list: Rows of (schema, table, row count).
+        """
+        sql: str = """
+            SELECT s.name, o.name, SUM(p.rows)
+            FROM sys.partitions p
+            JOIN sys.objects o ON o.object_id = p.object_id
+            JOIN sys.schemas s ON s.schema_id = o.schema_id
+            WHERE o.type = 'U' AND p.index_id IN (0, 1)
+            GROUP BY s.name, o.name;
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchall()
+
+    def sample_values(
+        self,
+        table_name: str,
+        columns: List[str],
+        rows: int,
+        schema_name: Optional[str] = None,
+        percent: Optional[float] = None,
+    ):
+        """
+        Read at most ``rows`` rows of some columns, optionally from a
+        ``TABLESAMPLE`` of the table's pages instead of its first rows.
+
+        Args:
+            table_name (str): Table name
+            columns (List[str]): Column names
+            rows (int): Maximum number of rows
+            schema_name (Optional[str], optional): Schema name. Defaults to the connection schema.
+            percent (Optional[float], optional): TABLESAMPLE percentage. Defaults to None (no sampling).
+
+        Returns:
+            list: Rows with one value per requested column.
+        """
+        if schema_name is None:
+            schema_name = self.schema
+        column_list = ", ".join(quote_name(column) for column in columns)
+        sample = f" TABLESAMPLE SYSTEM ({float(percent)} PERCENT)" if percent else ""
+        sql: str = (
+            f"SELECT TOP ({int(rows)}) {column_list} "
+            f"FROM {quote_name(schema_name)}.{quote_name(table_name)}{sample}"
+        )
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchall()
+
+    def catalog_stamp(self) -> str:
+        """
+        Cheap fingerprint of the catalog: changes whenever a schema, table, view,
+        primary key or foreign key is created, altered or dropped.
+
+        Returns:
+            str: Opaque stamp to compare with a previous one.
+        """
+        sql: str = """
+            SELECT MAX(o.modify_date), COUNT(*),
+                CHECKSUM_AGG(CHECKSUM(o.object_id, o.schema_id, o.name, o.modify_date)),
+                (SELECT CHECKSUM_AGG(CHECKSUM(schema_id, name)) FROM sys.schemas)
+            FROM sys.objects o
+            WHERE o.type IN ('U', 'V', 'PK', 'F');
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql)
+            return "|".join(str(value) for value in cursor.fetchone())
+
     def __exit__(self, exc_type, exc_value, traceback):
-        self.connection.close()
+        if self.pool is None:
+            self.connection.close()
+            return
+        discard: bool = (
+            exc_type is not None
+            and issubclass(exc_type, pyodbc.Error)
+            and not self.pool.is_healthy(self.connection)
+        )
+        self.pool.release(self.connection, discard=discard)
@@ -0,0 +1,43 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+ODBC_MAX_WORKERS: int = 8
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_max_workers: int = ODBC_MAX_WORKERS
+
+
+def configure_odbc_executor(max_workers: int = ODBC_MAX_WORKERS) -> None:
+    """Set how many threads run blocking ODBC work for async callers."""
+    global _executor, _max_workers
+    with _executor_lock:
+        _max_workers = max_workers
+        previous, _executor = _executor, None
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+
+def get_odbc_executor() -> ThreadPoolExecutor:
+    """Get the process-wide bounded executor for blocking ODBC work."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_max_workers, thread_name_prefix="sqler-odbc"
+            )
+        return _executor
+
+
+async def run_odbc(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Await a blocking call (pyodbc, introspection) on the bounded ODBC executor,
+    so at most ODBC_MAX_WORKERS threads block on the database at once.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_odbc_executor(), functools.partial(func, *args, **kwargs)
+    )
@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+import pyodbc
+
+POOL_MAX_SIZE: int = 8
+POOL_IDLE_TIMEOUT: float = 300.0
+POOL_CHECKOUT_TIMEOUT: float = 30.0
+POOL_HEALTH_CHECK_AFTER: float = 30.0
+
+
+class ConnectionPool:
+    """Thread-safe pool of pyodbc connections sharing one connection string."""
+
+    def __init__(
+        self,
+        connection_string: str,
+        max_size: int = POOL_MAX_SIZE,
+        idle_timeout: float = POOL_IDLE_TIMEOUT,
+        checkout_timeout: float = POOL_CHECKOUT_TIMEOUT,
+        health_check_after: float = POOL_HEALTH_CHECK_AFTER,
+    ):
+        """
+        Initialize a ConnectionPool instance.
+
+        Args:
+            connection_string (str): ODBC connection string (DSN and credentials).
+            max_size (int, optional): Maximum number of open connections. Defaults to POOL_MAX_SIZE.
+            idle_timeout (float, optional): Seconds an idle connection is kept before closing. Defaults to POOL_IDLE_TIMEOUT.
+            checkout_timeout (float, optional): Seconds to wait for a free connection. Defaults to POOL_CHECKOUT_TIMEOUT.
+            health_check_after (float, optional): Idle seconds after which a connection is pinged on checkout. Defaults to POOL_HEALTH_CHECK_AFTER.
+        """
+        self.connection_string: str = connection_string
+        self.max_size: int = max_size
+        self.idle_timeout: float = idle_timeout
+        self.checkout_timeout: float = checkout_timeout
+        self.health_check_after: float = health_check_after
+        self._idle: List[Tuple[pyodbc.Connection, float]] = []  # (connection, released at)
+        self._size: int = 0  # idle + checked out
+        self._pid: int = os.getpid()
+        self._closed: bool = False
+        self._cond = threading.Condition(threading.Lock())
+
+    def acquire(self) -> pyodbc.Connection:
+        """
+        Check a connection out of the pool, opening a new one if none is idle.
+
+        Raises:
+            TimeoutError: If the pool stays exhausted for checkout_timeout seconds.
+
+        Returns:
+            pyodbc.Connection: A healthy connection.
+        """
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            expired: List[pyodbc.Connection] = []
+            try:
+                with self._cond:
+                    self._check_fork()
+                    expired = self._pop_expired()
+                    if self._idle:
+                        connection, released_at = self._idle.pop()
+                    elif self._size < self.max_size:
+                        connection, released_at = None, 0.0
+                        self._size += 1
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError(
+                                f"No connection available within {self.checkout_timeout}s"
+                            )
+                        self._cond.wait(remaining)
+                        continue
+            finally:
+                # Closing waits on the network, so not under the lock
+                for stale in expired:
+                    self._close_quietly(stale)
+
+            if connection is None:
+                try:
+                    return pyodbc.connect(self.connection_string)
+                except Exception:
+                    self._forget()
+                    raise
+            if time.monotonic() - released_at < self.health_check_after:
+                return connection
+            if self.is_healthy(connection):
+                return connection
+            self._discard(connection)
+
+    def release(self, connection: pyodbc.Connection, discard: bool = False) -> None:
+        """
+        Return a connection to the pool.
+
+        Args:
+            connection (pyodbc.Connection): Connection obtained from acquire().
+            discard (bool, optional): Close it instead of keeping it. Defaults to False.
+        """
+        if not discard:
+            try:
+                connection.rollback()
+            except pyodbc.Error:
+                discard = True
+        if discard:
+            self._discard(connection)
+            return
+        with self._cond:
+            if os.getpid() != self._pid:
+                return
+            if not self._closed:
+                self._idle.append((connection, time.monotonic()))
+                self._cond.notify()
+                return
+            self._size -= 1
+            self._cond.notify()
+        self._close_quietly(connection)
+
+    @contextmanager
+    def connection(self) -> Iterator[pyodbc.Connection]:
+        """Borrow a connection for the duration of a with block."""
+        connection = self.acquire()
+        try:
+            yield connection
+        except pyodbc.Error:
+            self.release(connection, discard=not self.is_healthy(connection))
+            raise
+        except BaseException:
+            self.release(connection)
+            raise
+        else:
+            self.release(connection)
+
+    def close(self) -> None:
+        """Close every idle connection. Checked out connections close on release."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for connection, _ in idle:
+            self._close_quietly(connection)
+
+    def available(self) -> int:
+        """Number of connections that can be checked out right now without waiting."""
+        with self._cond:
+            return self.max_size - self._size + len(self._idle)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+            }
+
+    def is_healthy(self, connection: pyodbc.Connection) -> bool:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            return True
+        except pyodbc.Error:
+            return False
+
+    def _discard(self, connection: pyodbc.Connection) -> None:
+        self._close_quietly(connection)
+        self._forget()
+
+    def _forget(self) -> None:
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _pop_expired(self) -> List[pyodbc.Connection]:
+        # Called with the lock held; the oldest connections sit at the front.
+        now = time.monotonic()
+        expired: List[pyodbc.Connection] = []
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            connection, _ = self._idle.pop(0)
+            self._size -= 1
+            expired.append(connection)
+        return expired
+
+    def _check_fork(self) -> None:
+        # Called with the lock held. Connections inherited from a parent
+        # process must not be used (or closed) by a forked worker.
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._idle = []
+            self._size = 0
+
+    @staticmethod
+    def _close_quietly(connection: pyodbc.Connection) -> None:
+        try:
+            connection.close()
+        except pyodbc.Error:
+            pass
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+_pool_settings: dict = {}
+
+
+def configure_pools(**settings) -> None:
+    """
+    Set the ConnectionPool keyword arguments used for pools created from now on,
+    e.g. configure_pools(max_size=16, idle_timeout=60).
+    """
+    with _pools_lock:
+        _pool_settings.update(settings)
+
+
+def get_pool(connection_string: str) -> ConnectionPool:
+    """
+    Get the process-wide pool for a connection string, creating it on first use.
+
+    Args:
+        connection_string (str): ODBC connection string (DSN and credentials).
+
+    Returns:
+        ConnectionPool: The shared pool.
+    """
+    with _pools_lock:
+        pool: Optional[ConnectionPool] = _pools.get(connection_string)
+        if pool is None:
+            pool = ConnectionPool(connection_string, **_pool_settings)
+            _pools[connection_string] = pool
+        return pool
+
+
+def close_pools() -> None:
+    """Close the idle connections of every pool and forget the pools."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
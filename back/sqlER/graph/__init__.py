@@ -0,0 +1,4 @@
+from .paths import *
+from .components import *
+from .pack import *
+from .layout import *
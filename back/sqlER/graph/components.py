@@ -0,0 +1,37 @@
+from typing import Dict, Iterable, List, Tuple
+
+
+def connected_components(
+    nodes: Iterable[str], edges: Iterable[Tuple[str, str]]
+) -> List[List[str]]:
+    """
+    Split an undirected graph into connected components (union-find).
+
+    Edges with an endpoint outside nodes are ignored.
+
+    Args:
+        nodes (Iterable[str]): Node names.
+        edges (Iterable[Tuple[str, str]]): Node pairs.
+
+    Returns:
+        List[List[str]]: Components in order of their first node, each keeping node order.
+    """
+    parent: Dict[str, str] = {node: node for node in nodes}
+
+    def find(node: str) -> str:
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    for a, b in edges:
+        if a in parent and b in parent:
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[root_b] = root_a
+    components: Dict[str, List[str]] = {}
+    for node in parent:
+        components.setdefault(find(node), []).append(node)
+    return list(components.values())
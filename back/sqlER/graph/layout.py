@@ -0,0 +1,77 @@
+import asyncio
+import subprocess
+from typing import Optional
+
+
+class LayoutError(RuntimeError):
+    """Graphviz exited with an error."""
+
+
+def run_layout(
+    source: str, format: str = "svg", engine: str = "dot", timeout: Optional[float] = None
+) -> bytes:
+    """
+    Lay out DOT source with a graphviz command.
+
+    Args:
+        source (str): DOT source.
+        format (str, optional): Output format. Defaults to "svg".
+        engine (str, optional): Graphviz layout command. Defaults to "dot".
+        timeout (Optional[float], optional): Seconds before the process is killed. Defaults to None.
+
+    Raises:
+        subprocess.TimeoutExpired: If the layout ran out of time.
+        LayoutError: If graphviz failed.
+
+    Returns:
+        bytes: Rendered output
+    """
+    completed = subprocess.run(
+        [engine, f"-T{format}"],
+        input=source.encode("utf-8"),
+        capture_output=True,
+        timeout=timeout,
+    )
+    if completed.returncode != 0:
+        raise LayoutError(_error_message(engine, completed.returncode, completed.stderr))
+    return completed.stdout
+
+
+async def arun_layout(
+    source: str, format: str = "svg", engine: str = "dot", timeout: Optional[float] = None
+) -> bytes:
+    """
+    Async run_layout(): graphviz runs as an asyncio subprocess, so the event
+    loop keeps serving other requests meanwhile. The process is killed if
+    the awaiting task is cancelled (e.g. the client went away) or times out.
+
+    Raises:
+        asyncio.TimeoutError: If the layout ran out of time.
+        LayoutError: If graphviz failed.
+    """
+    process = await asyncio.create_subprocess_exec(
+        engine,
+        f"-T{format}",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            process.communicate(source.encode("utf-8")), timeout
+        )
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    if process.returncode != 0:
+        raise LayoutError(_error_message(engine, process.returncode, stderr))
+    return stdout
+
+
+def _error_message(engine: str, returncode: int, stderr: bytes) -> str:
+    return (
+        stderr.decode("utf-8", "replace").strip()
+        or f"{engine} exited with status {returncode}"
+    )
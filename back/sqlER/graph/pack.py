@@ -0,0 +1,77 @@
+import math
+import re
+from typing import List, Tuple
+
+PACK_MARGIN: float = 16.0  # points between packed drawings
+
+_SIZE_PATTERN = re.compile(rb'<svg\b[^>]*?\bwidth="([\d.]+)pt"[^>]*?\bheight="([\d.]+)pt"')
+_VIEWBOX_PATTERN = re.compile(rb'<svg\b[^>]*?\bviewBox="[\d.\-]+ [\d.\-]+ ([\d.]+) ([\d.]+)"')
+_SIZE_ATTRIBUTES = re.compile(rb'\s(?:width|height)="[^"]*"')
+_ID_PATTERN = re.compile(rb'\bid="([^"]+)"')
+_ID_REFERENCE = re.compile(rb'(\bid="|url\(#|href="#)([^")]+)')
+
+
+def svg_size(svg: bytes) -> Tuple[float, float]:
+    """Width and height in points of an SVG produced by graphviz."""
+    match = _SIZE_PATTERN.search(svg) or _VIEWBOX_PATTERN.search(svg)
+    if match is None:
+        return 0.0, 0.0
+    return float(match.group(1)), float(match.group(2))
+
+
+def pack_svgs(svgs: List[bytes], margin: float = PACK_MARGIN) -> bytes:
+    """
+    Pack separately laid out SVG drawings into one SVG, like gvpack does for
+    graphs: drawings are placed on rows, tallest first, in a roughly square
+    area. Each drawing is kept as a nested <svg> element, so nothing is laid
+    out again.
+
+    Args:
+        svgs (List[bytes]): SVG documents.
+        margin (float, optional): Points between drawings. Defaults to PACK_MARGIN.
+
+    Returns:
+        bytes: One SVG document.
+    """
+    sizes = [svg_size(svg) for svg in svgs]
+    area = sum((w + margin) * (h + margin) for w, h in sizes)
+    row_width = max([math.sqrt(area)] + [w for w, _ in sizes])
+    order = sorted(range(len(svgs)), key=lambda i: -sizes[i][1])
+
+    placed: List[bytes] = []
+    x = y = row_height = width = 0.0
+    for i in order:
+        w, h = sizes[i]
+        if x > 0 and x + w > row_width:
+            x, y, row_height = 0.0, y + row_height + margin, 0.0
+        placed.append(_nest(svgs[i], x, y, w, h, f"c{i}_".encode()))
+        width = max(width, x + w)
+        row_height = max(row_height, h)
+        x += w + margin
+    height = y + row_height
+    header = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+        f'<svg width="{width:.0f}pt" height="{height:.0f}pt" '
+        f'viewBox="0.00 0.00 {width:.2f} {height:.2f}" '
+        'xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">\n'
+    )
+    return header.encode() + b"\n".join(placed) + b"\n</svg>\n"
+
+
+def _nest(svg: bytes, x: float, y: float, w: float, h: float, prefix: bytes) -> bytes:
+    # The outer viewBox makes one user unit one point, so the nested size is
+    # given in user units (graphviz's "pt" would scale it by 4/3), and ids are
+    # prefixed to stay unique across the packed drawings.
+    body = svg[svg.find(b"<svg") :]
+    end = body.find(b">")
+    tag = _SIZE_ATTRIBUTES.sub(b"", body[:end]).replace(
+        b"<svg", f'<svg x="{x:.2f}" y="{y:.2f}" width="{w:.2f}" height="{h:.2f}"'.encode(), 1
+    )
+    body = tag + body[end:]
+    ids = set(_ID_PATTERN.findall(body))
+    if not ids:
+        return body
+    return _ID_REFERENCE.sub(
+        lambda m: m.group(1) + prefix + m.group(2) if m.group(2) in ids else m.group(0),
+        body,
+    )
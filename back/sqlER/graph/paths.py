@@ -0,0 +1,102 @@
+import heapq
+from itertools import count
+from typing import Dict, List, Optional, Set, Tuple
+
+# (neighbour, edge id, cost)
+Adjacency = Dict[str, List[Tuple[str, int, float]]]
+# ((edge id, from node, to node), ...)
+Path = Tuple[Tuple[int, str, str], ...]
+
+
+def shortest_path(
+    adjacency: Adjacency,
+    source: str,
+    target: str,
+    banned_edges: Optional[Set[int]] = None,
+    banned_nodes: Optional[Set[str]] = None,
+) -> Optional[Tuple[float, Path]]:
+    """
+    Dijkstra's shortest path between two nodes.
+
+    Args:
+        adjacency (Adjacency): node -> [(neighbour, edge id, cost)].
+        source (str): Start node.
+        target (str): End node.
+        banned_edges (Optional[Set[int]], optional): Edge ids not to use. Defaults to None.
+        banned_nodes (Optional[Set[str]], optional): Nodes not to visit. Defaults to None.
+
+    Returns:
+        Optional[Tuple[float, Path]]: (cost, steps), or None if the target is unreachable.
+    """
+    banned_edges = banned_edges or set()
+    banned_nodes = banned_nodes or set()
+    tie = count()
+    queue: List[Tuple[float, int, str, Path]] = [(0.0, next(tie), source, ())]
+    done: Set[str] = set()
+    while queue:
+        cost, _, node, path = heapq.heappop(queue)
+        if node == target:
+            return cost, path
+        if node in done:
+            continue
+        done.add(node)
+        for neighbour, edge, edge_cost in adjacency.get(node, ()):
+            if neighbour in done or neighbour in banned_nodes or edge in banned_edges:
+                continue
+            heapq.heappush(
+                queue,
+                (cost + edge_cost, next(tie), neighbour, path + ((edge, node, neighbour),)),
+            )
+    return None
+
+
+def k_shortest_paths(
+    adjacency: Adjacency, source: str, target: str, k: int = 1
+) -> List[Tuple[float, Path]]:
+    """
+    Yen's k shortest loopless paths, cheapest first. Parallel edges between
+    the same nodes give distinct paths.
+
+    Args:
+        adjacency (Adjacency): node -> [(neighbour, edge id, cost)].
+        source (str): Start node.
+        target (str): End node.
+        k (int, optional): Maximum number of paths. Defaults to 1.
+
+    Returns:
+        List[Tuple[float, Path]]: Up to k (cost, steps) pairs.
+    """
+    first = shortest_path(adjacency, source, target)
+    if first is None or k < 1:
+        return []
+    costs = {
+        edge: edge_cost
+        for neighbours in adjacency.values()
+        for _, edge, edge_cost in neighbours
+    }
+    found: List[Tuple[float, Path]] = [first]
+    seen: Set[Path] = {first[1]}
+    tie = count()
+    candidates: List[Tuple[float, int, Path]] = []
+    while len(found) < k:
+        _, previous = found[-1]
+        for i in range(len(previous)):
+            spur_node = previous[i][1]
+            root = previous[:i]
+            banned_edges = {path[i][0] for _, path in found if path[:i] == root}
+            banned_nodes = {step[1] for step in root}
+            spur = shortest_path(
+                adjacency, spur_node, target, banned_edges, banned_nodes
+            )
+            if spur is None:
+                continue
+            path = root + spur[1]
+            if path not in seen:
+                seen.add(path)
+                cost = sum(costs[step[0]] for step in path)
+                heapq.heappush(candidates, (cost, next(tie), path))
+        if not candidates:
+            break
+        cost, _, path = heapq.heappop(candidates)
+        found.append((cost, path))
+    return found
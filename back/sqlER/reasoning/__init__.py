@@ -0,0 +1,3 @@
+from .similarity import *
+from .inference import *
+from .discovery import *
@@ -0,0 +1,457 @@
+import hashlib
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+from .inference import type_family
+from .similarity import NameSimilarityIndex
+
+# (from table, from field, to table, to field, label, reasoning, confidence)
+DiscoveredRelation = Tuple[str, str, str, str, str, bool, float]
+
+# Type families whose values are compared for containment
+DISCOVERY_FAMILIES: Tuple[str, ...] = ("number", "string", "guid")
+
+_MASK64: int = (1 << 64) - 1
+
+
+def _hash_pair(value: str) -> Tuple[int, int]:
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+    # The second hash is the stride of the Bloom filter probes, keep it odd
+    return int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+
+
+def normalize_value(value: Any) -> Optional[str]:
+    """
+    Canonical text of a column value, so equal keys stored with different
+    types (int vs decimal, padded char vs varchar) compare equal. Strings
+    are casefolded like the default case-insensitive collations.
+
+    Returns:
+        Optional[str]: Normalized value, None for NULL.
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, (float, Decimal)):
+        if value != value:  # NaN
+            return None
+        if value == int(value):
+            return str(int(value))
+        return format(Decimal(str(value)).normalize(), "f")
+    if isinstance(value, str):
+        return value.rstrip(" ").casefold()
+    if isinstance(value, UUID):
+        return str(value).lower()
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).hex()
+    return str(value)
+
+
+class BloomFilter:
+    """Fixed-size set membership sketch with no false negatives."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        Initialize a BloomFilter instance.
+
+        Args:
+            capacity (int): Expected number of values.
+            error_rate (float, optional): Target false positive rate at capacity. Defaults to 0.01.
+        """
+        capacity = max(1, capacity)
+        self.size: int = max(
+            64, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        )
+        self.hash_count: int = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count: int = 0
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+    def false_positive_rate(self) -> float:
+        """Expected false positive rate for the values added so far."""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+    def _positions(self, value: str) -> List[int]:
+        h1, h2 = _hash_pair(value)
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+
+class HyperLogLog:
+    """Distinct count sketch using 2**precision one-byte registers."""
+
+    def __init__(self, precision: int = 12):
+        self.precision: int = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        h, _ = _hash_pair(value)
+        rest_bits = 64 - self.precision
+        index = h >> rest_bits
+        rest = h & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def cardinality(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return estimate
+
+
+class ColumnSketch:
+    """Sketches of the sampled values of one primary key column."""
+
+    def __init__(
+        self,
+        table: str,
+        field: str,
+        family: str,
+        values: List[str],
+        numbers: List[float],
+        row_count: Optional[int],
+        error_rate: float = 0.01,
+    ):
+        self.table: str = table
+        self.field: str = field
+        self.family: str = family
+        self.bloom = BloomFilter(len(values), error_rate)
+        self.hll = HyperLogLog()
+        for value in values:
+            self.bloom.add(value)
+            self.hll.add(value)
+        self.minimum: Optional[float] = min(numbers) if numbers else None
+        self.maximum: Optional[float] = max(numbers) if numbers else None
+        # Share of the key values that made it into the sketch
+        self.coverage: float = (
+            min(1.0, len(values) / row_count) if row_count else 1.0
+        )
+
+    def estimated_cardinality(self) -> float:
+        return self.hll.cardinality() / self.coverage if self.coverage else 0.0
+
+
+class _Budget:
+    """Wall-clock and bytes-read allowance shared by the worker threads."""
+
+    def __init__(self, seconds: float, bytes_read: int):
+        self.deadline: float = time.monotonic() + seconds
+        self.bytes_left: int = bytes_read
+        self._lock = threading.Lock()
+
+    def exhausted(self) -> bool:
+        with self._lock:
+            return self.bytes_left <= 0 or time.monotonic() >= self.deadline
+
+    def charge(self, rows: List[Any]) -> None:
+        size = 0
+        for row in rows:
+            for value in row:
+                if isinstance(value, (str, bytes, bytearray)):
+                    size += len(value)
+                elif value is not None:
+                    size += 8 if not isinstance(value, UUID) else 16
+        with self._lock:
+            self.bytes_left -= size
+
+
+class InclusionDependencyDiscovery:
+    """
+    Finds undeclared foreign keys from the data instead of the names.
+
+    Single-column primary keys are read (sampled past pk_rows rows) into
+    Bloom filter and HyperLogLog sketches, then candidate columns are
+    sampled with bounded ``TABLESAMPLE`` queries and each sampled value is
+    probed against the sketches of compatible keys. A column whose values
+    are (nearly) all contained in a key is reported as referencing it, so
+    no join or full scan ever runs on the server.
+
+    Queries run concurrently on worker threads and stop being issued once
+    the time or bytes-read budget is spent; queries already running finish,
+    so a budget can be overshot by at most one query per worker.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        time_budget: float = 30.0,
+        bytes_budget: int = 64 * 1024 * 1024,
+        sample_rows: int = 1000,
+        pk_rows: int = 100000,
+        workers: int = 4,
+        min_confidence: float = 0.9,
+        min_distinct: int = 10,
+        error_rate: float = 0.01,
+        similarity_index: Optional[NameSimilarityIndex] = None,
+    ):
+        """
+        Initialize an InclusionDependencyDiscovery instance.
+
+        Args:
+            connect (Callable[[], Any]): Returns a new (not yet entered) dbConnection.
+            time_budget (float, optional): Seconds the discovery may take. Defaults to 30.0.
+            bytes_budget (int, optional): Bytes of values it may read. Defaults to 64 MiB.
+            sample_rows (int, optional): Rows sampled per candidate table. Defaults to 1000.
+            pk_rows (int, optional): Rows read per primary key before sampling it. Defaults to 100000.
+            workers (int, optional): Number of concurrent queries. Defaults to 4.
+            min_confidence (float, optional): Lowest confidence reported. Defaults to 0.9.
+            min_distinct (int, optional): Fewest distinct sampled values a column needs. Defaults to 10.
+            error_rate (float, optional): Bloom filter false positive rate. Defaults to 0.01.
+            similarity_index (Optional[NameSimilarityIndex], optional): Breaks ties between keys by name. Defaults to a new one.
+        """
+        self.connect = connect
+        self.time_budget: float = time_budget
+        self.bytes_budget: int = bytes_budget
+        self.sample_rows: int = sample_rows
+        self.pk_rows: int = pk_rows
+        self.workers: int = workers
+        self.min_confidence: float = min_confidence
+        self.min_distinct: int = min_distinct
+        self.error_rate: float = error_rate
+        self.similarity_index: NameSimilarityIndex = (
+            similarity_index if similarity_index is not None else NameSimilarityIndex()
+        )
+
+    def discover(
+        self,
+        tables: Iterable[Any],
+        row_counts: Optional[Dict[Tuple[str, str], int]] = None,
+        exclude: Iterable[Tuple[str, str]] = (),
+        only: Optional[Iterable[str]] = None,
+    ) -> List[DiscoveredRelation]:
+        """
+        Discover foreign keys between tables.
+
+        With ``only``, just the relations from or to those tables are looked
+        for: their columns are matched against every key, and the columns of
+        the other tables against their keys alone.
+
+        Args:
+            tables (Iterable[Any]): Table objects (name, schema, fields, primary_keys, is_view).
+            row_counts (Optional[Dict[Tuple[str, str], int]], optional): (schema, table) -> rows,
+                used to size the samples. Defaults to None (unknown).
+            exclude (Iterable[Tuple[str, str]], optional): (table, field) columns already related.
+            only (Optional[Iterable[str]], optional): Table names to discover relations of. Defaults to None (all).
+
+        Returns:
+            List[DiscoveredRelation]: One relation per referencing column, in table order.
+        """
+        tables = [t for t in tables if not t.is_view]
+        scope: Optional[Set[str]] = None if only is None else set(only)
+        if scope is not None and not any(t.name in scope for t in tables):
+            return []
+        row_counts = row_counts or {}
+        excluded: Set[Tuple[str, str]] = set(exclude)
+        budget = _Budget(self.time_budget, self.bytes_budget)
+
+        key_jobs = []
+        for t in tables:
+            if len(t.primary_keys) != 1:
+                continue
+            field = next((f for f in t.fields if f[0] == t.primary_keys[0]), None)
+            if field is not None and type_family(field[1]) in DISCOVERY_FAMILIES:
+                key_jobs.append((t, field[0], type_family(field[1])))
+        sketches: List[ColumnSketch] = [
+            sketch
+            for sketch in self._run(
+                [
+                    lambda job=job: self._sketch_key(*job, row_counts, budget)
+                    for job in key_jobs
+                ]
+            )
+            if sketch is not None
+        ]
+        scoped_sketches: List[ColumnSketch] = [
+            sketch for sketch in sketches if scope is None or sketch.table in scope
+        ]
+
+        sample_jobs = []
+        for t in tables:
+            sole_pk = t.primary_keys[0] if len(t.primary_keys) == 1 else None
+            families = {
+                sketch.family
+                for sketch in (sketches if scope is None or t.name in scope else scoped_sketches)
+            }
+            columns = [
+                (field[0], type_family(field[1]))
+                for field in t.fields
+                if field[0] != sole_pk
+                and (t.name, field[0]) not in excluded
+                and type_family(field[1]) in families
+            ]
+            if columns:
+                sample_jobs.append((t, columns))
+        samples = self._run(
+            [
+                lambda job=job: self._sample_columns(*job, row_counts, budget)
+                for job in sample_jobs
+            ]
+        )
+
+        relations: List[DiscoveredRelation] = []
+        for (t, columns), values in zip(sample_jobs, samples):
+            if values is None:
+                continue
+            keys = sketches if scope is None or t.name in scope else scoped_sketches
+            for (field_name, family), column_values in zip(columns, values):
+                relation = self._match(
+                    t.name,
+                    field_name,
+                    family,
+                    column_values,
+                    [s for s in keys if s.family == family and s.table != t.name],
+                )
+                if relation is not None:
+                    relations.append(relation)
+        return relations
+
+    def _run(self, jobs: List[Callable[[], Any]]) -> List[Any]:
+        if not jobs:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(jobs)))) as executor:
+            return list(executor.map(lambda job: job(), jobs))
+
+    def _read(
+        self,
+        t: Any,
+        columns: List[str],
+        rows: int,
+        row_counts: Dict[Tuple[str, str], int],
+        budget: _Budget,
+    ) -> Optional[Tuple[List[Any], Optional[int]]]:
+        if budget.exhausted():
+            return None
+        row_count = row_counts.get((t.schema, t.name))
+        percent = None
+        if row_count and row_count > rows:
+            # Ask for twice the rows needed; page sampling returns a variable amount
+            percent = max(0.01, min(100.0, 200.0 * rows / row_count))
+        dbcnxt = self.connect()
+        try:
+            with dbcnxt:
+                result = dbcnxt.sample_values(
+                    t.name, columns, rows, schema_name=t.schema, percent=percent
+                )
+        except Exception:
+            return None
+        budget.charge(result)
+        return result, row_count
+
+    def _sketch_key(
+        self,
+        t: Any,
+        field_name: str,
+        family: str,
+        row_counts: Dict[Tuple[str, str], int],
+        budget: _Budget,
+    ) -> Optional[ColumnSketch]:
+        read = self._read(t, [field_name], self.pk_rows, row_counts, budget)
+        if read is None:
+            return None
+        rows, row_count = read
+        values, numbers = _column_values([row[0] for row in rows], family)
+        if not values:
+            return None
+        return ColumnSketch(
+            t.name, field_name, family, list(values), numbers, row_count, self.error_rate
+        )
+
+    def _sample_columns(
+        self,
+        t: Any,
+        columns: List[Tuple[str, str]],
+        row_counts: Dict[Tuple[str, str], int],
+        budget: _Budget,
+    ) -> Optional[List[Tuple[Set[str], List[float]]]]:
+        read = self._read(
+            t, [name for name, _ in columns], self.sample_rows, row_counts, budget
+        )
+        if read is None:
+            return None
+        rows, _ = read
+        return [
+            _column_values([row[i] for row in rows], family)
+            for i, (_, family) in enumerate(columns)
+        ]
+
+    def _match(
+        self,
+        table: str,
+        field_name: str,
+        family: str,
+        column_values: Tuple[Set[str], List[float]],
+        sketches: List[ColumnSketch],
+    ) -> Optional[DiscoveredRelation]:
+        values, numbers = column_values
+        n = len(values)
+        if n < self.min_distinct or not sketches:
+            return None
+        candidates: List[Tuple[float, ColumnSketch]] = []
+        for sketch in sketches:
+            if numbers and sketch.coverage >= 1.0 and (
+                min(numbers) < sketch.minimum or max(numbers) > sketch.maximum
+            ):
+                continue
+            # A referencing column cannot have more distinct values than the key
+            if n > 1.1 * sketch.estimated_cardinality() + 1:
+                continue
+            fp = sketch.bloom.false_positive_rate()
+            containment = sum(value in sketch.bloom for value in values) / n
+            containment = max(0.0, (containment - fp) / (1 - fp))
+            # Shrink toward 0 for small samples
+            confidence = min(1.0, containment / sketch.coverage) * n / (n + 1)
+            if confidence >= self.min_confidence:
+                candidates.append((confidence, sketch))
+        if not candidates:
+            return None
+        best_confidence = max(confidence for confidence, _ in candidates)
+        tied = [s for confidence, s in candidates if confidence >= best_confidence - 1e-9]
+        chosen = tied[0]
+        if len(tied) > 1:
+            names = [s.table for s in tied]
+            for name in names:
+                self.similarity_index.add(name)
+            chosen = tied[names.index(self.similarity_index.best(field_name, names) or names[0])]
+        return (
+            table,
+            field_name,
+            chosen.table,
+            chosen.field,
+            "FK_" + table + "_" + chosen.table + "_" + field_name,
+            True,
+            round(best_confidence, 4),
+        )
+
+
+def _column_values(raw: List[Any], family: str) -> Tuple[Set[str], List[float]]:
+    values: Set[str] = set()
+    numbers: List[float] = []
+    for value in raw:
+        normalized = normalize_value(value)
+        if normalized is None:
+            continue
+        values.add(normalized)
+        if family == "number":
+            numbers.append(float(value))
+    return values, numbers
@@ -0,0 +1,278 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .similarity import NameSimilarityIndex
+
+# (from table, from field, to table, to field, label, reasoning)
+Relation = Tuple[str, str, str, str, str, bool]
+
+# Type name -> family of types that can be joined together. Covers the Python
+# type names pyodbc reports (what Table.fields holds) and SQL Server names.
+TYPE_FAMILIES: Dict[str, str] = {
+    "int": "number",
+    "float": "number",
+    "decimal": "number",
+    "bigint": "number",
+    "smallint": "number",
+    "tinyint": "number",
+    "numeric": "number",
+    "money": "number",
+    "smallmoney": "number",
+    "real": "number",
+    "bool": "boolean",
+    "bit": "boolean",
+    "str": "string",
+    "char": "string",
+    "varchar": "string",
+    "nchar": "string",
+    "nvarchar": "string",
+    "text": "string",
+    "ntext": "string",
+    "uuid": "guid",
+    "uniqueidentifier": "guid",
+    "datetime": "datetime",
+    "date": "datetime",
+    "time": "datetime",
+    "datetime2": "datetime",
+    "smalldatetime": "datetime",
+    "datetimeoffset": "datetime",
+    "bytearray": "binary",
+    "bytes": "binary",
+    "binary": "binary",
+    "varbinary": "binary",
+}
+
+
+def type_family(type_name: Optional[str]) -> str:
+    """
+    Normalize a column type to its join-compatible family, e.g. "int" and
+    "decimal" -> "number". Unrecognized types get the "unknown" family.
+    """
+    if not type_name:
+        return "unknown"
+    return TYPE_FAMILIES.get(type_name.lower(), "unknown")
+
+
+def reason_field(
+    field_name: str,
+    pk_tables: List[Tuple[str, int]],
+    fk_tables: List[str],
+    similarity_index: NameSimilarityIndex,
+) -> Tuple[List[Tuple[str, int]], List[str]]:
+    """
+    Pick the table a shared field most likely points to.
+
+    Tables having the field in a single-column primary key are preferred,
+    then the table whose name is most similar to the field name.
+
+    Args:
+        field_name (str): Shared field name.
+        pk_tables (List[Tuple[str, int]]): (table, number of PK columns) of tables with the field in their PK.
+        fk_tables (List[str]): Tables having the field outside their PK.
+        similarity_index (NameSimilarityIndex): Index used to compare names.
+
+    Returns:
+        Tuple[List[Tuple[str, int]], List[str]]: The chosen PK table as a one-item
+            list, and the tables that reference it.
+    """
+    # sort the tables by the number of primary keys
+    pk_tables = sorted(pk_tables, key=lambda x: x[1])
+    fk_tables = list(fk_tables)
+    similaritest_table = ""
+    if len(pk_tables) + len(fk_tables) <= 1:
+        return pk_tables, fk_tables
+    if len(pk_tables) == 0:
+        pk_tables = [(fkt, 1) for fkt in fk_tables]
+        fk_tables = []
+    if len(pk_tables) != 1:
+        not_onePKT = []
+        onePKT = []
+        for table, pk_num in pk_tables:
+            if pk_num == 1:
+                similaritest_table = table
+                onePKT.append((table, pk_num))
+            else:
+                not_onePKT.append((table, pk_num))
+        onePKT_num = len(onePKT)
+        for_PKT = onePKT
+        if onePKT_num == 1:
+            for_PKT = [(similaritest_table, 1)]
+        elif onePKT_num < 1:
+            for_PKT = not_onePKT
+        # select the most similar table (calculate table,field_name similarity)
+        most_similar = similarity_index.best(field_name, [table for table, _ in for_PKT])
+        if most_similar is not None:
+            similaritest_table = most_similar
+        for table, _ in pk_tables:
+            if table != similaritest_table:
+                fk_tables.append(table)
+        pk_tables = [(similaritest_table, 1)]
+    return pk_tables, fk_tables
+
+
+class FKInferenceEngine:
+    """
+    Infers foreign keys from field names shared between tables.
+
+    Keeps a single index of field name -> tables having it (in or outside
+    their primary key), so building it is linear in the number of columns.
+    Tables can be added and removed afterwards; only the field groups they
+    touch are inferred again.
+    """
+
+    def __init__(
+        self,
+        reasoning_all_FK: bool = False,
+        similarity_index: Optional[NameSimilarityIndex] = None,
+        prune_types: bool = True,
+    ):
+        """
+        Initialize a FKInferenceEngine instance.
+
+        Args:
+            reasoning_all_FK (bool, optional): Also relate fields no table has in its primary key. Defaults to False.
+            similarity_index (Optional[NameSimilarityIndex], optional): Name index to share. Defaults to a new one.
+            prune_types (bool, optional): Only relate fields of the same type family. Defaults to True.
+        """
+        self.reasoning_all_FK: bool = reasoning_all_FK
+        self.prune_types: bool = prune_types
+        self.similarity_index: NameSimilarityIndex = (
+            similarity_index if similarity_index is not None else NameSimilarityIndex()
+        )
+        self.tables: Dict[str, Tuple[Tuple[str, ...], frozenset]] = {}  # table -> (fields, PK set)
+        # field -> {table: (in PK, type family)}
+        self.field_groups: Dict[str, Dict[str, Tuple[bool, str]]] = {}
+        self._inferred: Dict[str, List[Relation]] = {}
+        self._dirty: Set[str] = set()
+
+    def add_table(
+        self,
+        name: str,
+        fields: Iterable[str],
+        primary_keys: Iterable[str],
+        types: Optional[Iterable[str]] = None,
+    ) -> Set[str]:
+        """
+        Index a table, replacing any table with the same name.
+
+        Args:
+            name (str): Table name.
+            fields (Iterable[str]): Field names in table order.
+            primary_keys (Iterable[str]): Primary key field names.
+            types (Optional[Iterable[str]], optional): Field types, parallel to fields. Defaults to None (unknown).
+
+        Returns:
+            Set[str]: Field names whose inference is affected.
+        """
+        affected = self.remove_table(name)
+        fields = tuple(fields)
+        families = (
+            [type_family(t) for t in types]
+            if types is not None
+            else ["unknown"] * len(fields)
+        )
+        pk_set = frozenset(primary_keys)
+        self.tables[name] = (fields, pk_set)
+        self.similarity_index.add(name)
+        for field_name, family in zip(fields, families):
+            self.field_groups.setdefault(field_name, {})[name] = (
+                field_name in pk_set,
+                family,
+            )
+        affected.update(fields)
+        self._dirty.update(fields)
+        return affected
+
+    def remove_table(self, name: str) -> Set[str]:
+        """
+        Remove a table from the index.
+
+        Args:
+            name (str): Table name.
+
+        Returns:
+            Set[str]: Field names whose inference is affected.
+        """
+        entry = self.tables.pop(name, None)
+        if entry is None:
+            return set()
+        fields, _ = entry
+        for field_name in fields:
+            group = self.field_groups.get(field_name)
+            if group is None:
+                continue
+            group.pop(name, None)
+            if not group:
+                del self.field_groups[field_name]
+                self._inferred.pop(field_name, None)
+        self._dirty.update(fields)
+        return set(fields)
+
+    def infer_field(self, field_name: str) -> List[Relation]:
+        """
+        Infer the relations of one field group. With prune_types, the tables
+        are first split into buckets of the same type family and each bucket
+        is reasoned on its own, so incompatible columns are never compared.
+
+        Returns:
+            List[Relation]: Reasoned relations from referencing tables to the chosen table.
+        """
+        buckets: Dict[str, List[Tuple[str, bool]]] = {}
+        for table, (in_pk, family) in self.field_groups.get(field_name, {}).items():
+            buckets.setdefault(family if self.prune_types else "", []).append(
+                (table, in_pk)
+            )
+        relations: List[Relation] = []
+        for bucket in buckets.values():
+            pk_tables = [
+                (table, len(self.tables[table][1])) for table, in_pk in bucket if in_pk
+            ]
+            fk_tables = [table for table, in_pk in bucket if not in_pk]
+            if not (
+                (len(pk_tables) != 0 and len(fk_tables) != 0)
+                or len(pk_tables) > 1
+                or (
+                    self.reasoning_all_FK
+                    and len(pk_tables) == 0
+                    and len(fk_tables) > 1
+                )
+            ):
+                continue
+            pk_tables, fk_tables = reason_field(
+                field_name, pk_tables, fk_tables, self.similarity_index
+            )
+            pk_table = pk_tables[0][0]
+            relations.extend(
+                (
+                    fk_table,
+                    field_name,
+                    pk_table,
+                    field_name,
+                    "FK_" + fk_table + "_" + pk_table + "_" + field_name,
+                    True,
+                )
+                for fk_table in fk_tables
+            )
+        return relations
+
+    def relations(self, field_names: Optional[Iterable[str]] = None) -> List[Relation]:
+        """
+        Get inferred relations, re-inferring only field groups changed since the last call.
+        Changed field groups outside field_names are left for a later call, so
+        asking for a few fields of a freshly filled engine stays cheap.
+
+        Args:
+            field_names (Optional[Iterable[str]], optional): Only these fields. Defaults to None (all).
+
+        Returns:
+            List[Relation]: Relations ordered by the first appearance of each field.
+        """
+        wanted = None if field_names is None else set(field_names)
+        stale = self._dirty if wanted is None else self._dirty & wanted
+        for field_name in stale:
+            if field_name in self.field_groups:
+                self._inferred[field_name] = self.infer_field(field_name)
+        self._dirty -= stale
+        relations: List[Relation] = []
+        for field_name in self.field_groups:
+            if wanted is None or field_name in wanted:
+                relations.extend(self._inferred.get(field_name, []))
+        return relations
@@ -0,0 +1,143 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+def name_ngrams(name: str, n: int = 3) -> List[str]:
+    """
+    Split a name into overlapping character n-grams.
+
+    The name is lower-cased and padded so that prefixes and suffixes get
+    their own n-grams, e.g. "ID" -> ["  i", " id", "id "].
+    """
+    padded = " " * (n - 1) + name.lower() + " " if n > 1 else name.lower()
+    return [padded[i : i + n] for i in range(len(padded) - n + 1)]
+
+
+class NameSimilarityIndex:
+    """
+    Character n-gram index over table names.
+
+    Each name is stored as an L2-normalized sparse n-gram count vector, so the
+    cosine similarity between a field name and any set of candidate tables is
+    a single sparse matrix-vector product. When no candidate shares an n-gram
+    with the query, a single-character index decides instead.
+    """
+
+    def __init__(
+        self, names: Iterable[str] = (), n: int = 3, fallback_n: Optional[int] = 1
+    ):
+        """
+        Initialize a NameSimilarityIndex instance.
+
+        Args:
+            names (Iterable[str], optional): Names to index. Defaults to ().
+            n (int, optional): n-gram length. Defaults to 3.
+            fallback_n (Optional[int], optional): n-gram length of the index used when
+                every candidate scores 0, or None to disable it. Defaults to 1.
+        """
+        self.n: int = n
+        self.fallback: Optional[NameSimilarityIndex] = (
+            NameSimilarityIndex(n=fallback_n, fallback_n=None)
+            if fallback_n is not None and fallback_n != n
+            else None
+        )
+        self.vocabulary: Dict[str, int] = {}
+        self.rows: Dict[str, int] = {}  # name -> row in the matrix
+        self._indices: List[np.ndarray] = []
+        self._values: List[np.ndarray] = []
+        self._matrix: Optional[csr_matrix] = None
+        for name in names:
+            self.add(name)
+
+    def add(self, name: str) -> None:
+        """Index a name. Adding a known name is a no-op."""
+        if name in self.rows:
+            return
+        if self.fallback is not None:
+            self.fallback.add(name)
+        indices, values = self._vector(name, grow=True)
+        self.rows[name] = len(self._indices)
+        self._indices.append(indices)
+        self._values.append(values)
+        self._matrix = None
+
+    def scores(self, query: str, candidates: Sequence[str]) -> np.ndarray:
+        """
+        Cosine similarity between a query and each candidate name.
+
+        Args:
+            query (str): Field name.
+            candidates (Sequence[str]): Table names, indexed on the fly if unknown.
+
+        Returns:
+            np.ndarray: One score in [0, 1] per candidate, in candidate order.
+        """
+        for name in candidates:
+            self.add(name)
+        matrix = self._get_matrix()
+        indices, values = self._vector(query, grow=False)
+        query_vector = np.zeros(matrix.shape[1])
+        query_vector[indices] = values
+        rows = np.fromiter(
+            (self.rows[name] for name in candidates), dtype=np.int64, count=len(candidates)
+        )
+        return matrix[rows] @ query_vector
+
+    def best(self, query: str, candidates: Sequence[str]) -> Optional[str]:
+        """
+        Most similar candidate to the query.
+
+        Ties go to the candidate listed first. Returns None when no candidate
+        shares an n-gram (or, with the fallback index, a character) with the query.
+        """
+        if len(candidates) == 0:
+            return None
+        scores = self.scores(query, candidates)
+        best = int(np.argmax(scores))  # first maximum
+        if scores[best] <= 0.0:
+            if self.fallback is not None:
+                return self.fallback.best(query, candidates)
+            return None
+        return candidates[best]
+
+    def _vector(self, name: str, grow: bool):
+        counts: Dict[int, int] = {}
+        for gram in name_ngrams(name, self.n):
+            column = self.vocabulary.get(gram)
+            if column is None:
+                if not grow:
+                    continue
+                column = len(self.vocabulary)
+                self.vocabulary[gram] = column
+            counts[column] = counts.get(column, 0) + 1
+        # Norm over every n-gram of the name, known to the vocabulary or not
+        total = np.sqrt(
+            sum(c * c for c in _gram_counts(name, self.n).values())
+        ) or 1.0
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        return indices, values / total
+
+    def _get_matrix(self) -> csr_matrix:
+        if self._matrix is None or self._matrix.shape[1] != len(self.vocabulary):
+            indptr = np.zeros(len(self._indices) + 1, dtype=np.int64)
+            np.cumsum([len(i) for i in self._indices], out=indptr[1:])
+            self._matrix = csr_matrix(
+                (
+                    np.concatenate(self._values) if self._values else np.zeros(0),
+                    np.concatenate(self._indices)
+                    if self._indices
+                    else np.zeros(0, dtype=np.int64),
+                    indptr,
+                ),
+                shape=(len(self._indices), max(len(self.vocabulary), 1)),
+            )
+        return self._matrix
+
+
+def _gram_counts(name: str, n: int) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for gram in name_ngrams(name, n):
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
@@ -0,0 +1,300 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Set
+
+from ..cache import SingleFlight, content_key
+from ..ERDiagram import ERGenerator
+
+REGISTRY_MAX_ENTRIES: int = 32
+REGISTRY_TTL: float = 600
+# Seconds between two change checks of the background refresher
+REFRESH_INTERVAL: float = 60
+
+logger = logging.getLogger(__name__)
+
+
+class RegistryEntry(NamedTuple):
+    generator: ERGenerator
+    built: float  # time.monotonic() of the introspection
+    arguments: dict  # ERGenerator keyword arguments
+    stamp: Optional[str]  # Catalog stamp introspected at, if known
+
+
+class SchemaRegistry:
+    """
+    Process-wide registry of introspected databases, so every endpoint of
+    a page reuses one ERGenerator (and its ERDiagram) per database instead
+    of introspecting it again.
+
+    Entries are keyed by all ERGenerator arguments (connection parameters,
+    FK reasoning flags, introspection options). They expire ttl seconds
+    after being built, and the least recently used are evicted beyond
+    max_entries. Rebuilt generators replace the old one whole, so requests
+    still holding it are not affected. Concurrent requests for a missing
+    database share one introspection.
+
+    While the background SchemaRefresher runs, expired entries are still
+    served (stale-while-revalidate) and rebuilt by the refresher instead.
+    """
+
+    def __init__(
+        self, max_entries: int = REGISTRY_MAX_ENTRIES, ttl: Optional[float] = REGISTRY_TTL
+    ):
+        """
+        Initialize a SchemaRegistry instance.
+
+        Args:
+            max_entries (int, optional): Databases kept. Defaults to REGISTRY_MAX_ENTRIES.
+            ttl (Optional[float], optional): Seconds an introspection is served. Defaults to
+                REGISTRY_TTL; None keeps entries until evicted or refreshed.
+        """
+        self.max_entries: int = max_entries
+        self.ttl: Optional[float] = ttl
+        self._entries: "OrderedDict[str, RegistryEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    @staticmethod
+    def key(**kwargs) -> str:
+        """Registry key of the ERGenerator arguments."""
+        return content_key(kwargs)
+
+    def get(self, **kwargs) -> ERGenerator:
+        """
+        Get the registered generator of these ERGenerator arguments,
+        introspecting the database if it is missing or expired.
+        """
+        key = self.key(**kwargs)
+        generator = self._lookup(key)
+        if generator is None:
+            generator = self._flights.do(key, self._build, key, kwargs)
+        return generator
+
+    async def aget(self, **kwargs) -> ERGenerator:
+        """Async get(): introspection runs on the bounded ODBC executor."""
+        key = self.key(**kwargs)
+        generator = self._lookup(key)
+        if generator is None:
+            generator = await self._flights.ado(key, self._abuild, key, kwargs)
+        return generator
+
+    def refresh(self, **kwargs) -> ERGenerator:
+        """Introspect the database again and register the new generator."""
+        key = self.key(**kwargs)
+        # Not coalesced with get(), which may have started before the change
+        return self._flights.do(("refresh", key), self._build, key, kwargs)
+
+    async def arefresh(self, **kwargs) -> ERGenerator:
+        """Async refresh(), run on the bounded ODBC executor."""
+        key = self.key(**kwargs)
+        return await self._flights.ado(("refresh", key), self._abuild, key, kwargs)
+
+    def invalidate(self, **kwargs) -> bool:
+        """Forget the generator of these ERGenerator arguments. Returns whether it was registered."""
+        with self._lock:
+            return self._entries.pop(self.key(**kwargs), None) is not None
+
+    def invalidate_database(self, server: Optional[str], database: Optional[str]) -> int:
+        """
+        Forget every generator of one database, whatever its flags.
+
+        Returns:
+            int: Number of generators forgotten.
+        """
+        with self._lock:
+            keys = [
+                key
+                for key, entry in self._entries.items()
+                if entry.arguments.get("server") == server
+                and entry.arguments.get("database") == database
+            ]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """Forget all registered generators."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Number of registered databases and the limits."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+            }
+
+    def _build(self, key: str, arguments: dict) -> ERGenerator:
+        generator = ERGenerator(**arguments)
+        self._store(key, generator, arguments)
+        return generator
+
+    async def _abuild(self, key: str, arguments: dict) -> ERGenerator:
+        generator = await ERGenerator.acreate(**arguments)
+        self._store(key, generator, arguments)
+        return generator
+
+    def revalidate(self, key: str) -> Optional[dict]:
+        """
+        Rebuild one entry if it expired or its database catalog changed since
+        it was introspected (one cheap stamp query), swapping the new
+        generator in. Used by the SchemaRefresher.
+
+        Returns:
+            Optional[dict]: The ERGenerator arguments if rebuilt, else None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stamp = entry.generator.catalog_stamp()
+        expired = self.ttl is not None and time.monotonic() - entry.built > self.ttl
+        if not expired and stamp == entry.stamp:
+            return None
+        if not expired and entry.stamp is None:
+            # Introspected without a stamp: changes are detected from now on
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._entries[key] = entry._replace(stamp=stamp)
+            return None
+        self._flights.do(("refresh", key), self._build, key, entry.arguments)
+        return entry.arguments
+
+    def keys(self) -> List[str]:
+        """Keys of the registered generators, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    def _lookup(self, key: str) -> Optional[ERGenerator]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl is not None and time.monotonic() - entry.built > self.ttl:
+                if not (self is _registry and _request_revalidation(key)):
+                    del self._entries[key]
+                    return None
+            self._entries.move_to_end(key)
+            return entry.generator
+
+    def _store(self, key: str, generator: ERGenerator, arguments: dict) -> None:
+        with self._lock:
+            self._entries[key] = RegistryEntry(
+                generator, time.monotonic(), arguments, generator.stamp
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_registry: Optional[SchemaRegistry] = None
+_registry_lock = threading.Lock()
+_registry_settings: dict = {}
+
+
+def configure_registry(**settings) -> None:
+    """
+    Set the SchemaRegistry keyword arguments of the shared registry, e.g.
+    configure_registry(max_entries=8, ttl=300). The shared registry is
+    recreated (empty) on next use.
+    """
+    global _registry
+    with _registry_lock:
+        _registry_settings.update(settings)
+        _registry = None
+
+
+def get_registry() -> SchemaRegistry:
+    """Get the process-wide schema registry, creating it on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SchemaRegistry(**_registry_settings)
+        return _registry
+
+
+class SchemaRefresher(threading.Thread):
+    """
+    Daemon thread keeping the registered databases of the shared registry
+    fresh: every interval seconds (and as soon as a request finds an
+    expired entry) it checks each database's catalog stamp and swaps in a
+    new introspection when it changed or the entry expired. Requests keep
+    the previous diagram meanwhile.
+    """
+
+    def __init__(self, interval: float = REFRESH_INTERVAL):
+        """
+        Initialize a SchemaRefresher instance.
+
+        Args:
+            interval (float, optional): Seconds between two checks of all entries. Defaults to REFRESH_INTERVAL.
+        """
+        super().__init__(name="sqler-schema-refresher", daemon=True)
+        self.interval: float = interval
+        self._pending: Set[str] = set()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def request(self, key: str) -> None:
+        """Revalidate one entry as soon as possible."""
+        with self._lock:
+            self._pending.add(key)
+        self._wake.set()
+
+    def stop(self) -> None:
+        """Stop after the current revalidation."""
+        self._stopped.set()
+        self._wake.set()
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            timed_out = not self._wake.wait(self.interval)
+            self._wake.clear()
+            with self._lock:
+                pending, self._pending = self._pending, set()
+            registry = get_registry()
+            keys = registry.keys() if timed_out else list(pending)
+            for key in keys:
+                if self._stopped.is_set():
+                    return
+                try:
+                    registry.revalidate(key)
+                except Exception:
+                    # The stale diagram keeps being served; retried next interval
+                    logger.exception("background refresh of a registered database failed")
+
+
+_refresher: Optional[SchemaRefresher] = None
+
+
+def start_refresher(interval: float = REFRESH_INTERVAL) -> SchemaRefresher:
+    """Start the background SchemaRefresher of the shared registry, once per process."""
+    global _refresher
+    with _registry_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = SchemaRefresher(interval)
+            _refresher.start()
+        return _refresher
+
+
+def stop_refresher() -> None:
+    """Stop the background SchemaRefresher; expired entries are rebuilt on request again."""
+    global _refresher
+    with _registry_lock:
+        refresher, _refresher = _refresher, None
+    if refresher is not None:
+        refresher.stop()
+
+
+def _request_revalidation(key: str) -> bool:
+    # Whether a running refresher took over rebuilding an expired entry
+    refresher = _refresher
+    if refresher is None or not refresher.is_alive():
+        return False
+    refresher.request(key)
+    return True
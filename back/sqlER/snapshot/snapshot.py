@@ -0,0 +1,108 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Optional
+
+from ..cache import FileLock
+
+SNAPSHOT_VERSION: int = 4
+
+
+class SchemaSnapshot:
+    """
+    Versioned on-disk snapshot of one database introspection result, stored
+    as gzipped compact JSON. Every worker process of a host sharing the
+    directory reads it, and lock() lets only one of them rebuild it.
+    """
+
+    def __init__(self, directory: str, key: dict):
+        """
+        Initialize a SchemaSnapshot instance.
+
+        Args:
+            directory (str): Directory holding the snapshot files.
+            key (dict): Everything the introspection result depends on
+                (server, database, user, FK reasoning flags, ...).
+        """
+        self.directory: str = str(directory)
+        self.key: dict = key
+        digest = hashlib.sha256(
+            json.dumps(key, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        self.path: str = os.path.join(self.directory, f"{digest}.json.gz")
+        self.lock_path: str = os.path.join(self.directory, f"{digest}.lock")
+
+    def read(self) -> Optional[dict]:
+        """
+        Read the whole snapshot record, whatever catalog stamp it was taken at.
+
+        Returns:
+            Optional[dict]: Record with "stamp", "created" and "payload" keys,
+                or None if missing, unreadable or written by another version.
+        """
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, EOFError, ValueError):
+            return None
+        if data.get("version") != SNAPSHOT_VERSION or data.get("key") != self.key:
+            return None
+        return data
+
+    def load(self, stamp: Optional[str] = None) -> Optional[dict]:
+        """
+        Load the snapshot payload.
+
+        Args:
+            stamp (Optional[str], optional): Current catalog stamp. If given, the
+                snapshot is only returned when it was taken at the same stamp.
+
+        Returns:
+            Optional[dict]: The payload, or None if missing, stale or unreadable.
+        """
+        data = self.read()
+        if data is None:
+            return None
+        if stamp is not None and data.get("stamp") != stamp:
+            return None
+        return data["payload"]
+
+    def save(self, stamp: Optional[str], payload: dict) -> None:
+        """
+        Atomically write the snapshot payload.
+
+        Args:
+            stamp (Optional[str]): Catalog stamp taken before the introspection.
+            payload (dict): JSON-serializable introspection result.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "key": self.key,
+            "stamp": stamp,
+            "created": time.time(),
+            "payload": payload,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                json.dump(data, f, default=str, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def lock(self) -> FileLock:
+        """Cross-process lock held while (re)building this snapshot."""
+        return FileLock(self.lock_path)
+
+    def invalidate(self) -> None:
+        """Delete the snapshot file if it exists."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,194 @@
+import builtins
+from typing import Optional
+
+from sqlER import ERDiagram, ERGenerator, Table
+from sqlER.ERDiagram.ERDiagram import python_type_name
+
+
+class FakeCatalog:
+    """In-memory SQL Server catalog answering the queries dbConnection sends."""
+
+    def __init__(self, schemas=("dbo",)):
+        self.schemas = list(schemas)  # the dbo-owned schemas
+        self.objects: dict = {}
+        self.clock = 0
+        self.queries: list = []
+
+    def add_table(self, name, fields, pk=(), fks=(), rows=(), schema="dbo", view=False):
+        """
+        fields: [(name, SQL type)], fks: [(column, referenced table, referenced column, constraint)],
+        rows: tuples with one value per field.
+        """
+        self.clock += 1
+        self.objects[(schema, name)] = {
+            "view": view,
+            "fields": list(fields),
+            "pk": list(pk),
+            "fks": list(fks),
+            "rows": list(rows),
+            "modified": f"2024-01-01 00:00:{self.clock:02d}",
+        }
+
+    def drop_table(self, name, schema="dbo"):
+        self.clock += 1
+        del self.objects[(schema, name)]
+
+    def connection(self, schema_name: Optional[str] = "dbo") -> "FakeDb":
+        return FakeDb(self, schema_name)
+
+    def generator(self, **kwargs) -> ERGenerator:
+        """An ERGenerator whose connections all read this catalog."""
+        catalog = self
+
+        class Generator(ERGenerator):
+            def _connection(self, schema_name: Optional[str] = "dbo"):
+                return catalog.connection(schema_name)
+
+        return Generator(database="db", **kwargs)
+
+    def selected(self, objects):
+        keys = sorted(self.objects)
+        return keys if objects is None else [key for key in keys if key in set(objects)]
+
+
+class FakeDb:
+    """Stands in for dbConnection on top of a FakeCatalog."""
+
+    pool = None
+
+    def __init__(self, catalog: FakeCatalog, schema_name: Optional[str] = "dbo"):
+        self.catalog = catalog
+        self.schema = schema_name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def _log(self, query):
+        self.catalog.queries.append(query)
+
+    def schemas(self):
+        self._log("schemas")
+        return [("db", schema, "dbo") for schema in self.catalog.schemas]
+
+    def tables(self, exclusion=True):
+        self._log("tables")
+        return [
+            ("db", schema, name, "VIEW" if obj["view"] else "TABLE", None)
+            for (schema, name), obj in sorted(self.catalog.objects.items())
+        ]
+
+    def object_stamps(self):
+        self._log("object_stamps")
+        return [
+            (schema, name, "V " if obj["view"] else "U ", obj["modified"])
+            for (schema, name), obj in sorted(self.catalog.objects.items())
+        ]
+
+    def catalog_stamp(self):
+        self._log("catalog_stamp")
+        return f"{self.catalog.clock}|{len(self.catalog.objects)}"
+
+    def fields_bulk(self, objects=None):
+        self._log("fields_bulk")
+        return [
+            (schema, name, field, sql_type, False, True)
+            for schema, name in self.catalog.selected(objects)
+            for field, sql_type in self.catalog.objects[(schema, name)]["fields"]
+        ]
+
+    def pk_bulk(self, objects=None):
+        self._log("pk_bulk")
+        return [
+            (schema, name, field, f"PK_{name}", ordinal)
+            for schema, name in self.catalog.selected(objects)
+            for ordinal, field in enumerate(self.catalog.objects[(schema, name)]["pk"], 1)
+        ]
+
+    def fk_bulk(self, objects=None):
+        self._log("fk_bulk")
+        wanted = None if objects is None else set(objects)
+        rows = []
+        for (schema, name), obj in self.catalog.objects.items():
+            for column, ref_table, ref_column, constraint in obj["fks"]:
+                if wanted is None or (schema, name) in wanted or (schema, ref_table) in wanted:
+                    rows.append((schema, ref_table, ref_column, schema, name, column, constraint, 1))
+        return sorted(rows)
+
+    def pk(self, table_name, schema_name=None):
+        self._log("pk")
+        obj = self.catalog.objects[(schema_name, table_name)]
+        return {"primaryKeys": [(None, schema_name, table_name, field, 1, f"PK_{table_name}") for field in obj["pk"]]}
+
+    def fields(self, table_name, schema_name=None):
+        self._log("fields")
+        obj = self.catalog.objects[(schema_name, table_name)]
+        return [
+            (field, getattr(builtins, python_type_name(sql_type)), None, None, None, None, True)
+            for field, sql_type in obj["fields"]
+        ]
+
+    def fk(self, table_name, schema_name=None):
+        self._log("fk")
+        return {
+            "foreignKeys": [
+                (None, schema, table_name, ref_column, None, schema, name, column, 1, None, None, constraint, None, None)
+                for (schema, name), obj in sorted(self.catalog.objects.items())
+                for column, ref_table, ref_column, constraint in obj["fks"]
+                if schema == schema_name and ref_table == table_name
+            ]
+        }
+
+    def row_counts(self):
+        self._log("row_counts")
+        return [
+            (schema, name, len(obj["rows"]))
+            for (schema, name), obj in sorted(self.catalog.objects.items())
+            if not obj["view"]
+        ]
+
+    def sample_values(self, table_name, columns, rows, schema_name=None, percent=None):
+        self._log("sample_values")
+        obj = self.catalog.objects[(schema_name or self.schema, table_name)]
+        names = [field for field, _ in obj["fields"]]
+        positions = [names.index(column) for column in columns]
+        return [tuple(row[p] for p in positions) for row in obj["rows"][:rows]]
+
+
+def company(schemas=("dbo",)) -> FakeCatalog:
+    """Employee.department_id -> Department.id, declared."""
+    catalog = FakeCatalog(schemas)
+    catalog.add_table("Department", [("id", "int"), ("name", "nvarchar")], pk=["id"])
+    catalog.add_table(
+        "Employee",
+        [("id", "int"), ("department_id", "int")],
+        pk=["id"],
+        fks=[("department_id", "Department", "id", "FK_Employee_Department")],
+    )
+    return catalog
+
+
+def shop() -> ERDiagram:
+    """Customer <- Order <- OrderLine -> Product, Product ~> Supplier (reasoned), Note alone."""
+    diagram = ERDiagram("shop")
+    for name, fields in (
+        ("Customer", ["id", "name"]),
+        ("Order", ["id", "customer_id"]),
+        ("OrderLine", ["id", "order_id", "product_id"]),
+        ("Product", ["id", "supplier_id"]),
+        ("Supplier", ["id"]),
+        ("Note", ["id", "text"]),
+    ):
+        table = Table(name, schema="dbo")
+        for field in fields:
+            table.add_field(field, "int" if field.endswith("id") else "str", "", field != "id")
+        table.add_primary_key("id", f"PK_{name}")
+        diagram.add_table(table)
+    diagram.add_relation("Order", "customer_id", "Customer", "id", "FK_Order_Customer")
+    diagram.add_relation("OrderLine", "order_id", "Order", "id", "FK_OrderLine_Order")
+    diagram.add_relation("OrderLine", "product_id", "Product", "id", "FK_OrderLine_Product")
+    diagram.add_relation("Product", "supplier_id", "Supplier", "id", "FK_Product_Supplier", reasoning=True)
+    diagram.get_table("Note").add_comment("free text")
+    return diagram
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import stat
+import tempfile
+import time
+from unittest import TestCase, mock, skipUnless
+
+from sqlER import RenderLimits, RenderSettings, TypeIntrospection, TypeRankdir
+from sqlER.graph import LayoutError, arun_layout
+from sqlER.tests.fakes import company, shop
+
+
+@skipUnless(os.name == "posix", "fake graphviz commands are shell scripts")
+class AsyncLayoutTests(TestCase):
+    def engine(self, script: str) -> str:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "engine")
+        with open(path, "w") as f:
+            f.write(f"#!/bin/sh\n{script}\n")
+        os.chmod(path, stat.S_IRWXU)
+        return path
+
+    def test_output_of_the_engine(self):
+        self.assertEqual(asyncio.run(arun_layout("digraph {}", engine=self.engine("cat"))), b"digraph {}")
+
+    def test_failure_raises_layout_error(self):
+        with self.assertRaisesRegex(LayoutError, "bad graph"):
+            asyncio.run(arun_layout("digraph {", engine=self.engine("echo bad graph >&2; exit 1")))
+
+    def test_timeout_kills_the_engine(self):
+        start = time.monotonic()
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(arun_layout("digraph {}", engine=self.engine("exec sleep 30"), timeout=0.2))
+        self.assertLess(time.monotonic() - start, 10)
+
+    def test_cancelled_render_kills_the_engine(self):
+        engine = self.engine("exec sleep 30")
+
+        async def cancel():
+            task = asyncio.ensure_future(arun_layout("digraph {}", engine=engine))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        start = time.monotonic()
+        asyncio.run(cancel())
+        self.assertLess(time.monotonic() - start, 10)
+
+
+class AsyncRenderTests(TestCase):
+    def test_async_render_matches_the_sync_render(self):
+        def layout(source, format="svg", engine="dot", timeout=None):
+            return source.encode("utf-8")
+
+        async def alayout(source, format="svg", engine="dot", timeout=None):
+            return layout(source)
+
+        diagram = shop()
+        options = dict(
+            render_tables=["Order"],
+            render_related=True,
+            limits=RenderLimits(),
+            settings=RenderSettings(rankdir=TypeRankdir.LR),
+        )
+        with mock.patch("sqlER.ERDiagram.ERDiagram.run_layout", layout), mock.patch(
+            "sqlER.ERDiagram.ERDiagram.arun_layout", alayout
+        ):
+            expected = diagram.render_to_bytes(**options)
+            rendered = asyncio.run(diagram.arender_to_bytes(**options))
+        self.assertEqual(rendered, expected)
+
+    def test_async_refresh_runs_on_the_odbc_executor(self):
+        catalog = company()
+        generator = catalog.generator(introspection=TypeIntrospection.BULK)
+        generator.object_stamps = generator._read_object_stamps()
+        catalog.add_table("Project", [("id", "int")], pk=["id"])
+        summary = asyncio.run(generator.arefresh())
+        self.assertEqual(summary["added"], [("dbo", "Project")])
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+
+from sqlER import RenderSpec, TypeRankdir, render_many
+from sqlER.tests.fakes import shop
+
+
+def layout(source, format="svg", engine="dot", timeout=None):
+    if "Broken" in source:
+        raise RuntimeError("syntax error")
+    if "Slow" in source:
+        raise subprocess.TimeoutExpired(engine, timeout)
+    return source.encode("utf-8")
+
+
+class RenderManyTests(TestCase):
+    def setUp(self):
+        # Layouts run in threads here, so the patched layout is seen by every worker
+        for target, replacement in (
+            ("sqlER.ERDiagram.batch.ProcessPoolExecutor", ThreadPoolExecutor),
+            ("sqlER.ERDiagram.batch.run_layout", layout),
+        ):
+            patcher = mock.patch(target, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_each_spec_is_rendered_with_its_own_settings(self):
+        diagram = shop()
+        results = {
+            result.spec.name: result
+            for result in render_many(
+                [
+                    (diagram, RenderSpec("all", rankdir=TypeRankdir.LR, dpi=100)),
+                    (diagram, RenderSpec("orders", render_tables=["Order"], render_related=True)),
+                ],
+                workers=2,
+            )
+        }
+        self.assertIn(b"rankdir=LR", results["all"].data)
+        self.assertIn(b"dpi=100", results["all"].data)
+        self.assertNotIn(b"Note", results["orders"].data)
+        self.assertIn(b"Customer", results["orders"].data)
+        self.assertTrue(all(result.error is None for result in results.values()))
+
+    def test_failed_layouts_do_not_stop_the_batch(self):
+        diagram = shop()
+        broken, slow = shop(), shop()
+        broken.name, slow.name = "Broken", "Slow"
+        results = {
+            result.spec.name: result
+            for result in render_many(
+                [
+                    (diagram, RenderSpec("ok")),
+                    (broken, RenderSpec("broken")),
+                    (slow, RenderSpec("slow")),
+                ],
+                timeout=5.0,
+            )
+        }
+        self.assertIsNotNone(results["ok"].data)
+        self.assertEqual(results["broken"].error, "syntax error")
+        self.assertEqual(results["slow"].error, "timed out after 5.0s")
+
+    def test_filename_is_written(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "shop")
+            [result] = render_many([(shop(), RenderSpec("shop", filename=filename))])
+            with open(f"{filename}.svg", "rb") as f:
+                self.assertEqual(f.read(), result.data)
+
+    def test_no_jobs(self):
+        self.assertEqual(list(render_many([])), [])
@@ -0,0 +1,70 @@
+from unittest import TestCase
+
+from sqlER import ERDiagram, Table, TypeDetail, TypeIntrospection, TypeRankdir
+from sqlER.ERDiagram.ERDiagram import DEFAULT_SCHEMA_NODE
+from sqlER.tests.fakes import company, shop
+
+
+def warehouse() -> ERDiagram:
+    """shop() in dbo, plus sales.Invoice -> dbo.Customer, sales.Refund ~> sales.Invoice and an unschemed view."""
+    diagram = shop()
+    for name in ("Invoice", "Refund"):
+        table = Table(name, schema="sales")
+        table.add_field("id", "int", "", False)
+        table.add_field("ref_id", "int")
+        table.add_primary_key("id")
+        diagram.add_table(table)
+    diagram.add_view("Summary")
+    diagram.add_relation("Invoice", "ref_id", "Customer", "id", "FK_Invoice_Customer")
+    diagram.add_relation("Invoice", "ref_id", "Order", "id", "FK_Invoice_Order", reasoning=True)
+    diagram.add_relation("Refund", "ref_id", "Invoice", "id", "FK_Refund_Invoice", reasoning=True)
+    return diagram
+
+
+class SchemaDetailTests(TestCase):
+    def test_schema_nodes_count_tables_and_internal_relationships(self):
+        graph = warehouse().to_graph(detail=TypeDetail.SCHEMA)
+        self.assertEqual(graph["detail"], "schema")
+        self.assertEqual(
+            graph["nodes"],
+            [
+                {"id": "dbo", "tables": 6, "views": 0, "internal": 4},
+                {"id": "sales", "tables": 2, "views": 0, "internal": 1},
+                {"id": DEFAULT_SCHEMA_NODE, "tables": 0, "views": 1, "internal": 0},
+            ],
+        )
+        self.assertEqual(
+            graph["edges"], [{"id": "sales>dbo", "from": "sales", "to": "dbo", "count": 2, "reasoned": 1}]
+        )
+
+    def test_schema_drawing(self):
+        source = warehouse().to_dot(detail=TypeDetail.SCHEMA)
+        self.assertIn("6 tables", source)
+        self.assertIn("4 relationships", source)
+        self.assertIn("dbo -> sales", source)
+        # Partly declared edges are drawn solid
+        self.assertIn("style=solid", source)
+        self.assertNotIn("Customer", source)
+
+    def test_schema_drawings_are_not_split(self):
+        with self.assertRaises(ValueError):
+            warehouse().render_components(detail=TypeDetail.SCHEMA)
+
+
+class KeysDetailTests(TestCase):
+    def test_only_key_columns_are_drawn(self):
+        diagram = shop()
+        full = diagram.to_dot()
+        keys = diagram.to_dot(detail=TypeDetail.KEYS)
+        self.assertIn(">name<", full)
+        self.assertNotIn(">name<", keys)
+        self.assertIn("customer_id", keys)
+        fields = [field["name"] for field in diagram.to_graph(detail=TypeDetail.KEYS)["nodes"][0]["fields"]]
+        self.assertEqual(fields, ["id"])
+
+    def test_tiers_have_their_own_render_keys(self):
+        generator = company().generator(introspection=TypeIntrospection.BULK)
+        keys = {
+            generator.render_key(TypeRankdir.TB, 300, detail=detail) for detail in TypeDetail
+        }
+        self.assertEqual(len(keys), len(TypeDetail))
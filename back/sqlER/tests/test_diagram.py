@@ -0,0 +1,69 @@
+import json
+from unittest import TestCase
+
+from sqlER import ERDiagram, Table
+from sqlER.tests.fakes import shop
+
+
+class RecordTests(TestCase):
+    def test_table_record_round_trip(self):
+        table = shop().get_table("OrderLine")
+        record = json.loads(json.dumps(table.get_record()))
+        restored = Table.from_record(record)
+        self.assertEqual(restored.get_dict(), table.get_dict())
+        self.assertEqual(restored.get_field("product_id"), table.get_field("product_id"))
+
+    def test_diagram_record_round_trip(self):
+        diagram = shop()
+        restored = ERDiagram.from_record(json.loads(json.dumps(diagram.get_record())))
+        self.assertEqual(restored.get_dict(), diagram.get_dict())
+        self.assertEqual(restored.relations, diagram.relations)
+        self.assertEqual(restored.content_hash(), diagram.content_hash())
+        self.assertEqual(restored.get_related_tables(["Order"]), diagram.get_related_tables(["Order"]))
+
+    def test_dict_and_record_agree(self):
+        diagram = shop()
+        self.assertEqual(ERDiagram.from_dict(diagram.get_dict()).get_record(), diagram.get_record())
+
+    def test_field_lookup_by_name(self):
+        table = shop().get_table("Customer")
+        self.assertEqual(table.get_field("name").type, "str")
+        self.assertIsNone(table.get_field("missing"))
+
+    def test_content_hash_follows_changes(self):
+        diagram = shop()
+        digest = diagram.content_hash()
+        self.assertEqual(diagram.content_hash(), digest)
+        diagram.get_table("Note").add_field("author", "str")
+        changed = diagram.content_hash()
+        self.assertNotEqual(changed, digest)
+        diagram.remove_relations(lambda rel: rel["reasoning"])
+        self.assertNotEqual(diagram.content_hash(), changed)
+
+
+class NeighbourhoodTests(TestCase):
+    def test_related_tables_by_hops_in_either_direction(self):
+        diagram = shop()
+        self.assertEqual(diagram.get_related_tables(["Order"], 0), {"Order"})
+        self.assertEqual(diagram.get_related_tables(["Order"]), {"Order", "Customer", "OrderLine"})
+        self.assertEqual(
+            diagram.get_related_tables(["Customer"], 3),
+            {"Customer", "Order", "OrderLine", "Product"},
+        )
+        self.assertEqual(diagram.get_related_tables(["Note"], 5), {"Note"})
+
+    def test_adjacency_follows_removed_relations(self):
+        diagram = shop()
+        diagram.add_relation("OrderLine", "product_id", "Product", "id", "FK_dup")
+        diagram.remove_relations(lambda rel: rel["label"] == "FK_OrderLine_Product")
+        self.assertIn("Product", diagram.get_related_tables(["OrderLine"]))
+        diagram.remove_relations(lambda rel: rel["label"] == "FK_dup")
+        self.assertNotIn("Product", diagram.get_related_tables(["OrderLine"]))
+
+    def test_render_related_selects_the_neighbourhood(self):
+        diagram = shop()
+        tables, relations, _ = diagram._select(["Customer"], True, False, 2)
+        self.assertEqual([table.name for table in tables], ["Customer", "Order", "OrderLine"])
+        self.assertEqual(
+            [rel.label for rel in relations], ["FK_Order_Customer", "FK_OrderLine_Order"]
+        )
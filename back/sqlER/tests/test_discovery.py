@@ -0,0 +1,104 @@
+from unittest import TestCase
+
+from sqlER.reasoning.discovery import BloomFilter, HyperLogLog, normalize_value
+from sqlER.tests.fakes import FakeCatalog
+
+
+class SketchTests(TestCase):
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        values = [str(i) for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in values))
+        false_positives = sum(str(i) in bloom for i in range(1000, 11000))
+        self.assertLess(false_positives / 10000, 0.03)
+
+    def test_hyperloglog_estimates_distinct_count(self):
+        hll = HyperLogLog()
+        for i in range(20000):
+            hll.add(str(i % 5000))
+        self.assertAlmostEqual(hll.cardinality(), 5000, delta=250)
+
+    def test_normalize_value_matches_equal_keys_across_types(self):
+        from decimal import Decimal
+
+        self.assertEqual(normalize_value(7), normalize_value(Decimal("7.00")))
+        self.assertEqual(normalize_value("ABC  "), normalize_value("abc"))
+        self.assertIsNone(normalize_value(None))
+
+
+def shop_catalog() -> FakeCatalog:
+    catalog = FakeCatalog()
+    catalog.add_table(
+        "Customer",
+        [("CustomerID", "int"), ("Name", "nvarchar")],
+        pk=["CustomerID"],
+        rows=[(i, f"name{i}") for i in range(1, 51)],
+    )
+    catalog.add_table(
+        "Order",
+        [("OrderID", "int"), ("Buyer", "int")],
+        pk=["OrderID"],
+        rows=[(1000 + i, i * 7 % 50 + 1) for i in range(200)],
+    )
+    return catalog
+
+
+class DiscoveryTests(TestCase):
+    def discovered(self, generator):
+        return sorted((rel[0], rel[1], rel[2]) for rel in generator.relations if rel[5])
+
+    def test_discovers_undeclared_foreign_key(self):
+        generator = shop_catalog().generator(discover_FK=True)
+        self.assertEqual(self.discovered(generator), [("Order", "Buyer", "Customer")])
+
+    def test_refresh_discovers_relations_of_changed_tables(self):
+        catalog = shop_catalog()
+        generator = catalog.generator(discover_FK=True)
+        generator.object_stamps = generator._read_object_stamps()
+        catalog.add_table(
+            "Invoice",
+            [("InvoiceID", "int"), ("Payer", "int")],
+            pk=["InvoiceID"],
+            rows=[(2000 + i, i % 50 + 1) for i in range(100)],
+        )
+        # Altering the referenced table drops and rediscovers Order.Buyer
+        customer = catalog.objects[("dbo", "Customer")]
+        catalog.add_table("Customer", customer["fields"], pk=customer["pk"], rows=customer["rows"])
+        generator.refresh()
+        self.assertEqual(
+            self.discovered(generator),
+            [("Invoice", "Payer", "Customer"), ("Order", "Buyer", "Customer")],
+        )
+        self.assertEqual(len(generator.diagram.relations), 2)
+
+    def test_full_refresh_runs_discovery(self):
+        generator = shop_catalog().generator(discover_FK=True)
+        generator.object_stamps = {}
+        generator.refresh()
+        self.assertEqual(self.discovered(generator), [("Order", "Buyer", "Customer")])
+
+    def test_scoped_discovery_only_relates_given_tables(self):
+        catalog = shop_catalog()
+        catalog.add_table("Region", [("RegionID", "int")], pk=["RegionID"], rows=[(i,) for i in range(500, 520)])
+        generator = catalog.generator()
+        self.assertEqual(generator.discover_inclusion_FK(tables=["Region"]), [])
+        self.assertEqual(
+            [rel[:3] for rel in generator.discover_inclusion_FK(tables=["Customer"])],
+            [("Order", "Buyer", "Customer")],
+        )
+
+    def test_refresh_keeps_relations_discovered_between_unchanged_tables(self):
+        catalog = shop_catalog()
+        generator = catalog.generator(discover_FK=True, reasoning_FK=True)
+        generator.object_stamps = generator._read_object_stamps()
+        self.assertEqual(self.discovered(generator), [("Order", "Buyer", "Customer")])
+        # A new table sharing the Buyer field name makes it an affected field of FK reasoning
+        catalog.add_table("Audit", [("AuditID", "int"), ("Buyer", "nvarchar")], pk=["AuditID"])
+        generator.refresh()
+        self.assertEqual(self.discovered(generator), [("Order", "Buyer", "Customer")])
+        self.assertEqual(
+            [(rel["from_table"], rel["from_field"], rel["to_table"]) for rel in generator.diagram.relations],
+            [("Order", "Buyer", "Customer")],
+        )
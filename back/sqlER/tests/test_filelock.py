@@ -0,0 +1,99 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, skipIf
+
+from sqlER import RenderCache, TypeIntrospection
+from sqlER.cache import filelock
+from sqlER.cache.filelock import FileLock
+from sqlER.tests.fakes import company
+
+
+@skipIf(filelock.fcntl is None, "file locks need fcntl")
+class FileLockTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "locks", "a.lock")
+
+    def test_second_holder_waits(self):
+        with FileLock(self.path):
+            self.assertFalse(FileLock(self.path).acquire(timeout=0.1))
+        other = FileLock(self.path)
+        self.assertTrue(other.acquire(timeout=0.1))
+        other.release()
+
+    def test_async_acquire_times_out(self):
+        with FileLock(self.path):
+            self.assertFalse(asyncio.run(FileLock(self.path).aacquire(timeout=0.1)))
+        self.assertTrue(asyncio.run(FileLock(self.path).aacquire(timeout=0.1)))
+
+    def test_lock_is_not_reentrant(self):
+        lock = FileLock(self.path)
+        with lock:
+            with self.assertRaises(RuntimeError):
+                lock.acquire()
+        lock.release()
+
+    def test_held_across_processes(self):
+        child = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                "import sys, time\n"
+                "from sqlER.cache.filelock import FileLock\n"
+                "lock = FileLock(sys.argv[1]); lock.acquire(); print('locked', flush=True); time.sleep(0.5)",
+                self.path,
+            ],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            self.assertEqual(child.stdout.readline().strip(), "locked")
+            self.assertFalse(FileLock(self.path).acquire(timeout=0.1))
+            self.assertTrue(FileLock(self.path).acquire(timeout=10))
+        finally:
+            child.stdout.close()
+            child.wait()
+
+
+@skipIf(filelock.fcntl is None, "file locks need fcntl")
+class SharedCacheTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_workers_render_a_key_once(self):
+        # One RenderCache per worker process, sharing the disk tier
+        caches = [RenderCache(directory=self.directory) for _ in range(4)]
+        renders = []
+
+        def render():
+            renders.append(1)
+            time.sleep(0.1)
+            return b"<svg/>"
+
+        key = "ab" + "0" * 62
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(lambda cache: cache.get_or_render(key, render), caches))
+        self.assertEqual(results, [b"<svg/>"] * 4)
+        self.assertEqual(len(renders), 1)
+
+    def test_workers_introspect_a_database_once(self):
+        catalog = company()
+        start = threading.Barrier(3)
+
+        def create():
+            start.wait()
+            return catalog.generator(introspection=TypeIntrospection.BULK, snapshot_dir=self.directory)
+
+        with ThreadPoolExecutor(3) as executor:
+            generators = list(executor.map(lambda _: create(), range(3)))
+        self.assertEqual(catalog.queries.count("fields_bulk"), 1)
+        self.assertEqual(len({tuple(g.diagram.get_table_names()) for g in generators}), 1)
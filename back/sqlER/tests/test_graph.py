@@ -0,0 +1,166 @@
+import xml.etree.ElementTree as ElementTree
+from unittest import TestCase, mock
+
+from sqlER import RenderLimits
+from sqlER.graph import connected_components, k_shortest_paths, pack_svgs, shortest_path, svg_size
+from sqlER.tests.fakes import shop
+
+
+def undirected(*edges):
+    adjacency = {}
+    for edge, (a, b, cost) in enumerate(edges):
+        adjacency.setdefault(a, []).append((b, edge, cost))
+        adjacency.setdefault(b, []).append((a, edge, cost))
+    return adjacency
+
+
+def nodes(path):
+    return [path[0][1]] + [step[2] for step in path]
+
+
+class PathTests(TestCase):
+    def setUp(self):
+        # A - B - D costs 2, A - C - D costs 3, A - D costs 5
+        self.adjacency = undirected(
+            ("A", "B", 1.0), ("B", "D", 1.0), ("A", "C", 1.0), ("C", "D", 2.0), ("A", "D", 5.0)
+        )
+
+    def test_shortest_path(self):
+        cost, path = shortest_path(self.adjacency, "A", "D")
+        self.assertEqual(cost, 2.0)
+        self.assertEqual(nodes(path), ["A", "B", "D"])
+        self.assertIsNone(shortest_path(self.adjacency, "A", "Z"))
+
+    def test_k_shortest_paths_are_loopless_and_ordered(self):
+        paths = k_shortest_paths(self.adjacency, "A", "D", k=5)
+        self.assertEqual([cost for cost, _ in paths], [2.0, 3.0, 5.0])
+        self.assertEqual(
+            [nodes(path) for _, path in paths], [["A", "B", "D"], ["A", "C", "D"], ["A", "D"]]
+        )
+
+    def test_k_limits_the_paths(self):
+        self.assertEqual(len(k_shortest_paths(self.adjacency, "A", "D", k=2)), 2)
+        self.assertEqual(k_shortest_paths(self.adjacency, "A", "D", k=0), [])
+
+    def test_parallel_edges_give_distinct_paths(self):
+        adjacency = undirected(("A", "B", 1.0), ("A", "B", 1.0))
+        paths = k_shortest_paths(adjacency, "A", "B", k=3)
+        self.assertEqual(len(paths), 2)
+        self.assertNotEqual(paths[0][1], paths[1][1])
+
+
+class JoinPathTests(TestCase):
+    def test_join_path_walks_relations_in_either_direction(self):
+        hops = shop().join_path("Customer", "Product")
+        self.assertEqual(
+            [(hop.from_table, hop.from_field, hop.to_table, hop.to_field) for hop in hops],
+            [
+                ("Customer", "id", "Order", "customer_id"),
+                ("Order", "id", "OrderLine", "order_id"),
+                ("OrderLine", "product_id", "Product", "id"),
+            ],
+        )
+
+    def test_unconnected_and_same_tables(self):
+        diagram = shop()
+        self.assertIsNone(diagram.join_path("Customer", "Note"))
+        self.assertEqual(diagram.join_paths("Note", "Note"), [(0.0, [])])
+
+    def test_reasoned_relations_cost_more(self):
+        diagram = shop()
+        self.assertEqual(diagram.join_paths("Product", "Supplier")[0][0], 1.0)
+        self.assertEqual(diagram.join_paths("Product", "Supplier", reasoned_cost=4.0)[0][0], 4.0)
+
+    def test_cached_paths_are_dropped_when_relations_change(self):
+        diagram = shop()
+        self.assertEqual(len(diagram.join_path("Customer", "Product")), 3)
+        diagram.add_relation("Order", "customer_id", "Product", "id", "FK_shortcut")
+        self.assertEqual(len(diagram.join_path("Customer", "Product")), 2)
+
+
+def drawing(width, height):
+    return (
+        f'<?xml version="1.0"?>\n<svg width="{width}pt" height="{height}pt" '
+        f'viewBox="0.00 0.00 {width}.00 {height}.00" xmlns="http://www.w3.org/2000/svg">'
+        '<defs><linearGradient id="l_0"/></defs>'
+        '<g id="graph0"><g id="node1"><path fill="url(#l_0)"/></g></g></svg>\n'
+    ).encode()
+
+
+def user_units(length):
+    """An SVG length in user units: "pt" is 4/3 of a user unit (a CSS px), no unit is one."""
+    return float(length[:-2]) * 4 / 3 if length.endswith("pt") else float(length)
+
+
+class ComponentTests(TestCase):
+    def test_connected_components_keep_node_order(self):
+        self.assertEqual(
+            connected_components(["a", "b", "c", "d", "e"], [("d", "b"), ("e", "c"), ("c", "x")]),
+            [["a"], ["b", "d"], ["c", "e"]],
+        )
+
+    def test_diagram_components(self):
+        self.assertEqual(
+            shop().get_components(),
+            [["Customer", "Order", "OrderLine", "Product", "Supplier"], ["Note"]],
+        )
+
+    def test_small_components_share_a_cluster(self):
+        diagram = shop()
+        tables, relations, _ = diagram._select(None, False, False, 1)
+        clusters = diagram._clusters(tables, relations, min_cluster_size=3)
+        self.assertEqual(
+            [[table.name for table in cluster] for cluster, _ in clusters],
+            [["Customer", "Order", "OrderLine", "Product", "Supplier"], ["Note"]],
+        )
+        clusters = diagram._clusters(tables, relations, min_cluster_size=8)
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(len(clusters[0][1]), 4)
+
+    def test_render_components_lays_out_each_cluster(self):
+        sources = []
+
+        def layout(source, format="svg", engine="dot", timeout=None):
+            sources.append(source)
+            return drawing(100, 50)
+
+        with mock.patch("sqlER.ERDiagram.ERDiagram.run_layout", layout):
+            svgs = shop().render_components(min_cluster_size=1, limits=RenderLimits())
+        self.assertEqual(len(svgs), 2)
+        self.assertEqual(sum("Note" in source for source in sources), 1)
+
+
+class PackTests(TestCase):
+    def test_svg_size(self):
+        self.assertEqual(svg_size(drawing(120, 80)), (120.0, 80.0))
+        self.assertEqual(svg_size(b"<svg/>"), (0.0, 0.0))
+
+    def test_packed_drawings_do_not_overlap(self):
+        packed = pack_svgs([drawing(100, 20), drawing(100, 80), drawing(50, 50)], margin=10)
+        root = ElementTree.fromstring(packed)
+        # The outer viewBox maps one user unit to one point
+        _, _, view_width, view_height = map(float, root.get("viewBox").split())
+        self.assertAlmostEqual(user_units(root.get("width")) / view_width, 4 / 3, places=2)
+        boxes = []
+        for child in root:
+            x, y = float(child.get("x")), float(child.get("y"))
+            w, h = (user_units(child.get(size)) for size in ("width", "height"))
+            boxes.append((x, y, x + w, y + h))
+        self.assertEqual(len(boxes), 3)
+        # Tallest first, drawn at its own size in points
+        self.assertEqual(boxes[0], (0.0, 0.0, 100.0, 80.0))
+        self.assertEqual(sorted((b[2] - b[0], b[3] - b[1]) for b in boxes), [(50, 50), (100, 20), (100, 80)])
+        for i, a in enumerate(boxes):
+            for b in boxes[i + 1 :]:
+                self.assertTrue(a[2] <= b[0] or b[2] <= a[0] or a[3] <= b[1] or b[3] <= a[1])
+        self.assertEqual(view_width, max(box[2] for box in boxes))
+        self.assertEqual(view_height, max(box[3] for box in boxes))
+
+    def test_packed_ids_are_unique(self):
+        packed = pack_svgs([drawing(100, 20), drawing(50, 50)])
+        root = ElementTree.fromstring(packed)
+        ids = [element.get("id") for element in root.iter() if element.get("id")]
+        self.assertEqual(len(ids), 6)
+        self.assertEqual(len(set(ids)), 6)
+        fills = [element.get("fill") for element in root.iter() if element.get("fill")]
+        self.assertEqual(sorted(fills), ["url(#c0_l_0)", "url(#c1_l_0)"])
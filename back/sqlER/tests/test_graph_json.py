@@ -0,0 +1,85 @@
+import json
+from unittest import TestCase, mock
+
+from sqlER import RenderCache, RenderLimits, TypeIntrospection, TypeRankdir
+from sqlER.tests.fakes import company, shop
+
+TABLES = ["Customer", "Order", "OrderLine", "Product", "Supplier", "Note"]
+
+
+def graphviz_json(source, format="json", engine="dot", timeout=None):
+    """Graphviz -Tjson of shop(): one comment edge, then the four relationships."""
+    return json.dumps(
+        {
+            "bb": "0,0,400,300",
+            "objects": [
+                {"_gvid": i, "name": name, "pos": f"{i * 10},{i * 20}", "width": "1", "height": "0.5"}
+                for i, name in enumerate(TABLES + ["Note_comment"])
+            ]
+            + [{"_gvid": 7, "name": "no position"}],
+            "edges": [{"_gvid": i, "pos": f"spline {i}"} for i in (4, 2, 0, 3, 1)],
+        }
+    ).encode()
+
+
+class ToGraphTests(TestCase):
+    def test_nodes_and_edges(self):
+        graph = shop().to_graph(render_tables=["Order"], render_related=True)
+        self.assertEqual(graph["name"], "shop")
+        self.assertEqual(graph["rankdir"], "TB")
+        self.assertEqual(graph["detail"], "full")
+        self.assertEqual([node["id"] for node in graph["nodes"]], ["Customer", "Order", "OrderLine"])
+        self.assertEqual(
+            [edge["id"] for edge in graph["edges"]],
+            ["Order.customer_id>Customer.id", "OrderLine.order_id>Order.id"],
+        )
+        customer = graph["nodes"][0]
+        self.assertEqual(
+            customer["fields"][0], {"name": "id", "type": "int", "nullable": False, "pk": True, "fk": False}
+        )
+        self.assertNotIn("omitted", customer)
+
+    def test_omitted_fields_are_counted(self):
+        graph = shop().to_graph(render_tables=["Order"], render_related=True, field_omission=True)
+        customer = graph["nodes"][0]
+        self.assertEqual([field["name"] for field in customer["fields"]], ["id"])
+        self.assertEqual(customer["omitted"], 1)
+
+    def test_comments(self):
+        note = shop().to_graph(render_tables=["Note"])["nodes"][0]
+        self.assertEqual(note["comments"], ["free text"])
+
+
+class LayoutGraphTests(TestCase):
+    def test_positions_of_nodes_and_relationship_edges(self):
+        diagram = shop()
+        with mock.patch("sqlER.ERDiagram.ERDiagram.run_layout", graphviz_json):
+            layout = diagram.layout_graph(limits=RenderLimits())
+        self.assertEqual(layout["bb"], [0.0, 0.0, 400.0, 300.0])
+        self.assertEqual(layout["nodes"]["Order"], [10.0, 20.0, 72.0, 36.0])
+        self.assertIn("Note_comment", layout["nodes"])
+        self.assertNotIn("no position", layout["nodes"])
+        # The comment edge (_gvid 0) is dropped, relationships keep their order
+        self.assertEqual(
+            layout["edges"],
+            {
+                "Order.customer_id>Customer.id": "spline 1",
+                "OrderLine.order_id>Order.id": "spline 2",
+                "OrderLine.product_id>Product.id": "spline 3",
+                "Product.supplier_id>Supplier.id": "spline 4",
+            },
+        )
+
+    def test_graph_json_is_cached_per_format(self):
+        generator = company().generator(introspection=TypeIntrospection.BULK)
+        generator.diagram = shop()
+        cache = RenderCache()
+        with mock.patch("sqlER.ERDiagram.ERDiagram.run_layout", graphviz_json):
+            plain = generator.graph_json(TypeRankdir.LR, cache=cache)
+            with_layout = generator.graph_json(TypeRankdir.LR, layout=True, cache=cache, limits=RenderLimits())
+        self.assertEqual(json.loads(plain)["graph"]["rankdir"], "LR")
+        self.assertNotIn("layout", json.loads(plain))
+        self.assertIn("layout", json.loads(with_layout))
+        with mock.patch.object(generator.diagram, "to_graph") as to_graph:
+            self.assertEqual(generator.graph_json(TypeRankdir.LR, cache=cache), plain)
+            to_graph.assert_not_called()
@@ -0,0 +1,85 @@
+import tempfile
+from unittest import TestCase, mock
+
+from sqlER.reasoning import FKInferenceEngine
+from sqlER.reasoning.inference import type_family
+from sqlER.tests.fakes import FakeCatalog
+
+
+class FKInferenceEngineTests(TestCase):
+    def engine(self) -> FKInferenceEngine:
+        engine = FKInferenceEngine()
+        engine.add_table("Customer", ["CustomerID", "Name"], ["CustomerID"], ["int", "str"])
+        engine.add_table("Order", ["OrderID", "CustomerID"], ["OrderID"], ["int", "int"])
+        engine.add_table("Invoice", ["InvoiceID", "CustomerID"], ["InvoiceID"], ["int", "int"])
+        return engine
+
+    def test_relates_shared_field_to_its_primary_key_table(self):
+        self.assertEqual(
+            self.engine().relations(),
+            [
+                ("Order", "CustomerID", "Customer", "CustomerID", "FK_Order_Customer_CustomerID", True),
+                ("Invoice", "CustomerID", "Customer", "CustomerID", "FK_Invoice_Customer_CustomerID", True),
+            ],
+        )
+
+    def test_removed_table_drops_its_relations(self):
+        engine = self.engine()
+        engine.relations()
+        self.assertEqual(engine.remove_table("Invoice"), {"InvoiceID", "CustomerID"})
+        self.assertEqual([rel[0] for rel in engine.relations()], ["Order"])
+
+    def test_only_requested_changed_fields_are_inferred(self):
+        engine = self.engine()
+        with mock.patch.object(engine, "infer_field", wraps=engine.infer_field) as infer_field:
+            engine.relations(["CustomerID"])
+            self.assertEqual([c.args[0] for c in infer_field.call_args_list], ["CustomerID"])
+            infer_field.reset_mock()
+            engine.relations()
+            self.assertNotIn("CustomerID", [c.args[0] for c in infer_field.call_args_list])
+
+
+class TypePruningTests(TestCase):
+    def engine(self, prune_types: bool) -> FKInferenceEngine:
+        engine = FKInferenceEngine(prune_types=prune_types)
+        engine.add_table("Customer", ["Code"], ["Code"], ["int"])
+        engine.add_table("Order", ["OrderID", "Code"], ["OrderID"], ["int", "nvarchar"])
+        engine.add_table("Invoice", ["InvoiceID", "Code"], ["InvoiceID"], ["int", "decimal"])
+        return engine
+
+    def test_type_families(self):
+        self.assertEqual(type_family("INT"), "number")
+        self.assertEqual(type_family("decimal"), "number")
+        self.assertEqual(type_family("nvarchar"), "string")
+        self.assertEqual(type_family("geography"), "unknown")
+        self.assertEqual(type_family(None), "unknown")
+
+    def test_incompatible_types_are_not_related(self):
+        self.assertEqual(
+            self.engine(prune_types=True).relations(),
+            [("Invoice", "Code", "Customer", "Code", "FK_Invoice_Customer_Code", True)],
+        )
+
+    def test_pruning_can_be_disabled(self):
+        self.assertEqual(
+            sorted(rel[0] for rel in self.engine(prune_types=False).relations()),
+            ["Invoice", "Order"],
+        )
+
+
+class RestoredEngineTests(TestCase):
+    def test_refresh_after_restore_infers_only_changed_fields(self):
+        catalog = FakeCatalog()
+        catalog.add_table("Customer", [("CustomerID", "int"), ("Name", "nvarchar")], pk=["CustomerID"])
+        catalog.add_table("Order", [("OrderID", "int"), ("CustomerID", "int")], pk=["OrderID"])
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            catalog.generator(reasoning_FK=True, snapshot_dir=snapshot_dir)
+            catalog.add_table("Invoice", [("InvoiceID", "int"), ("CustomerID", "int")], pk=["InvoiceID"])
+            with mock.patch.object(
+                FKInferenceEngine, "infer_field", autospec=True, side_effect=FKInferenceEngine.infer_field
+            ) as infer_field:
+                generator = catalog.generator(reasoning_FK=True, snapshot_dir=snapshot_dir)
+        self.assertEqual({c.args[1] for c in infer_field.call_args_list}, {"InvoiceID", "CustomerID"})
+        self.assertEqual(
+            sorted(rel[0] for rel in generator.relations if rel[5]), ["Invoice", "Order"]
+        )
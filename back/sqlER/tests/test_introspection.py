@@ -0,0 +1,76 @@
+import time
+from unittest import TestCase, mock
+
+from sqlER import ERGenerator, TypeIntrospection
+from sqlER.connection import ConnectionPool
+from sqlER.tests.fakes import company
+
+
+class FakeDb:
+    """Stands in for dbConnection, borrowing placeholder connections from a real pool."""
+
+    def __init__(self, pool, tables):
+        self.pool = pool
+        self._tables = tables
+
+    def __enter__(self):
+        self.connection = self.pool.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.pool.release(self.connection)
+
+    def schemas(self):
+        return [("db", "dbo", "dbo")]
+
+    def tables(self, exclusion=True):
+        return [("db", "dbo", name, "TABLE", None) for name in self._tables]
+
+
+def introspect_table(dbcnxt, table_name, schema, is_view, disable_sql_FK=False):
+    time.sleep(0.05)
+    return (table_name, schema, is_view, [], [("id", "int", False)], [])
+
+
+class ParallelIntrospectionTests(TestCase):
+    def setUp(self):
+        connect = mock.patch("sqlER.connection.pool.pyodbc.connect", side_effect=lambda _: mock.Mock())
+        connect.start()
+        self.addCleanup(connect.stop)
+        self.pool = ConnectionPool("dsn", max_size=3, checkout_timeout=0.2, health_check_after=3600)
+        self.names = [f"T{i}" for i in range(12)]
+        self.generator = ERGenerator.__new__(ERGenerator)
+        self.generator.schemas = []
+        self.generator.problem_tables = []
+        self.generator._connection = lambda schema_name="dbo": FakeDb(self.pool, self.names)
+        self.generator._introspect_table = introspect_table
+
+    def test_results_keep_catalog_order(self):
+        introspected = list(self.generator._introspect_parallel(workers=3))
+        self.assertEqual([info[0] for info in introspected], self.names)
+        self.assertEqual(self.generator.problem_tables, [])
+
+    def test_workers_capped_at_free_connections(self):
+        held = self.pool.acquire()
+        self.addCleanup(self.pool.release, held)
+        introspected = list(self.generator._introspect_parallel(workers=8))
+        self.assertEqual(len(introspected), len(self.names))
+        self.assertEqual(self.pool.stats()["in_use"], 1)
+
+
+class BulkIntrospectionTests(TestCase):
+    def test_bulk_matches_per_table(self):
+        catalog = company()
+        catalog.add_table("Audit", [("id", "int")], view=True)
+        per_table = catalog.generator(introspection=TypeIntrospection.PER_TABLE)
+        catalog.queries.clear()
+        bulk = catalog.generator(introspection=TypeIntrospection.BULK)
+        self.assertEqual(bulk.diagram.get_record(), per_table.diagram.get_record())
+        self.assertEqual(bulk.get_problem_tables(), [])
+
+    def test_bulk_reads_the_catalog_in_a_fixed_number_of_queries(self):
+        catalog = company()
+        for i in range(10):
+            catalog.add_table(f"T{i}", [("id", "int")], pk=["id"])
+        catalog.generator(introspection=TypeIntrospection.BULK)
+        self.assertEqual(sorted(catalog.queries), ["fields_bulk", "fk_bulk", "pk_bulk", "schemas", "tables"])
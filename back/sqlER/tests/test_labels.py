@@ -0,0 +1,53 @@
+import threading
+from unittest import TestCase, mock
+
+from sqlER import ERDiagram, Table
+from sqlER.ERDiagram.ERDiagram import LABEL_VARIANTS
+
+
+class TableLabelTests(TestCase):
+    def setUp(self):
+        self.diagram = ERDiagram("db")
+        self.table = Table("Customer")
+        for name in ("CustomerID", "Name", "Email", "Phone", "City"):
+            self.table.add_field(name, "str")
+        self.table.add_primary_key("CustomerID")
+        self.diagram.add_table(self.table)
+
+    def test_label_is_generated_once_per_table_version(self):
+        with mock.patch.object(
+            self.diagram, "_generate_table_label", wraps=self.diagram._generate_table_label
+        ) as generate:
+            first = self.diagram._table_label(self.table)
+            self.assertEqual(self.diagram._table_label(self.table), first)
+            self.assertEqual(generate.call_count, 1)
+            self.table.add_field("Country", "str")
+            self.assertNotEqual(self.diagram._table_label(self.table), first)
+            self.assertEqual(generate.call_count, 2)
+
+    def test_variants_are_bounded(self):
+        names = [field[0] for field in self.table.fields]
+        for i in range(len(names)):
+            self.diagram._table_label(self.table, frozenset(names[: i + 1]))
+        self.assertEqual(len(self.diagram._labels["Customer"][1]), LABEL_VARIANTS)
+
+    def test_concurrent_eviction(self):
+        names = [field[0] for field in self.table.fields]
+        variants = [frozenset(names[: i + 1]) for i in range(len(names))]
+        errors = []
+
+        def render():
+            try:
+                for _ in range(200):
+                    for fields in variants:
+                        self.diagram._table_label(self.table, fields)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=render) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(self.diagram._labels["Customer"][1]), LABEL_VARIANTS)
@@ -0,0 +1,103 @@
+import asyncio
+import subprocess
+from unittest import TestCase, mock
+
+from sqlER import RenderCache, RenderLimits, RenderTimeout, TransientRender, TypeDetail, TypeIntrospection
+from sqlER.tests.fakes import company, shop
+
+
+class FakeLayouts:
+    """Records the engines asked for, and times out the listed ones."""
+
+    def __init__(self, slow=()):
+        self.slow = set(slow)
+        self.calls = []
+
+    def __call__(self, source, format="svg", engine="dot", timeout=None):
+        self.calls.append((engine, timeout, source))
+        if engine in self.slow:
+            raise subprocess.TimeoutExpired(engine, timeout)
+        return engine.encode()
+
+    async def alayout(self, source, format="svg", engine="dot", timeout=None):
+        self.calls.append((engine, timeout, source))
+        if engine in self.slow:
+            raise asyncio.TimeoutError()
+        return engine.encode()
+
+
+class RenderLimitsTests(TestCase):
+    def render(self, layouts, limits, detail=TypeDetail.FULL):
+        with mock.patch("sqlER.ERDiagram.ERDiagram.run_layout", layouts):
+            return shop().render_to_bytes(limits=limits, detail=detail)
+
+    def arender(self, layouts, limits):
+        with mock.patch("sqlER.ERDiagram.ERDiagram.arun_layout", layouts.alayout):
+            return asyncio.run(shop().arender_to_bytes(limits=limits))
+
+    def test_dot_within_limits(self):
+        layouts = FakeLayouts()
+        self.assertEqual(self.render(layouts, RenderLimits(timeout=5)), b"dot")
+        self.assertEqual([call[:2] for call in layouts.calls], [("dot", 5)])
+
+    def test_slow_dot_falls_back_to_a_summarized_layout(self):
+        layouts = FakeLayouts(slow={"dot"})
+        limits = RenderLimits(timeout=1, fallback_timeout=7)
+        self.assertEqual(self.render(layouts, limits), b"sfdp")
+        self.assertEqual([call[:2] for call in layouts.calls], [("dot", 1), ("sfdp", 7)])
+        fallback = layouts.calls[1][2]
+        self.assertIn("overlap=false", fallback)
+        self.assertNotIn(">name<", fallback)
+        self.assertIn(">name<", layouts.calls[0][2])
+
+    def test_fallback_can_keep_every_field(self):
+        layouts = FakeLayouts(slow={"dot"})
+        self.render(layouts, RenderLimits(summarize=False))
+        self.assertIn(">name<", layouts.calls[1][2])
+
+    def test_too_many_tables_skip_dot(self):
+        layouts = FakeLayouts()
+        self.assertEqual(self.render(layouts, RenderLimits(max_nodes=3)), b"sfdp")
+        self.assertEqual([call[0] for call in layouts.calls], ["sfdp"])
+        layouts = FakeLayouts()
+        self.assertEqual(self.render(layouts, RenderLimits(max_edges=2)), b"sfdp")
+
+    def test_only_timeout_fallbacks_are_transient(self):
+        self.assertNotIsInstance(self.render(FakeLayouts(), RenderLimits()), TransientRender)
+        self.assertNotIsInstance(
+            self.render(FakeLayouts(), RenderLimits(max_nodes=3)), TransientRender
+        )
+        self.assertIsInstance(
+            self.render(FakeLayouts(slow={"dot"}), RenderLimits()), TransientRender
+        )
+        self.assertIsInstance(
+            self.arender(FakeLayouts(slow={"dot"}), RenderLimits()), TransientRender
+        )
+
+    def test_timeout_fallback_is_not_cached(self):
+        generator = company().generator(introspection=TypeIntrospection.BULK)
+        cache = RenderCache()
+        layouts = FakeLayouts(slow={"dot"})
+        with mock.patch("sqlER.ERDiagram.ERDiagram.run_layout", layouts):
+            generator.render_diagrams(cache=cache, limits=RenderLimits())
+            generator.render_diagrams(cache=cache, limits=RenderLimits())
+        self.assertEqual([call[0] for call in layouts.calls], ["dot", "sfdp"] * 2)
+        self.assertIsNone(cache.get(generator.render_key(limits=RenderLimits())))
+        layouts.slow.clear()
+        with mock.patch("sqlER.ERDiagram.ERDiagram.run_layout", layouts):
+            data = generator.render_diagrams(cache=cache, limits=RenderLimits())
+        self.assertEqual(cache.get(generator.render_key(limits=RenderLimits())), data)
+
+    def test_both_engines_too_slow(self):
+        with self.assertRaises(RenderTimeout):
+            self.render(FakeLayouts(slow={"dot", "sfdp"}), RenderLimits())
+
+    def test_schema_drawing_has_no_fallback(self):
+        with self.assertRaises(RenderTimeout):
+            self.render(FakeLayouts(slow={"dot"}), RenderLimits(), TypeDetail.SCHEMA)
+
+    def test_async_fallback(self):
+        layouts = FakeLayouts(slow={"dot"})
+        self.assertEqual(self.arender(layouts, RenderLimits()), b"sfdp")
+        with self.assertRaises(RenderTimeout):
+            self.arender(FakeLayouts(slow={"dot", "sfdp"}), RenderLimits())
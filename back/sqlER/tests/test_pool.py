@@ -0,0 +1,110 @@
+import threading
+from unittest import TestCase, mock
+
+from sqlER.connection import ConnectionPool, dbConnection, close_pools, get_pool
+
+
+class FakeCursor:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def execute(self, sql):
+        pass
+
+    def fetchall(self):
+        return [(1,)]
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.pings = 0
+        self.pool = None  # checked not to be locked while closing
+
+    def cursor(self):
+        self.pings += 1
+        return FakeCursor()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        if self.pool is not None:
+            self.closed_under_lock = not self.pool._cond.acquire(blocking=False)
+            if not self.closed_under_lock:
+                self.pool._cond.release()
+        self.closed = True
+
+    def getinfo(self, info):
+        raise RuntimeError("getinfo failed")
+
+
+class ConnectionPoolTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("sqlER.connection.pool.pyodbc.connect", side_effect=lambda _: FakeConnection())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_release_reuses_connection(self):
+        pool = ConnectionPool("dsn", max_size=2)
+        connection = pool.acquire()
+        pool.release(connection)
+        self.assertIs(pool.acquire(), connection)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_recently_released_connection_is_not_pinged(self):
+        pool = ConnectionPool("dsn", max_size=1)
+        connection = pool.acquire()
+        pool.release(connection)
+        pool.acquire()
+        self.assertEqual(connection.pings, 0)
+
+    def test_long_idle_connection_is_pinged(self):
+        pool = ConnectionPool("dsn", max_size=1, health_check_after=0.0)
+        connection = pool.acquire()
+        pool.release(connection)
+        pool.acquire()
+        self.assertEqual(connection.pings, 1)
+
+    def test_expired_connections_are_closed_outside_the_lock(self):
+        pool = ConnectionPool("dsn", max_size=2, idle_timeout=0.0)
+        connection = pool.acquire()
+        connection.pool = pool
+        pool.release(connection)
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertTrue(connection.closed)
+        self.assertFalse(connection.closed_under_lock)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_exhausted_pool_times_out(self):
+        pool = ConnectionPool("dsn", max_size=1, checkout_timeout=0.05)
+        pool.acquire()
+        with self.assertRaises(TimeoutError):
+            pool.acquire()
+
+    def test_release_wakes_waiter(self):
+        pool = ConnectionPool("dsn", max_size=1, checkout_timeout=5)
+        connection = pool.acquire()
+        threading.Timer(0.05, pool.release, (connection,)).start()
+        self.assertIs(pool.acquire(), connection)
+
+    def test_close_discards_checked_out_connections_on_release(self):
+        pool = ConnectionPool("dsn", max_size=2)
+        idle, busy = pool.acquire(), pool.acquire()
+        pool.release(idle)
+        pool.close()
+        self.assertTrue(idle.closed)
+        self.assertFalse(busy.closed)
+        pool.release(busy)
+        self.assertTrue(busy.closed)
+        self.assertEqual(pool.stats(), {"size": 0, "idle": 0, "in_use": 0, "max_size": 2})
+
+    def test_enter_releases_connection_when_getinfo_fails(self):
+        self.addCleanup(close_pools)
+        db = dbConnection("driver", "server", "database", "user", "password")
+        with self.assertRaises(RuntimeError):
+            db.__enter__()
+        self.assertEqual(get_pool(db.connection_string).stats()["in_use"], 0)
@@ -0,0 +1,56 @@
+import tempfile
+from unittest import TestCase
+
+from sqlER import TypeIntrospection
+from sqlER.tests.fakes import company
+
+
+class RefreshTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.snapshot_dir = directory.name
+
+    def test_unchanged_catalog_is_a_no_op(self):
+        catalog = company()
+        generator = catalog.generator(introspection=TypeIntrospection.BULK)
+        generator.object_stamps = generator._read_object_stamps()
+        self.assertEqual(
+            generator.refresh(), {"added": [], "altered": [], "dropped": [], "full": False}
+        )
+
+    def test_added_table_is_fetched_alone(self):
+        catalog = company()
+        generator = catalog.generator(introspection=TypeIntrospection.BULK)
+        generator.object_stamps = generator._read_object_stamps()
+        catalog.add_table("Project", [("id", "int")], pk=["id"])
+        summary = generator.refresh()
+        self.assertEqual(summary["added"], [("dbo", "Project")])
+        self.assertEqual([t.name for t in generator.tables], ["Department", "Employee", "Project"])
+
+    def test_objects_outside_introspected_schemas_are_not_stamped(self):
+        catalog = company()
+        catalog.add_table("Employee", [("id", "int")], schema="audit")
+        generator = catalog.generator(
+            introspection=TypeIntrospection.BULK, snapshot_dir=self.snapshot_dir
+        )
+        self.assertEqual(
+            set(generator.object_stamps), {("dbo", "Department"), ("dbo", "Employee")}
+        )
+
+        catalog.add_table("Project", [("id", "int")], pk=["id"])
+        summary = generator.refresh()
+        self.assertEqual(summary["dropped"], [])
+        self.assertIn(
+            ("Employee", "department_id", "Department", "id", "FK_Employee_Department", False),
+            generator.relations,
+        )
+
+    def test_full_refresh_keeps_introspection_mode(self):
+        catalog = company()
+        generator = catalog.generator(introspection=TypeIntrospection.PER_TABLE)
+        generator.object_stamps = {}
+        catalog.queries.clear()
+        self.assertTrue(generator.refresh()["full"])
+        self.assertIn("pk", catalog.queries)
+        self.assertNotIn("fields_bulk", catalog.queries)
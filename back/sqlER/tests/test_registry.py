@@ -0,0 +1,142 @@
+import asyncio
+import time
+from unittest import TestCase, mock
+
+from sqlER import RenderCache, RenderLimits, SchemaRegistry, TypeIntrospection, TypeRankdir
+from sqlER import configure_registry, get_registry, start_refresher, stop_refresher
+from sqlER.registry.registry import REGISTRY_MAX_ENTRIES, REGISTRY_TTL
+from sqlER.tests.fakes import company
+
+
+class SchemaRegistryTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("sqlER.registry.registry.ERGenerator", side_effect=lambda **kwargs: mock.Mock(stamp=None))
+        self.ERGenerator = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_same_arguments_share_one_generator(self):
+        registry = SchemaRegistry()
+        first = registry.get(server="s", database="db", reasoning_FK=False)
+        self.assertIs(registry.get(server="s", database="db", reasoning_FK=False), first)
+        self.assertIsNot(registry.get(server="s", database="db", reasoning_FK=True), first)
+        self.assertEqual(self.ERGenerator.call_count, 2)
+
+    def test_invalidate_database_forgets_every_flag_set(self):
+        registry = SchemaRegistry()
+        registry.get(server="s", database="db", reasoning_FK=False)
+        registry.get(server="s", database="db", reasoning_FK=True)
+        registry.get(server="s", database="other")
+        self.assertEqual(registry.invalidate_database("s", "db"), 2)
+        self.assertEqual(registry.stats()["entries"], 1)
+
+    def test_expired_entry_is_rebuilt(self):
+        registry = SchemaRegistry(ttl=0.01)
+        first = registry.get(database="db")
+        time.sleep(0.02)
+        self.assertIsNot(registry.get(database="db"), first)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        registry = SchemaRegistry(max_entries=2)
+        a = registry.get(database="a")
+        registry.get(database="b")
+        registry.get(database="a")
+        registry.get(database="c")
+        self.assertIs(registry.get(database="a"), a)
+        self.assertEqual(len(registry.keys()), 2)
+        self.assertNotIn(SchemaRegistry.key(database="b"), registry.keys())
+
+
+class RevalidationTests(TestCase):
+    def setUp(self):
+        self.catalog_stamp = "1"
+
+        def build(**kwargs):
+            return mock.Mock(stamp=self.catalog_stamp, catalog_stamp=lambda: self.catalog_stamp)
+
+        patcher = mock.patch("sqlER.registry.registry.ERGenerator", side_effect=build)
+        self.ERGenerator = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unchanged_catalog_is_kept(self):
+        registry = SchemaRegistry()
+        generator = registry.get(database="db")
+        self.assertIsNone(registry.revalidate(SchemaRegistry.key(database="db")))
+        self.assertIs(registry.get(database="db"), generator)
+
+    def test_changed_catalog_is_introspected_again(self):
+        registry = SchemaRegistry()
+        generator = registry.get(database="db")
+        self.catalog_stamp = "2"
+        self.assertEqual(registry.revalidate(SchemaRegistry.key(database="db")), {"database": "db"})
+        self.assertIsNot(registry.get(database="db"), generator)
+        self.assertIsNone(registry.revalidate(SchemaRegistry.key(database="db")))
+
+    def test_entry_without_stamp_starts_tracking_changes(self):
+        registry = SchemaRegistry()
+        key = SchemaRegistry.key(database="db")
+        self.catalog_stamp = None
+        generator = registry.get(database="db")
+        self.catalog_stamp = "1"
+        self.assertIsNone(registry.revalidate(key))
+        self.assertIs(registry.get(database="db"), generator)
+        self.catalog_stamp = "2"
+        self.assertIsNotNone(registry.revalidate(key))
+
+    def test_expired_entry_is_rebuilt(self):
+        registry = SchemaRegistry(ttl=0.01)
+        registry.get(database="db")
+        time.sleep(0.02)
+        self.assertIsNotNone(registry.revalidate(SchemaRegistry.key(database="db")))
+        self.assertIsNone(registry.revalidate("unknown"))
+
+    def test_refresher_serves_stale_entries_while_rebuilding(self):
+        configure_registry(ttl=0.05)
+        self.addCleanup(configure_registry, max_entries=REGISTRY_MAX_ENTRIES, ttl=REGISTRY_TTL)
+        start_refresher(interval=3600)
+        self.addCleanup(stop_refresher)
+        stale = get_registry().get(database="db")
+        time.sleep(0.1)
+        self.assertIs(get_registry().get(database="db"), stale)
+        deadline = time.monotonic() + 5
+        while get_registry().get(database="db") is stale and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIsNot(get_registry().get(database="db"), stale)
+
+    def test_without_refresher_expired_entries_are_rebuilt_on_request(self):
+        configure_registry(ttl=0.05)
+        self.addCleanup(configure_registry, max_entries=REGISTRY_MAX_ENTRIES, ttl=REGISTRY_TTL)
+        stale = get_registry().get(database="db")
+        time.sleep(0.1)
+        self.assertIsNot(get_registry().get(database="db"), stale)
+
+
+class SharedDiagramTests(TestCase):
+    def test_concurrent_renders_keep_their_own_settings(self):
+        generator = company().generator(introspection=TypeIntrospection.BULK)
+        settings = generator.diagram.settings
+
+        async def layout(source, format="svg", engine="dot", timeout=None):
+            await asyncio.sleep(0.01)
+            return source.encode("utf-8")
+
+        async def render_both():
+            cache = RenderCache()
+            return await asyncio.gather(
+                generator.arender_diagrams(TypeRankdir.LR, 100, cache=cache, limits=RenderLimits()),
+                generator.arender_diagrams(TypeRankdir.TB, 200, cache=cache, limits=RenderLimits()),
+            )
+
+        with mock.patch("sqlER.ERDiagram.ERDiagram.arun_layout", layout):
+            lr, tb = asyncio.run(render_both())
+        self.assertIn(b"rankdir=LR", lr)
+        self.assertIn(b"dpi=100", lr)
+        self.assertIn(b"rankdir=TB", tb)
+        self.assertIn(b"dpi=200", tb)
+        self.assertEqual(generator.diagram.settings, settings)
+
+    def test_render_key_leaves_the_diagram_untouched(self):
+        generator = company().generator(introspection=TypeIntrospection.BULK)
+        settings = generator.diagram.settings
+        lr = generator.render_key(TypeRankdir.LR, 100)
+        self.assertNotEqual(lr, generator.render_key(TypeRankdir.TB, 100))
+        self.assertEqual(generator.diagram.settings, settings)
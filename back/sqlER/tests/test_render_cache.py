@@ -0,0 +1,89 @@
+import os
+import tempfile
+import time
+from unittest import TestCase, mock
+
+from sqlER import ERDiagram, RenderCache, Table
+
+
+class RenderCacheTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        cache = RenderCache(max_bytes=10)
+        cache.put("aa", b"1234")
+        cache.put("bb", b"1234")
+        cache.get("aa")
+        cache.put("cc", b"1234")
+        self.assertEqual(cache.get("aa"), b"1234")
+        self.assertIsNone(cache.get("bb"))
+        self.assertEqual(cache.stats()["bytes"], 8)
+
+    def test_entry_larger_than_budget_is_not_kept_in_memory(self):
+        cache = RenderCache(max_bytes=3)
+        cache.put("aa", b"1234")
+        self.assertIsNone(cache.get("aa"))
+
+    def test_disk_tier_survives_memory_clear(self):
+        cache = RenderCache(directory=self.directory)
+        cache.put("ab12", b"<svg/>")
+        cache.clear()
+        self.assertEqual(cache.get("ab12"), b"<svg/>")
+        self.assertEqual(RenderCache(directory=self.directory).get("ab12"), b"<svg/>")
+
+    def test_disk_tier_is_swept_to_its_budget_oldest_first(self):
+        cache = RenderCache(directory=self.directory)
+        now = time.time()
+        for age, key in enumerate(["aa01", "bb02", "cc03"]):
+            cache.put(key, b"1234")
+            os.utime(cache._path(key), (now - 100 + age, now - 100 + age))
+        cache.clear()
+        cache.get("aa01")  # a disk hit makes it the most recently used
+        cache.max_disk_bytes = 10
+        self.assertEqual(cache.sweep_disk(), 8)
+        self.assertFalse(os.path.exists(cache._path("bb02")))
+        self.assertTrue(os.path.exists(cache._path("aa01")))
+
+    def test_put_sweeps_once_enough_was_written(self):
+        cache = RenderCache(directory=self.directory, max_disk_bytes=20)
+        for i in range(10):
+            cache.put(f"{i:02x}ff", b"1234")
+        self.assertLessEqual(cache.sweep_disk(), 20)
+        self.assertTrue(os.path.exists(cache._path("09ff")))
+
+    def test_get_or_render_renders_once(self):
+        cache = RenderCache(directory=self.directory)
+        render = mock.Mock(return_value=b"<svg/>")
+        self.assertEqual(cache.get_or_render("cd34", render), b"<svg/>")
+        self.assertEqual(cache.get_or_render("cd34", render), b"<svg/>")
+        render.assert_called_once_with()
+
+
+class ContentHashTests(TestCase):
+    def diagram(self) -> ERDiagram:
+        diagram = ERDiagram("db")
+        for name in ("Customer", "Order"):
+            table = Table(name)
+            table.add_field(name + "ID", "int")
+            table.add_primary_key(name + "ID")
+            diagram.add_table(table)
+        return diagram
+
+    def test_digest_is_reused_until_the_diagram_changes(self):
+        diagram = self.diagram()
+        first = diagram.content_hash()
+        with mock.patch.object(diagram, "get_record", wraps=diagram.get_record) as get_record:
+            self.assertEqual(diagram.content_hash(), first)
+            get_record.assert_not_called()
+            diagram.add_relation("Order", "CustomerID", "Customer", "CustomerID")
+            second = diagram.content_hash()
+            self.assertEqual(get_record.call_count, 1)
+        self.assertNotEqual(second, first)
+        diagram.tables["Customer"].add_field("Name", "str")
+        self.assertNotEqual(diagram.content_hash(), second)
+
+    def test_equal_content_gives_equal_digest(self):
+        self.assertEqual(self.diagram().content_hash(), self.diagram().content_hash())
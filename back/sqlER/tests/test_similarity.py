@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from sqlER.reasoning.similarity import NameSimilarityIndex, name_ngrams
+
+
+class NameSimilarityIndexTests(TestCase):
+    def test_ngrams_are_padded_and_lower_cased(self):
+        self.assertEqual(name_ngrams("ID"), ["  i", " id", "id "])
+
+    def test_scores_are_cosine_similarities(self):
+        index = NameSimilarityIndex(["Customer", "Product"])
+        scores = index.scores("Customer", ["Customer", "Product"])
+        self.assertAlmostEqual(scores[0], 1.0)
+        self.assertGreaterEqual(scores[1], 0.0)
+        self.assertLess(scores[1], scores[0])
+
+    def test_best_picks_the_closest_name(self):
+        index = NameSimilarityIndex()
+        self.assertEqual(index.best("CustomerID", ["Order", "Customer", "Product"]), "Customer")
+        self.assertEqual(index.best("ProductCode", ["Order", "Customer", "Product"]), "Product")
+
+    def test_ties_go_to_the_first_candidate(self):
+        index = NameSimilarityIndex()
+        self.assertEqual(index.best("Code", ["Code", "code"]), "Code")
+
+    def test_fallback_decides_without_shared_ngrams(self):
+        self.assertIsNone(NameSimilarityIndex(fallback_n=None).best("xq", ["Order", "Customer"]))
+        self.assertEqual(NameSimilarityIndex().best("xq", ["Order", "Ax"]), "Ax")
+
+    def test_no_candidates(self):
+        self.assertIsNone(NameSimilarityIndex().best("CustomerID", []))
+
+    def test_names_added_later_are_scored(self):
+        index = NameSimilarityIndex(["Order"])
+        index.best("OrderID", ["Order"])
+        self.assertEqual(index.best("InvoiceID", ["Order", "Invoice"]), "Invoice")
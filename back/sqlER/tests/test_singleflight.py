@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+
+from sqlER import SchemaRegistry, SingleFlight
+
+
+class SingleFlightTests(TestCase):
+    def test_concurrent_calls_share_one_computation(self):
+        flights = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return object()
+
+        with ThreadPoolExecutor(4) as executor:
+            futures = [executor.submit(flights.do, "key", compute) for _ in range(4)]
+            while flights.in_flight() == 0 or not calls:
+                time.sleep(0.01)
+            time.sleep(0.05)
+            release.set()
+            results = {id(future.result()) for future in futures}
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(flights.in_flight(), 0)
+
+    def test_exception_reaches_every_caller_and_is_not_kept(self):
+        flights = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise ValueError("boom")
+
+        with ThreadPoolExecutor(3) as executor:
+            futures = [executor.submit(flights.do, "key", fail) for _ in range(3)]
+            time.sleep(0.05)
+            release.set()
+            for future in futures:
+                with self.assertRaisesRegex(ValueError, "boom"):
+                    future.result()
+        self.assertEqual(flights.do("key", lambda: 42), 42)
+
+    def test_different_keys_do_not_wait_for_each_other(self):
+        flights = SingleFlight()
+        self.assertEqual(flights.do("a", lambda: 1), 1)
+        self.assertEqual(flights.do("b", lambda: 2), 2)
+
+
+class AsyncSingleFlightTests(TestCase):
+    def test_concurrent_awaits_share_one_task(self):
+        flights = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "svg"
+
+        async def main():
+            return await asyncio.gather(*(flights.ado("key", compute) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(main()), ["svg"] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_async_exception_reaches_every_caller(self):
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def main():
+            return await asyncio.gather(
+                *(flights.ado("key", fail) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(main())
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(flights.in_flight(), 0)
+
+    def test_one_cancelled_caller_does_not_cancel_the_others(self):
+        flights = SingleFlight()
+        cancelled = []
+
+        async def compute():
+            try:
+                await asyncio.sleep(0.1)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+            return "svg"
+
+        async def main():
+            first = asyncio.ensure_future(flights.ado("key", compute))
+            second = asyncio.ensure_future(flights.ado("key", compute))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await first
+            return await second
+
+        self.assertEqual(asyncio.run(main()), "svg")
+        self.assertEqual(cancelled, [])
+
+    def test_computation_is_cancelled_once_every_caller_is_gone(self):
+        flights = SingleFlight()
+        cancelled = []
+
+        async def compute():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+
+        async def main():
+            callers = [asyncio.ensure_future(flights.ado("key", compute)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            for caller in callers:
+                caller.cancel()
+            await asyncio.gather(*callers, return_exceptions=True)
+            await asyncio.sleep(0.01)
+            # A new caller starts over instead of joining the abandoned computation
+            return await flights.ado("key", asyncio.sleep, 0, "fresh")
+
+        self.assertEqual(asyncio.run(main()), "fresh")
+        self.assertEqual(cancelled, [1])
+
+
+class RegistryCoalescingTests(TestCase):
+    def test_concurrent_gets_build_once(self):
+        release = threading.Event()
+
+        def build(**kwargs):
+            release.wait(5)
+            return mock.Mock(stamp=None)
+
+        registry = SchemaRegistry()
+        with mock.patch("sqlER.registry.registry.ERGenerator", side_effect=build) as ERGenerator:
+            with ThreadPoolExecutor(4) as executor:
+                futures = [executor.submit(registry.get, database="db") for _ in range(4)]
+                time.sleep(0.05)
+                release.set()
+                generators = {id(future.result()) for future in futures}
+        self.assertEqual(ERGenerator.call_count, 1)
+        self.assertEqual(len(generators), 1)
@@ -0,0 +1,51 @@
+import gzip
+import tempfile
+from unittest import TestCase
+
+from sqlER import TypeIntrospection
+from sqlER.snapshot import SchemaSnapshot
+from sqlER.tests.fakes import company
+
+
+class SchemaSnapshotTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_load_checks_the_stamp(self):
+        snapshot = SchemaSnapshot(self.directory, {"database": "db"})
+        snapshot.save("1|2", {"tables": []})
+        self.assertEqual(snapshot.load("1|2"), {"tables": []})
+        self.assertEqual(snapshot.load(), {"tables": []})
+        self.assertIsNone(snapshot.load("2|2"))
+
+    def test_other_key_does_not_read_the_snapshot(self):
+        SchemaSnapshot(self.directory, {"database": "db"}).save("1|2", {})
+        self.assertIsNone(SchemaSnapshot(self.directory, {"database": "other"}).load())
+
+    def test_corrupt_or_missing_file_reads_as_none(self):
+        snapshot = SchemaSnapshot(self.directory, {"database": "db"})
+        self.assertIsNone(snapshot.read())
+        with open(snapshot.path, "wb") as f:
+            f.write(gzip.compress(b"{not json"))
+        self.assertIsNone(snapshot.read())
+        snapshot.invalidate()
+        self.assertIsNone(snapshot.read())
+
+    def test_unchanged_catalog_is_restored_without_introspecting(self):
+        catalog = company()
+        first = catalog.generator(introspection=TypeIntrospection.BULK, snapshot_dir=self.directory)
+        catalog.queries.clear()
+        second = catalog.generator(introspection=TypeIntrospection.BULK, snapshot_dir=self.directory)
+        self.assertEqual(catalog.queries, ["catalog_stamp"])
+        self.assertEqual(second.diagram.get_record(), first.diagram.get_record())
+        self.assertEqual(second.relations, first.relations)
+
+    def test_changed_catalog_is_refreshed_and_saved(self):
+        catalog = company()
+        catalog.generator(introspection=TypeIntrospection.BULK, snapshot_dir=self.directory)
+        catalog.add_table("Project", [("id", "int")], pk=["id"])
+        generator = catalog.generator(introspection=TypeIntrospection.BULK, snapshot_dir=self.directory)
+        self.assertIn("Project", generator.diagram.get_table_names())
+        self.assertEqual(generator.snapshot.read()["stamp"], generator.stamp)